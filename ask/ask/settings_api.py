@@ -0,0 +1,20 @@
+"""
+Slim settings for API-only workers, without the admin and the messages framework:
+
+    DJANGO_SETTINGS_MODULE=ask.settings_api gunicorn
+"""
+from .settings import *  # noqa: F401,F403
+from .settings import INSTALLED_APPS, MIDDLEWARE, TEMPLATES
+
+INSTALLED_APPS = [app for app in INSTALLED_APPS if app not in ('django.contrib.admin', 'django.contrib.messages')]
+
+MIDDLEWARE = [item for item in MIDDLEWARE if item != 'django.contrib.messages.middleware.MessageMiddleware']
+
+TEMPLATES = [dict(TEMPLATES[0], OPTIONS=dict(TEMPLATES[0]['OPTIONS'], context_processors=[
+    processor for processor in TEMPLATES[0]['OPTIONS']['context_processors']
+    if processor != 'django.contrib.messages.context_processors.messages'
+]))]
+
+ROOT_URLCONF = 'ask.urls_api'
+# the API workers keep starting fast, importing DRF and the views on the first request
+PRELOAD_VIEWS = False
@@ -13,11 +13,22 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
-from django.contrib import admin
-from django.urls import path, include
+from django.apps import apps
+from django.conf import settings
+from django.urls import path, include, re_path
+from django.views.static import serve
 
 urlpatterns = [
-    path('admin/', admin.site.urls),
     path('', include('qa.urls')),
     path('api/', include('qa.api_urls')),
 ]
+
+# the admin is left out of the slim settings (ask/settings_api.py)
+if apps.is_installed('django.contrib.admin'):
+    from django.contrib import admin
+    urlpatterns.insert(0, path('admin/', admin.site.urls))
+
+# nginx serves the built bundles and thumbnails from public/ (etc/nginx.conf), the development
+# server does in DEBUG
+if settings.DEBUG:
+    urlpatterns.append(re_path(r'^(?P<path>.+\.\w+)$', serve, {'document_root': settings.ASSETS_ROOT}))
@@ -0,0 +1,6 @@
+"""URLconf of the API-only workers (ask/settings_api.py)."""
+from django.urls import path, include
+
+urlpatterns = [
+    path('api/', include('qa.api_urls')),
+]
@@ -0,0 +1,43 @@
+"""
+Benchmarks of the ask project. Run them from the ask directory, e.g.
+
+    python -m benchmarks.bench_workers
+
+Scripts that need data create it in a throwaway test database (see `test_database`) from the
+migrations in qa/migrations/.
+"""
+import contextlib
+import os
+import time
+
+
+def setup_django():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ask.settings')
+    import django
+    django.setup()
+
+
+@contextlib.contextmanager
+def test_database():
+    from django.test import override_settings
+    from django.test.utils import setup_databases, teardown_databases, setup_test_environment
+    setup_test_environment()
+    old_config = setup_databases(verbosity=0, interactive=False)
+    try:
+        # a benchmark's single client would be throttled like a flood
+        with override_settings(RATELIMIT_ENABLED=False):
+            yield
+    finally:
+        teardown_databases(old_config, verbosity=0)
+
+
+def measure(func, number=1):
+    """Returns the seconds `number` calls of func take."""
+    start = time.perf_counter()
+    for _ in range(number):
+        func()
+    return time.perf_counter() - start
+
+
+def report(name, operations, seconds, unit='ops'):
+    print(f'{name:<48} {operations / seconds:>12,.0f} {unit}/s {seconds * 1e6 / operations:>10,.1f} µs/op')
@@ -0,0 +1,65 @@
+"""
+Requests per second of the raw WSGI app in hello.py compared with the Django stack,
+both called in-process so only the application cost is measured.
+
+    python -m benchmarks.bench_hello [--requests 20000]
+"""
+import argparse
+import io
+import os
+import sys
+from wsgiref.util import setup_testing_defaults
+
+from benchmarks import setup_django, test_database, measure, report
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+import hello  # noqa: E402
+
+
+def make_environ(path, query='', accept='text/plain'):
+    environ = {'PATH_INFO': path, 'QUERY_STRING': query, 'HTTP_ACCEPT': accept,
+               'SERVER_NAME': 'localhost', 'HTTP_HOST': 'localhost', 'wsgi.input': io.BytesIO()}
+    setup_testing_defaults(environ)
+    return environ
+
+
+def call(app, environ):
+    def start_response(status, headers, exc_info=None):
+        pass
+    environ['wsgi.input'].seek(0)
+    body = app(environ, start_response)
+    for _ in body:
+        pass
+    if hasattr(body, 'close'):
+        body.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=20000)
+    args = parser.parse_args()
+    number = args.requests
+
+    cases = [
+        ('hello.py /hello/health', make_environ('/hello/health')),
+        ('hello.py /hello/?a=1&b=x%20y text', make_environ('/hello/', 'a=1&b=x%20y&c=%D1%8F')),
+        ('hello.py /hello/?a=1&b=x%20y json', make_environ('/hello/', 'a=1&b=x%20y&c=%D1%8F', 'application/json')),
+    ]
+    for name, environ in cases:
+        report(name, number, measure(lambda: call(hello.app, environ), number), 'req')
+
+    setup_django()
+    from django.core.wsgi import get_wsgi_application
+    from qa.models import Question
+    application = get_wsgi_application()
+    with test_database():
+        for num in range(10):
+            Question.objects.create(title=f'Question {num}', text='text')
+        django_number = max(number // 20, 100)
+        for name, path in (('django /login/ (no queries)', '/login/'), ('django / (feed)', '/')):
+            environ = make_environ(path)
+            report(name, django_number, measure(lambda: call(application, environ), django_number), 'req')
+
+
+if __name__ == '__main__':
+    main()
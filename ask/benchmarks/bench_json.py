@@ -0,0 +1,46 @@
+"""
+Rendering 10k QuestionSerializer rows with the default DRF JSON renderer and qa.renderers.FastJSONRenderer.
+
+    python -m benchmarks.bench_json [--rows 10000] [--repeat 5]
+"""
+import argparse
+
+from benchmarks import setup_django, test_database, measure, report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.contrib.auth.models import User
+    from rest_framework.renderers import JSONRenderer
+    from qa import fastjson
+    from qa.api import QuestionSerializer
+    from qa.models import Question
+    from qa.renderers import FastJSONRenderer
+
+    with test_database():
+        user = User.objects.create(username='bench', email='bench@example.com')
+        Question.objects.bulk_create(
+            Question(title=f'Question {num}', text='Some text of the question ' * 5, author=user)
+            for num in range(args.rows)
+        )
+        queryset = Question.objects.select_related('author')
+        data = QuestionSerializer(queryset, many=True).data
+        rows = args.rows * args.repeat
+
+        report('QuestionSerializer(many=True).data', rows,
+               measure(lambda: QuestionSerializer(queryset.all(), many=True).data, args.repeat), 'row')
+        report('rest_framework JSONRenderer', rows, measure(lambda: JSONRenderer().render(data), args.repeat), 'row')
+        renderer = FastJSONRenderer()
+        name = 'orjson' if fastjson.orjson is not None else 'stdlib json'
+        report(f'FastJSONRenderer ({name})', rows, measure(lambda: renderer.render(data), args.repeat), 'row')
+        report('qa.fastjson stdlib fallback', rows,
+               measure(lambda: fastjson._stdlib_dumps(data), args.repeat), 'row')
+
+
+if __name__ == '__main__':
+    main()
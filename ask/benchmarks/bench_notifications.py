@@ -0,0 +1,54 @@
+"""
+Notifying the author of a question receiving thousands of answers: queueing the events,
+the background fan-out coalescing them, and sending the digests of many users.
+
+    python -m benchmarks.bench_notifications [--answers 5000] [--batch-size 100] [--users 1000]
+"""
+import argparse
+
+from benchmarks import setup_django, test_database, measure, report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--answers', type=int, default=5000)
+    parser.add_argument('--batch-size', type=int, default=100)
+    parser.add_argument('--users', type=int, default=1000)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.contrib.auth.models import User
+    from django.core import mail
+    from django.test import override_settings
+    from qa import notifications, tasks
+    from qa.models import Question, Answer, Notification, UserProfile
+
+    with test_database(), override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend'):
+        mail.outbox = []
+        author = User.objects.create(username='author', email='author@example.com')
+        answerer = User.objects.create(username='answerer')
+        question = Question.objects.create(title='Popular question', author=author)
+        answers = Answer.objects.bulk_create(Answer(text='Answer', question=question, author=answerer)
+                                             for _ in range(args.answers))
+
+        report('events queued', args.answers, measure(lambda: [notifications.answered(a) for a in answers]), 'event')
+        report(f'fan-out, batches of {args.batch_size}', args.answers,
+               measure(lambda: tasks.work(args.batch_size, once=True)), 'event')
+        assert Notification.objects.get().count == args.answers
+        assert UserProfile.objects.get(user=author).unread_notifications == args.answers
+
+        User.objects.bulk_create(User(username=f'user{num}', email=f'user{num}@example.com')
+                                 for num in range(args.users))
+        Question.objects.bulk_create(Question(title=f'Question {num}', author=user)
+                                     for num, user in enumerate(User.objects.filter(username__startswith='user')))
+        question_ids = list(Question.objects.exclude(pk=question.pk).values_list('pk', flat=True))
+        for start in range(0, len(question_ids), 500):
+            notifications.voted(answerer, question_ids[start:start + 500])
+        tasks.work(args.batch_size, once=True)
+        report('digests sent (locmem backend)', args.users + 1,
+               measure(lambda: list(notifications.send_digests())), 'email')
+        assert len(mail.outbox) == args.users + 1
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+"""
+Overhead of qa.ratelimit per request with the local and the cache backend.
+
+    python -m benchmarks.bench_ratelimit [--requests 100000] [--clients 1000]
+"""
+import argparse
+
+from benchmarks import setup_django, measure, report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=100000)
+    parser.add_argument('--clients', type=int, default=1000)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.http import HttpResponse
+    from django.test import RequestFactory, override_settings
+    from qa import ratelimit
+
+    def view(request):
+        return HttpResponse()
+
+    factory = RequestFactory()
+    requests = [factory.post('/', REMOTE_ADDR=f'10.0.{num // 256}.{num % 256}') for num in range(args.clients)]
+    for request in requests:
+        request.user = type('AnonymousUser', (), {'is_authenticated': False})()
+
+    def run(handler):
+        def requests_loop():
+            for num in range(args.requests):
+                handler(requests[num % args.clients])
+        return requests_loop
+
+    baseline = measure(run(view))
+    report('undecorated view', args.requests, baseline, 'request')
+    limited = ratelimit.ratelimit('bench')(view)
+    for name in ('local', 'cache'):
+        with override_settings(RATELIMIT_ENABLED=True, RATELIMIT_BACKEND=name,
+                               RATELIMITS={'bench': f'{args.requests}/s'}):
+            # the buckets left by an earlier run are full again after a second
+            seconds = measure(run(limited))
+            report(f'@ratelimit, {name} backend', args.requests, seconds, 'request')
+            print(f'    overhead {(seconds - baseline) / args.requests * 1e6:.1f} µs/request')
+
+
+if __name__ == '__main__':
+    main()
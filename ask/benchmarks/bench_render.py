@@ -0,0 +1,69 @@
+"""
+Rendering the first page of a 10k question feed: the former questions_new.html looping over
+every page number, the current one with the elided page range, and the current one with its
+question list served from the fragment cache.
+
+    python -m benchmarks.bench_render [--questions 10000] [--requests 200]
+"""
+import argparse
+
+from benchmarks import setup_django, test_database, measure, report
+
+# questions_new.html before the page range was elided and the list was moved out of its loop
+FORMER_TEMPLATE = '''{% extends 'base.html' %}
+{% block content %} {{ block.super }}
+    <nav><ul class="pagination">
+    {% for p in paginator.page_range %}
+        {% if p == page.number %}
+            {% for question in questions %}
+                <li class="active"><p><a href="{{ question.get_absolute_url }}">{{ question.title }}</a></p>
+            {% endfor %}
+        {% else %}
+        <li>
+        {% endif %}
+        <a href="{{ paginator.baseurl }}{{ p }}"> {{ p }} </a></li>
+    {% endfor %}
+    </ul></nav>
+{% endblock %}'''
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--questions', type=int, default=10000)
+    parser.add_argument('--requests', type=int, default=200)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.core.cache import cache
+    from django.core.paginator import Paginator
+    from django.template import engines
+    from django.template.loader import get_template
+    from django.test import Client, RequestFactory
+    from qa.conditional import content_changed
+    from qa.models import Question
+
+    with test_database():
+        Question.objects.bulk_create(Question(title=f'Question {num}') for num in range(args.questions))
+        request = RequestFactory().get('/')
+        paginator = Paginator(Question.objects.new(), 10)
+        paginator.baseurl = '/?page='
+        page = paginator.page(1)
+        context = {'questions': list(page.object_list), 'paginator': paginator, 'page': page}
+
+        former = engines['django'].from_string(FORMER_TEMPLATE)
+        report('former template, all page links', args.requests,
+               measure(lambda: former.render(context, request), args.requests), 'render')
+        current = get_template('questions_new.html')
+        context['page_range'] = list(paginator.get_elided_page_range(1))
+        report('questions_new.html, elided page range', args.requests,
+               measure(lambda: current.render(context, request), args.requests), 'render')
+
+        client = Client()
+        content_changed()
+        cache.clear()
+        report('GET / with the list from the fragment cache', args.requests,
+               measure(lambda: client.get('/'), args.requests), 'request')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+"""
+Serializing lists with the DRF model serializers and their values twins in qa.api.
+
+    python -m benchmarks.bench_serializers [--rows 10000]
+"""
+import argparse
+
+from benchmarks import setup_django, test_database, measure, report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=10000)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.contrib.auth.models import User
+    from qa.api import (
+        QuestionSerializer, AnswerSerializer, UserSerializer,
+        question_values_serializer, answer_values_serializer, user_values_serializer,
+    )
+    from qa.models import Question, Answer
+
+    with test_database():
+        User.objects.bulk_create(User(username=f'user{num}', email=f'user{num}@example.com')
+                                 for num in range(args.rows))
+        user = User.objects.first()
+        Question.objects.bulk_create(Question(title=f'Question {num}', text='text ' * 20, author=user)
+                                     for num in range(args.rows))
+        question = Question.objects.first()
+        Answer.objects.bulk_create(Answer(text='answer ' * 20, question=question, author=user)
+                                   for _ in range(args.rows))
+
+        cases = [
+            ('questions', QuestionSerializer, question_values_serializer, Question.objects.all()),
+            ('answers', AnswerSerializer, answer_values_serializer, Answer.objects.all()),
+            ('users', UserSerializer, user_values_serializer, User.objects.all()),
+        ]
+        for name, serializer_class, values_serializer, queryset in cases:
+            # the model serializers as used by the views (no select_related) and with the joins prefetched
+            report(f'{name}: {serializer_class.__name__}', args.rows,
+                   measure(lambda: serializer_class(queryset.all(), many=True).data), 'row')
+            if name != 'users':
+                joined = queryset.select_related(*(['author'] if name == 'questions' else ['author', 'question']))
+                report(f'{name}: {serializer_class.__name__} + select_related', args.rows,
+                       measure(lambda: serializer_class(joined.all(), many=True).data), 'row')
+            report(f'{name}: values serializer', args.rows,
+                   measure(lambda: values_serializer.serialize(queryset.all())), 'row')
+
+
+if __name__ == '__main__':
+    main()
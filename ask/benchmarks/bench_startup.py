@@ -0,0 +1,60 @@
+"""
+Boot time of a worker: importing ask.wsgi (Django setup, settings, apps and the URLconf).
+
+    python -m benchmarks.bench_startup [--runs 5] [--budget-ms 500] [--settings ask.settings ask.settings_api]
+
+Every run is a fresh `python -X importtime` process. Prints the median boot time and the
+heaviest imports per settings module and exits with 1 if a median exceeds the budget.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+# the URLconf is loaded by the first request, load it here to count it in
+BOOT = ('import time; start = time.perf_counter(); import ask.wsgi; from django.urls import get_resolver; '
+        'get_resolver().url_patterns; print((time.perf_counter() - start) * 1000)')
+
+# modules which should only be imported by the first request that needs them
+LAZY_MODULES = ['rest_framework.views', 'rest_framework.generics', 'qa.api', 'qa.views']
+
+
+def boot(settings_module):
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE=settings_module, PYTHONWARNINGS='ignore')
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', BOOT],
+                            env=env, capture_output=True, text=True, check=True)
+    imports = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        imports[name.strip()] = int(cumulative_us)
+    return float(result.stdout.strip().splitlines()[-1]), imports
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--budget-ms', type=float, default=500)
+    parser.add_argument('--top', type=int, default=10)
+    parser.add_argument('--settings', nargs='+', default=['ask.settings', 'ask.settings_api'])
+    args = parser.parse_args()
+
+    over_budget = False
+    for settings_module in args.settings:
+        runs = [boot(settings_module) for _ in range(args.runs)]
+        median = statistics.median(elapsed for elapsed, _ in runs)
+        imports = runs[-1][1]
+        over_budget |= median > args.budget_ms
+        print(f'{settings_module}: boot {median:.1f} ms (budget {args.budget_ms:.0f} ms)')
+        heaviest = sorted(imports.items(), key=lambda item: item[1], reverse=True)[:args.top]
+        for name, cumulative_us in heaviest:
+            print(f'    {cumulative_us / 1000:8.1f} ms  {name}')
+        eager = [name for name in LAZY_MODULES if name in imports]
+        print('    imported at boot:', ', '.join(eager) if eager else 'none of ' + ', '.join(LAZY_MODULES))
+    sys.exit(1 if over_budget else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""
+Cost added to a write request by the work moved to qa.tasks: updating the profile counters
+inline against enqueueing the update, answering with the counters inline and queued, and
+the rate the worker drains the queue at.
+
+    python -m benchmarks.bench_tasks [--calls 2000] [--batch-size 100]
+"""
+import argparse
+
+from benchmarks import setup_django, test_database, measure, report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--calls', type=int, default=2000)
+    parser.add_argument('--batch-size', type=int, default=100)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.contrib.auth.models import User
+    from django.test import Client, override_settings
+    from qa import activity, tasks
+    from qa.models import Question, Task, UserProfile
+
+    with test_database():
+        users = [User.objects.create(username=f'user{num}').id for num in range(50)]
+        UserProfile.objects.bulk_create(UserProfile(user_id=user_id) for user_id in users)
+
+        def inline():
+            for num in range(args.calls):
+                UserProfile.objects.bump(users[num % len(users)], answer_count=1)
+        report('profile counters updated inline', args.calls, measure(inline), 'call')
+
+        def queued():
+            for num in range(args.calls):
+                activity.changed(users[num % len(users)], answer_count=1)
+        report('profile counters enqueued', args.calls, measure(queued), 'call')
+        report(f'worker, batches of {args.batch_size}', args.calls,
+               measure(lambda: tasks.work(args.batch_size, once=True)), 'task')
+        assert not Task.objects.exists()
+
+        question = Question.objects.create(title='Question')
+        client = Client()
+        client.force_login(User.objects.get(pk=users[0]))
+        requests = args.calls // 10
+
+        def answer():
+            for _ in range(requests):
+                client.post(question.get_absolute_url(), {'text': 'Answer'})
+        with override_settings(TASKS_EAGER=True):
+            report('answer POST, counters inline (TASKS_EAGER)', requests, measure(answer), 'request')
+        report('answer POST, counters queued', requests, measure(answer), 'request')
+
+
+if __name__ == '__main__':
+    main()
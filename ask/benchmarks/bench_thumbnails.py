@@ -0,0 +1,60 @@
+"""
+Making the thumbnails of attached photos one after another in the worker and in qa.thumbnails' process pool.
+
+    python -m benchmarks.bench_thumbnails [--images 64] [--width 3000]
+"""
+import argparse
+import os
+import shutil
+import tempfile
+
+from benchmarks import setup_django, measure, report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--images', type=int, default=64)
+    parser.add_argument('--width', type=int, default=3000)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.conf import settings
+    from qa import thumbnails
+    from qa.thumbnails import Image
+
+    if Image is None:
+        raise SystemExit('Pillow is not installed')
+    root = tempfile.mkdtemp()
+    try:
+        sources = []
+        for num in range(args.images):
+            path = os.path.join(root, f'{num}.jpg')
+            Image.effect_mandelbrot((args.width, args.width * 3 // 4), (-2, -1.5, 1 + num / args.images, 1.5),
+                                    100).convert('RGB').save(path, quality=90)
+            sources.append(path)
+
+        def targets(num, run):
+            return [os.path.join(root, run, f'{num}.{scale}.jpg') for scale in (1, 2)]
+
+        def serial():
+            for num, source in enumerate(sources):
+                thumbnails.render(source, targets(num, 'serial'), settings.THUMBNAIL_SIZE, settings.THUMBNAIL_QUALITY)
+        report('one by one', args.images, measure(serial), 'image')
+
+        pool = thumbnails._pool()
+        # starts the processes
+        list(pool.map(abs, range(pool._max_workers)))
+
+        def parallel():
+            futures = [pool.submit(thumbnails.render, source, targets(num, 'pool'),
+                                   settings.THUMBNAIL_SIZE, settings.THUMBNAIL_QUALITY)
+                       for num, source in enumerate(sources)]
+            for future in futures:
+                future.result()
+        report(f'process pool of {pool._max_workers}', args.images, measure(parallel), 'image')
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""
+Attachment throughput on large files: storing an upload, and downloading it streamed by the app
+(FileResponse) or handed to nginx with X-Accel-Redirect.
+
+    python -m benchmarks.bench_uploads [--megabytes 256] [--downloads 1000]
+"""
+import argparse
+import os
+import shutil
+import tempfile
+
+from benchmarks import setup_django, test_database, measure, report
+
+MB = 1024 * 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--megabytes', type=int, default=256)
+    parser.add_argument('--downloads', type=int, default=1000)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.core.files import File
+    from django.test import Client, override_settings
+    from qa import uploads
+    from qa.models import Question
+
+    root = tempfile.mkdtemp()
+    try:
+        with test_database(), override_settings(UPLOADS_ROOT=root, UPLOADS_MAX_SIZE=args.megabytes * MB):
+            source = os.path.join(root, 'source.bin')
+            with open(source, 'wb') as file:
+                for _ in range(args.megabytes):
+                    file.write(os.urandom(MB))
+            question = Question.objects.create(title='Question')
+
+            attachments = []
+
+            def upload():
+                with open(source, 'rb') as file:
+                    attachments.append(uploads.attach(File(file, name='big.bin'), None, question))
+            report(f'store a {args.megabytes} MB upload', args.megabytes, measure(upload), 'MB')
+            url = attachments[0].get_absolute_url()
+            client = Client()
+
+            def streamed():
+                response = client.get(url)
+                for _ in response.streaming_content:
+                    pass
+                response.close()
+            with override_settings(UPLOADS_ACCEL_REDIRECT=False):
+                report('download streamed by the app', args.megabytes, measure(streamed), 'MB')
+
+            with override_settings(UPLOADS_ACCEL_REDIRECT=True):
+                seconds = measure(lambda: client.get(url), args.downloads)
+            report('X-Accel-Redirect response (nginx sends the file)', args.downloads, seconds, 'request')
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""
+Question pages per second under concurrent GETs with their views counted by an UPDATE per view,
+buffered in memory and written every few seconds, and buffered with the hot question sampled.
+Every request comes from a new address, so no view is a repeat one.
+
+    python -m benchmarks.bench_views [--requests 4000] [--threads 8] [--questions 20]
+"""
+import argparse
+import threading
+
+from benchmarks import setup_django, test_database, measure, report
+
+VARIANTS = [
+    ('an UPDATE per view', {'VIEW_COUNT_FLUSH_SECONDS': 0, 'VIEW_COUNT_SAMPLE_RATE': 1}),
+    ('buffered', {'VIEW_COUNT_FLUSH_SECONDS': 5, 'VIEW_COUNT_SAMPLE_RATE': 1}),
+    ('buffered and sampled', {'VIEW_COUNT_FLUSH_SECONDS': 5, 'VIEW_COUNT_SAMPLE_RATE': 10}),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=4000)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--questions', type=int, default=20)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.core.cache import cache
+    from django.db import connections
+    from django.db.models import Sum
+    from django.test import Client, override_settings
+    from qa import view_counts
+    from qa.models import Question
+
+    with test_database():
+        urls = [Question.objects.create(title=f'Question {num}', text='text ' * 50).get_absolute_url()
+                for num in range(args.questions)]
+        per_thread = args.requests // args.threads
+
+        def load(number):
+            client = Client()
+            for request in range(per_thread):
+                # half of the views go to the first question
+                url = urls[0] if request % 2 else urls[request // 2 % len(urls)]
+                client.get(url, REMOTE_ADDR=f'10.{number}.{request // 256 % 256}.{request % 256}')
+            connections.close_all()
+
+        def concurrent():
+            threads = [threading.Thread(target=load, args=(number,)) for number in range(args.threads)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            view_counts.flush()
+
+        for name, overrides in VARIANTS:
+            with override_settings(**overrides):
+                Question.objects.update(view_count=0)
+                cache.clear()
+                for url in urls:
+                    # the pages are cached in all the variants
+                    Client().get(url, REMOTE_ADDR='127.0.0.1')
+                view_counts.flush()
+                Question.objects.update(view_count=0)
+                seconds = measure(concurrent)
+                counted = Question.objects.aggregate(total=Sum('view_count'))['total']
+                report(f'{name} ({counted} views counted)', per_thread * args.threads, seconds, 'request')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+"""
+Votes per second through /like/ (one request per vote) and /like/batch/.
+
+    python -m benchmarks.bench_votes [--votes 1000] [--batch-size 100]
+"""
+import argparse
+import json
+
+from benchmarks import setup_django, test_database, measure, report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--votes', type=int, default=1000)
+    parser.add_argument('--batch-size', type=int, default=100)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.contrib.auth.models import User
+    from django.test import Client
+    from qa.models import Question
+
+    with test_database():
+        question_ids = [Question.objects.create(title=f'Question {num}').id for num in range(args.votes)]
+        client = Client()
+        client.force_login(User.objects.create(username='single'))
+
+        def single():
+            for question_id in question_ids:
+                client.post('/like/', {'question_id': question_id, 'operation': 'Like'})
+        report('single votes via /like/', args.votes, measure(single), 'vote')
+
+        client.force_login(User.objects.create(username='batch'))
+
+        def batch():
+            for start in range(0, len(question_ids), args.batch_size):
+                votes = [{'question_id': question_id, 'operation': 'Like'}
+                         for question_id in question_ids[start:start + args.batch_size]]
+                client.post('/like/batch/', json.dumps({'votes': votes}), content_type='application/json')
+        report(f'batches of {args.batch_size} via /like/batch/', args.votes, measure(batch), 'vote')
+
+        assert not Question.objects.exclude(rating=2).exists()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+"""
+Requests per second of the gunicorn worker types on the existing routes.
+
+    python -m benchmarks.bench_workers [--seconds 10] [--clients 16] [--workers N] [--seed 100]
+
+For every worker type gunicorn is started with gunicorn.conf.py and loaded by keep-alive clients.
+The database from DATABASE_URL is used, --seed adds questions to it if it has fewer.
+"""
+import argparse
+import http.client
+import importlib.util
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+from benchmarks import setup_django
+
+HOST, PORT = '127.0.0.1', 8765
+WORKER_TYPES = ['sync', 'gthread', 'uvicorn']
+
+
+def seed(number):
+    from django.contrib.auth.models import User
+    from qa.models import Question, Answer
+    user, _ = User.objects.get_or_create(username='bench')
+    missing = number - Question.objects.count()
+    for num in range(max(missing, 0)):
+        question = Question.objects.create(title=f'Benchmark question {num}', text='text ' * 50, author=user)
+        Answer.objects.bulk_create(Answer(text='answer', question=question, author=user) for _ in range(5))
+
+
+def routes():
+    from qa.models import Question
+    question = Question.objects.first()
+    paths = ['/', '/popular/', '/api/questions/popular/']
+    if question is not None:
+        paths += [question.get_absolute_url(), f'/api/question/{question.id}/answers/']
+    return paths
+
+
+def wait_for_server(timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            connection = http.client.HTTPConnection(HOST, PORT, timeout=1)
+            connection.request('GET', '/')
+            connection.getresponse().read()
+            return True
+        except OSError:
+            time.sleep(0.2)
+    return False
+
+
+def client(paths, stop_at, latencies):
+    connection = http.client.HTTPConnection(HOST, PORT, timeout=10)
+    number = 0
+    while time.time() < stop_at:
+        path = paths[number % len(paths)]
+        number += 1
+        start = time.perf_counter()
+        connection.request('GET', path, headers={'Host': 'localhost'})
+        connection.getresponse().read()
+        latencies.append(time.perf_counter() - start)
+
+
+def run(worker_type, paths, args):
+    env = dict(os.environ, GUNICORN_WORKER_CLASS=worker_type, GUNICORN_BIND=f'{HOST}:{PORT}')
+    if args.workers:
+        env['GUNICORN_WORKERS'] = str(args.workers)
+    server = subprocess.Popen([sys.executable, '-m', 'gunicorn'], env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        if not wait_for_server():
+            print(f'{worker_type:<10} failed to start')
+            return
+        latencies = []
+        stop_at = time.time() + args.seconds
+        threads = [threading.Thread(target=client, args=(paths, stop_at, latencies)) for _ in range(args.clients)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        latencies.sort()
+        print(f'{worker_type:<10} {len(latencies) / args.seconds:>10,.0f} req/s'
+              f' p50 {statistics.median(latencies) * 1000:>7.2f} ms'
+              f' p99 {latencies[int(len(latencies) * 0.99)] * 1000:>7.2f} ms')
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--seconds', type=int, default=10)
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--workers', type=int, help='GUNICORN_WORKERS, sized from the CPU count by default')
+    parser.add_argument('--seed', type=int, default=0, help='make sure the database has this many questions')
+    args = parser.parse_args()
+
+    setup_django()
+    seed(args.seed)
+    paths = routes()
+    print('routes:', ' '.join(paths))
+    for worker_type in WORKER_TYPES:
+        if worker_type == 'uvicorn' and importlib.util.find_spec('uvicorn') is None:
+            print(f'{worker_type:<10} skipped, uvicorn is not installed')
+            continue
+        run(worker_type, paths, args)
+
+
+if __name__ == '__main__':
+    main()
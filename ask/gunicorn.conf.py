@@ -0,0 +1,135 @@
+"""
+Gunicorn configuration for the ask project.
+
+Run `gunicorn` from this directory, the file is picked up automatically. Environment:
+
+    GUNICORN_WORKER_CLASS   sync (default), gthread or uvicorn (needs `pip install uvicorn`)
+    GUNICORN_WORKERS        worker processes, by default sized from the CPU count
+    GUNICORN_THREADS        threads of a gthread worker, 4 by default
+    GUNICORN_MAX_REQUESTS   recycle a worker after about this many requests, 1000 by default, 0 disables
+    GUNICORN_BIND           127.0.0.1:8000 by default (see etc/nginx.conf)
+    GUNICORN_STATS_DIR      if set, every worker writes its stats to worker-<pid>.json there
+    GUNICORN_STATSD_HOST    host:port of a statsd server for gunicorn's own metrics
+"""
+import json
+import multiprocessing
+import os
+import threading
+import time
+
+
+def _env_int(name, default):
+    return int(os.environ.get(name, default))
+
+
+cpus = multiprocessing.cpu_count()
+worker_type = os.environ.get('GUNICORN_WORKER_CLASS', 'sync')
+
+if worker_type == 'uvicorn':
+    wsgi_app = 'ask.asgi:application'
+    worker_class = 'uvicorn.workers.UvicornWorker'
+    # an event loop per core, blocking Django code runs in its thread pool
+    default_workers = cpus + 1
+elif worker_type == 'gthread':
+    wsgi_app = 'ask.wsgi:application'
+    worker_class = 'gthread'
+    threads = _env_int('GUNICORN_THREADS', 4)
+    default_workers = cpus + 1
+elif worker_type == 'sync':
+    wsgi_app = 'ask.wsgi:application'
+    worker_class = 'sync'
+    # sync workers block on the database, keep some spare processes
+    default_workers = 2 * cpus + 1
+else:
+    raise ValueError(f'Unknown GUNICORN_WORKER_CLASS {worker_type!r}, use sync, gthread or uvicorn')
+
+workers = _env_int('GUNICORN_WORKERS', default_workers)
+bind = os.environ.get('GUNICORN_BIND', '127.0.0.1:8000')
+
+# Import Django and the project once in the master, workers share these pages copy-on-write.
+preload_app = True
+
+# Recycle workers to bound memory growth, the jitter keeps them from restarting all at once.
+max_requests = _env_int('GUNICORN_MAX_REQUESTS', 1000)
+max_requests_jitter = max_requests // 10
+
+timeout = 30
+graceful_timeout = 30
+# longer than the keepalive_timeout of the nginx upstream pool
+keepalive = 75
+
+statsd_host = os.environ.get('GUNICORN_STATSD_HOST') or None
+stats_dir = os.environ.get('GUNICORN_STATS_DIR')
+
+
+class WorkerStats:
+    """Request counters of one worker process."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started_at = time.time()
+        self.requests = 0
+        self.errors = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+
+    def add(self, duration, status_code):
+        with self.lock:
+            self.requests += 1
+            self.errors += status_code >= 500
+            self.total_time += duration
+            self.max_time = max(self.max_time, duration)
+
+    def as_dict(self, pid):
+        return {
+            'pid': pid,
+            'uptime': round(time.time() - self.started_at, 3),
+            'requests': self.requests,
+            'errors': self.errors,
+            'avg_time': round(self.total_time / self.requests, 6) if self.requests else 0,
+            'max_time': round(self.max_time, 6),
+        }
+
+    def dump(self, pid):
+        if not stats_dir:
+            return
+        os.makedirs(stats_dir, exist_ok=True)
+        path = os.path.join(stats_dir, f'worker-{pid}.json')
+        with open(path + '.tmp', 'w') as f:
+            json.dump(self.as_dict(pid), f)
+        os.replace(path + '.tmp', path)
+
+
+stats = WorkerStats()
+
+
+def when_ready(server):
+    # the URLconf imports its views on the first request, import them here for the workers to share
+    if not server.cfg.preload_app:
+        return
+    from django.conf import settings
+    if settings.PRELOAD_VIEWS:
+        from qa.lazy import load_views
+        server.log.info('Loaded %d views', load_views())
+
+
+def post_fork(server, worker):
+    global stats
+    stats = WorkerStats()
+    # connections must not be shared between processes
+    from django.db import connections
+    connections.close_all()
+
+
+def pre_request(worker, req):
+    req.start_time = time.perf_counter()
+
+
+def post_request(worker, req, environ, resp):
+    stats.add(time.perf_counter() - req.start_time, resp.status_code or 0)
+    if stats.requests % 100 == 0:
+        stats.dump(worker.pid)
+
+
+def worker_exit(server, worker):
+    stats.dump(worker.pid)
@@ -0,0 +1,46 @@
+"""
+Keeps the UserProfile counters in step with the writes. The counters of the author of a write
+are updated by a background task, the reputation is credited in qa.votes.apply_votes.
+"""
+from collections import Counter, defaultdict
+
+from qa import reputation
+from qa.models import UserProfile
+from qa.proxy_cache import profile_paths, purge
+from qa.tasks import task
+
+
+@task(batch=True)
+def update_profiles(calls):
+    """Applies the queued [user_id, {counter: delta}] changes with one UPDATE per user."""
+    totals = defaultdict(Counter)
+    for user_id, deltas in calls:
+        totals[user_id].update(deltas)
+    for user_id, deltas in totals.items():
+        UserProfile.objects.bump(user_id, **deltas)
+    # the ETags of the profiles have changed with the counters (qa/conditional.py), the nginx cache hasn't
+    purge([path for user_id in totals for path in profile_paths(user_id)])
+
+
+def changed(user_id, **deltas):
+    """The user has done something changing the counters by deltas."""
+    if user_id is not None:
+        update_profiles.enqueue(user_id, deltas)
+
+
+def question_added(question):
+    changed(question.author_id, question_count=1)
+
+
+def answer_added(answer):
+    changed(answer.author_id, answer_count=1)
+
+
+def answer_deleted(answer):
+    changed(answer.author_id, answer_count=-1)
+
+
+def question_deleted(question):
+    """The question has been marked deleted, its answers and votes are taken off when it is purged (qa.deletion)."""
+    changed(question.author_id, question_count=-1)
+    reputation.debit(question.author_id, question.rating)
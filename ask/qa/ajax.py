@@ -1,14 +1,15 @@
-import json
 from django.http import HttpRequest, HttpResponse
 from django.shortcuts import redirect
 from django.urls import reverse
 
+from .fastjson import dumps
+
 
 class HttpResponseAjax(HttpResponse):
 
     def __init__(self, status='ok', **kwargs):
         kwargs['status'] = status
-        super(HttpResponseAjax, self).__init__(content=json.dumps(kwargs), content_type='application/json')
+        super(HttpResponseAjax, self).__init__(content=dumps(kwargs), content_type='application/json')
 
 
 class HttpResponseAjaxError(HttpResponseAjax):
@@ -24,5 +25,5 @@ def login_required_ajax(view):
         elif request.is_ajax():
             return HttpResponseAjaxError(code='no_auth', message='This action requires authorization')
         else:
-            redirect(reverse('login') + '?continue=' + request.get_full_path())
+            return redirect(reverse('login') + '?continue=' + request.get_full_path())
     return new_view
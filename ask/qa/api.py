@@ -1,7 +1,21 @@
-from qa.models import Question, Answer, QuestionLikes
+from datetime import timedelta
+
+from qa.models import Question, Answer, QuestionLikes, QuestionTag, Tag, UserProfile
 from django.contrib.auth.models import User
+from django.utils import timezone
+from django.utils.decorators import method_decorator
+from django.views.decorators.vary import vary_on_cookie
 from rest_framework import serializers, viewsets, generics, routers
-from rest_framework.exceptions import APIException
+from rest_framework.exceptions import APIException, NotFound
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from . import reputation, tags, trending, vote_history
+from .conditional import feed_condition, profile_condition
+from .fast_serializers import ValuesSerializer
+from .pagination import encode_cursor, decode_cursor, encode_rating_cursor, decode_rating_cursor
+from .proxy_cache import cache_for_anonymous
+from .votes import rate_name
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -10,6 +24,34 @@ class UserSerializer(serializers.ModelSerializer):
         fields = ['username', 'email']
 
 
+def author_representation(author_id, username, email):
+    if author_id is None:
+        return None
+    return {username: email}
+
+
+# Read-only twins of the serializers above for lists, with the same output
+user_values_serializer = ValuesSerializer(
+    ('username', 'username', serializers.CharField()),
+    ('email', 'email', serializers.CharField()),
+)
+
+question_values_serializer = ValuesSerializer(
+    ('title', 'title', serializers.CharField()),
+    ('text', 'text', serializers.CharField()),
+    ('added_at', 'added_at', serializers.DateTimeField()),
+    ('rating', 'rating', serializers.IntegerField()),
+    ('author', ('author_id', 'author__username', 'author__email'), author_representation),
+)
+
+answer_values_serializer = ValuesSerializer(
+    ('text', 'text', serializers.CharField()),
+    ('author', ('author_id', 'author__username', 'author__email'), author_representation),
+    ('added_at', 'added_at', serializers.DateTimeField()),
+    ('question', 'question__title', serializers.CharField()),
+)
+
+
 class UserLikeSerializer(serializers.ModelSerializer):
     rate = serializers.CharField()
 
@@ -26,6 +68,8 @@ class QuestionSerializer(serializers.ModelSerializer):
         fields = ['title', 'text', 'added_at', 'rating', 'author']
 
     def get_author(self, obj):
+        if obj.author is None:
+            return None
         return {obj.author.username: obj.author.email}
 
 
@@ -46,53 +90,118 @@ class AnswerSerializer(serializers.ModelSerializer):
         fields = ['text', 'author', 'added_at', 'question']
 
     def get_author(self, obj):
+        if obj.author is None:
+            return None
         return {obj.author.username: obj.author.email}
 
     def get_question(self, obj):
         return obj.question.title
 
 
+class UserProfileSerializer(serializers.ModelSerializer):
+    username = serializers.CharField(source='user.username')
+    email = serializers.CharField(source='user.email')
+
+    class Meta:
+        model = UserProfile
+        fields = ['username', 'email', 'question_count', 'answer_count', 'vote_count', 'reputation',
+                  'last_activity']
+
+
+def recent_activity_representation(rows):
+    added_at = serializers.DateTimeField()
+    recent = {'questions': [], 'answers': [], 'votes': []}
+    for kind, pk, text, added, value, question_id in rows:
+        if kind == 'question':
+            recent['questions'].append({'id': pk, 'title': text, 'added_at': added_at.to_representation(added),
+                                        'rating': value})
+        elif kind == 'answer':
+            recent['answers'].append({'id': pk, 'text': text, 'added_at': added_at.to_representation(added),
+                                      'question_id': question_id})
+        else:
+            recent['votes'].append({'question_id': question_id, 'title': text, 'rate': rate_name(bool(value))})
+    return recent
+
+
 class QuestionDoesNotExistException(APIException):
     status_code = 404
     default_detail = 'The requested question was not found.'
     default_code = 'invalid_question_id'
 
 
+class TagDoesNotExistException(APIException):
+    status_code = 404
+    default_detail = 'The requested tag was not found.'
+    default_code = 'invalid_tag'
+
+
 class UserDoesNotExistException(APIException):
     status_code = 404
     default_detail = 'The requested user was not found.'
     default_code = 'invalid_user_id'
 
 
-class QuestionsListView(generics.ListAPIView):
+@method_decorator([cache_for_anonymous, vary_on_cookie, feed_condition], name='dispatch')
+class FeedListAPIView(generics.ListAPIView):
+    """
+    List endpoint answering conditional GETs with 304 before querying anything but the feed version.
+    Lists with values_serializer when it is set, it gives the output of serializer_class faster.
+    """
+    values_serializer = None
+
+    def list(self, request, *args, **kwargs):
+        if self.values_serializer is None or self.paginator is not None:
+            return super().list(request, *args, **kwargs)
+        return Response(self.values_serializer.serialize(self.filter_queryset(self.get_queryset())))
+
+
+class QuestionsListView(FeedListAPIView):
     """
     API endpoint that allows questions to be viewed.
     """
     serializer_class = QuestionSerializer
+    values_serializer = question_values_serializer
     queryset = Question.objects.all()
 
 
-class PopularQuestionsListView(generics.ListAPIView):
+class PopularQuestionsListView(FeedListAPIView):
     """
     API endpoint that allows popular questions to be viewed.
     """
     serializer_class = QuestionSerializer
+    values_serializer = question_values_serializer
     queryset = Question.objects.popular()
 
 
-class AnswersListView(generics.ListAPIView):
+@method_decorator([cache_for_anonymous, vary_on_cookie], name='dispatch')
+class TrendingQuestionsView(APIView):
+    """
+    API endpoint with the questions viewed, voted and answered the most lately and their trending
+    scores, the highest first. Recomputed every few seconds.
+    """
+
+    def get(self, request):
+        return Response([
+            {'question_id': question.id, 'score': round(score, 2), **QuestionSerializer(question).data}
+            for question, score in trending.questions()
+        ])
+
+
+class AnswersListView(FeedListAPIView):
     """
     API endpoint that allows answers to be viewed.
     """
     serializer_class = AnswerSerializer
-    queryset = Answer.objects.all()
+    values_serializer = answer_values_serializer
+    queryset = Answer.objects.visible()
 
 
-class AnswersToQuestionListView(generics.ListAPIView):
+class AnswersToQuestionListView(FeedListAPIView):
     """
     API endpoint that allows answers to the requested question to be viewed.
     """
     serializer_class = AnswerSerializer
+    values_serializer = answer_values_serializer
 
     def get_queryset(self):
         question_id = self.kwargs['question_id']
@@ -104,11 +213,12 @@ class AnswersToQuestionListView(generics.ListAPIView):
             raise QuestionDoesNotExistException()
 
 
-class UsersQuestionsListView(generics.ListAPIView):
+class UsersQuestionsListView(FeedListAPIView):
     """
     API endpoint that allows questions from the requested user to be viewed.
     """
     serializer_class = QuestionSerializer
+    values_serializer = question_values_serializer
 
     def get_queryset(self):
         user_id = self.kwargs['user_id']
@@ -120,31 +230,33 @@ class UsersQuestionsListView(generics.ListAPIView):
             raise UserDoesNotExistException()
 
 
-class UsersListView(generics.ListAPIView):
+class UsersListView(FeedListAPIView):
     """
     API endpoint that allows users to be viewed.
     """
     serializer_class = UserSerializer
+    values_serializer = user_values_serializer
     queryset = User.objects.all()
 
 
-class UsersAnswersListView(generics.ListAPIView):
+class UsersAnswersListView(FeedListAPIView):
     """
     API endpoint that allows answers from the requested user to be viewed.
     """
     serializer_class = AnswerSerializer
+    values_serializer = answer_values_serializer
 
     def get_queryset(self):
         user_id = self.kwargs['user_id']
         try:
             user = User.objects.get(pk=user_id)
-            queryset = Answer.objects.filter(author=user)
+            queryset = Answer.objects.visible().filter(author=user)
             return queryset
         except User.DoesNotExist:
             raise UserDoesNotExistException()
 
 
-class LikesToQuestionListView(generics.ListAPIView):
+class LikesToQuestionListView(FeedListAPIView):
     """
     API endpoint that allows users who rated the requested question to be viewed.
     """
@@ -170,7 +282,7 @@ class LikesToQuestionListView(generics.ListAPIView):
             raise QuestionDoesNotExistException()
 
 
-class QuestionsLikesByUserListView(generics.ListAPIView):
+class QuestionsLikesByUserListView(FeedListAPIView):
     """
     API endpoint that allows questions rated by the requested user to be viewed.
     """
@@ -198,3 +310,102 @@ class QuestionsLikesByUserListView(generics.ListAPIView):
         except User.DoesNotExist:
             raise UserDoesNotExistException()
 
+
+@method_decorator([cache_for_anonymous, vary_on_cookie, profile_condition], name='dispatch')
+class UserProfileView(APIView):
+    """
+    API endpoint with the stats of the requested user and the latest questions, answers and votes,
+    read from the materialized profile in two queries.
+    """
+    recent_limit = 10
+
+    def get(self, request, user_id):
+        try:
+            user = User.objects.select_related('profile').get(pk=user_id)
+        except User.DoesNotExist:
+            raise UserDoesNotExistException()
+        try:
+            profile = user.profile
+        except UserProfile.DoesNotExist:
+            profile = UserProfile(user=user)
+        data = UserProfileSerializer(profile).data
+        data['recent'] = recent_activity_representation(
+            UserProfile.objects.recent_activity(user.pk, self.recent_limit))
+        return Response(data)
+
+
+@method_decorator([cache_for_anonymous, vary_on_cookie], name='dispatch')
+class LeaderboardView(APIView):
+    """
+    API endpoint with a page (?page=) of the users with the highest reputation.
+    """
+
+    def get(self, request):
+        try:
+            rows = reputation.leaderboard_page(int(request.query_params.get('page', 1)))
+        except ValueError:
+            raise NotFound('No such leaderboard page.')
+        return Response([
+            {'rank': rank, 'user_id': user_id, 'username': username, 'reputation': points}
+            for rank, user_id, username, points in rows
+        ])
+
+
+@method_decorator([cache_for_anonymous, vary_on_cookie, feed_condition], name='dispatch')
+class TagQuestionsView(APIView):
+    """
+    API endpoint with a keyset page of the questions with the requested tag, newest first or,
+    with ?order=popular, the most popular first. The next page is ?after=<next>.
+    """
+
+    def get(self, request, name):
+        try:
+            tag = Tag.objects.get(name=name)
+        except Tag.DoesNotExist:
+            raise TagDoesNotExistException()
+        popular = request.query_params.get('order') == 'popular'
+        encode, decode = (encode_rating_cursor, decode_rating_cursor) if popular else (encode_cursor, decode_cursor)
+        try:
+            after = decode(request.query_params['after']) if request.query_params.get('after') else None
+        except ValueError:
+            raise NotFound('Invalid cursor.')
+        questions, last = QuestionTag.objects.feed(tag.pk, popular=popular, after=after)
+        return Response({'results': QuestionSerializer(questions, many=True).data, 'next': encode(last)})
+
+
+@method_decorator([cache_for_anonymous, vary_on_cookie], name='dispatch')
+class PopularTagsView(APIView):
+    """
+    API endpoint with the most used tags and their numbers of questions.
+    """
+
+    def get(self, request):
+        return Response([{'name': name, 'question_count': count} for name, count in tags.popular()])
+
+
+@method_decorator([cache_for_anonymous, vary_on_cookie], name='dispatch')
+class QuestionRatingHistoryView(APIView):
+    """
+    API endpoint with the hourly rating changes of the question over the last ?hours= (a week by
+    default, between an hour and a year) for charts, read from the compacted history only: the
+    changes of the last minutes appear after the next compaction.
+    """
+    default_hours = 24 * 7
+    max_hours = 24 * 366
+
+    def get(self, request, question_id):
+        if not Question.objects.filter(pk=question_id).exists():
+            raise QuestionDoesNotExistException()
+        try:
+            hours = max(1, min(int(request.query_params.get('hours', self.default_hours)), self.max_hours))
+        except ValueError:
+            raise NotFound('Invalid number of hours.')
+        since = timezone.now().replace(minute=0, second=0, microsecond=0) - timedelta(hours=hours - 1)
+        hour_field = serializers.DateTimeField()
+        return Response({
+            'question_id': question_id,
+            'hours': [
+                {'hour': hour_field.to_representation(hour), 'delta': delta, 'votes': votes, 'rating': rating}
+                for hour, delta, votes, rating in vote_history.history(question_id, since)
+            ],
+        })
@@ -1,15 +1,21 @@
 from django.urls import path
-from .api import *
+from .lazy import LazyView
 
 
 urlpatterns = [
-    path('questions/', QuestionsListView.as_view(), name='api_questions'),
-    path('questions/popular/', PopularQuestionsListView.as_view(), name='api_popular_questions'),
-    path('answers/', AnswersListView.as_view(), name='api_answers'),
-    path('question/<int:question_id>/answers/', AnswersToQuestionListView.as_view(), name='api_answers_to_question'),
-    path('user/<int:user_id>/questions/', UsersQuestionsListView.as_view(), name='api_users_questions'),
-    path('users/', UsersListView.as_view(), name='api_users'),
-    path('user/<int:user_id>/answers/', UsersAnswersListView.as_view(), name='api_users_answers'),
-    path('question/<int:question_id>/likes/', LikesToQuestionListView.as_view(), name='api_question_likes'),
-    path('user/<int:user_id>/likes/', QuestionsLikesByUserListView.as_view(), name='api_question_likes'),
+    path('questions/', LazyView('qa.api.QuestionsListView', as_view=True), name='api_questions'),
+    path('questions/popular/', LazyView('qa.api.PopularQuestionsListView', as_view=True), name='api_popular_questions'),
+    path('questions/trending/', LazyView('qa.api.TrendingQuestionsView', as_view=True), name='api_trending_questions'),
+    path('answers/', LazyView('qa.api.AnswersListView', as_view=True), name='api_answers'),
+    path('question/<int:question_id>/answers/', LazyView('qa.api.AnswersToQuestionListView', as_view=True), name='api_answers_to_question'),
+    path('user/<int:user_id>/questions/', LazyView('qa.api.UsersQuestionsListView', as_view=True), name='api_users_questions'),
+    path('users/', LazyView('qa.api.UsersListView', as_view=True), name='api_users'),
+    path('tags/', LazyView('qa.api.PopularTagsView', as_view=True), name='api_tags'),
+    path('tag/<str:name>/questions/', LazyView('qa.api.TagQuestionsView', as_view=True), name='api_tag_questions'),
+    path('leaderboard/', LazyView('qa.api.LeaderboardView', as_view=True), name='api_leaderboard'),
+    path('user/<int:user_id>/profile/', LazyView('qa.api.UserProfileView', as_view=True), name='api_user_profile'),
+    path('user/<int:user_id>/answers/', LazyView('qa.api.UsersAnswersListView', as_view=True), name='api_users_answers'),
+    path('question/<int:question_id>/rating-history/', LazyView('qa.api.QuestionRatingHistoryView', as_view=True), name='api_question_rating_history'),
+    path('question/<int:question_id>/likes/', LazyView('qa.api.LikesToQuestionListView', as_view=True), name='api_question_likes'),
+    path('user/<int:user_id>/likes/', LazyView('qa.api.QuestionsLikesByUserListView', as_view=True), name='api_question_likes'),
 ]
\ No newline at end of file
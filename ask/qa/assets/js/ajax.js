@@ -0,0 +1,18 @@
+/*
+ * Posts the form data to the AJAX view with the CSRF token and resolves to its JSON response
+ * ({"status": "ok", ...} or {"status": "error", "code": ..., "message": ...}).
+ */
+function postAjax(url, data, csrfToken) {
+    data.append('csrfmiddlewaretoken', csrfToken);
+    return fetch(url, {
+        method: 'POST',
+        body: data,
+        credentials: 'same-origin',
+        headers: {'X-Requested-With': 'XMLHttpRequest'},
+    }).then(function (response) {
+        if (!response.ok && response.status !== 429) {
+            throw new Error(response.statusText);
+        }
+        return response.json();
+    });
+}
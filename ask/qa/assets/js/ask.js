@@ -0,0 +1,27 @@
+/* The ask form: suggests completions of the last tag typed. */
+(function () {
+    const tagsInput = document.getElementById('id_tags');
+    const suggestions = document.getElementById('tag_suggestions');
+    if (!tagsInput || !suggestions) {
+        return;
+    }
+    tagsInput.setAttribute('list', 'tag_suggestions');
+    tagsInput.addEventListener('input', function () {
+        const words = tagsInput.value.split(/[\s,]+/);
+        const prefix = words.pop();
+        if (!prefix) {
+            return;
+        }
+        fetch(suggestions.dataset.url + '?q=' + encodeURIComponent(prefix))
+            .then(response => response.json())
+            .then(function (response) {
+                suggestions.innerHTML = '';
+                for (const tag of response.tags) {
+                    const option = document.createElement('option');
+                    option.value = words.concat([tag.name]).join(' ');
+                    option.label = tag.name + ' (' + tag.count + ')';
+                    suggestions.appendChild(option);
+                }
+            });
+    });
+})();
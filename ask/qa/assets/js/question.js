@@ -0,0 +1,77 @@
+/*
+ * The question page: loading more answers and, for the logged in users, voting, deleting
+ * answers and attaching files. The URLs and the CSRF token come from data attributes,
+ * anonymous pages are cached by nginx, so they have no token (see question.html).
+ */
+(function () {
+    const answers = document.querySelector('.answers');
+    const more = document.getElementById('more_answers');
+    if (more) {
+        more.addEventListener('click', function () {
+            fetch(more.dataset.url + '?after=' + encodeURIComponent(more.dataset.after), {credentials: 'same-origin'})
+                .then(response => response.json())
+                .then(function (response) {
+                    answers.insertAdjacentHTML('beforeend', response.html);
+                    if (response.next) {
+                        more.dataset.after = response.next;
+                    } else {
+                        more.remove();
+                    }
+                });
+        });
+    }
+
+    const actions = document.getElementById('question_actions');
+    if (!actions) {
+        return;
+    }
+    const urls = actions.dataset;
+
+    function post(url, data) {
+        return postAjax(url, data, urls.csrfToken);
+    }
+
+    function reportAndReload(response) {
+        alert(response.message);
+        location.reload();
+    }
+
+    function failed() {
+        alert('Error');
+    }
+
+    for (const button of document.querySelectorAll('#like, #dislike')) {
+        button.addEventListener('click', function () {
+            const data = new FormData();
+            data.append('question_id', button.name);
+            data.append('operation', button.value);
+            post(urls.likeUrl, data).then(reportAndReload, failed);
+        });
+    }
+
+    // one handler for the answers and the upload forms, including the loaded ones
+    document.addEventListener('click', function (event) {
+        const button = event.target.closest('.delete_answer');
+        if (!button || !confirm('Are you sure you want to remove the answer?')) {
+            return;
+        }
+        const data = new FormData();
+        data.append('answer_id', button.name);
+        post(urls.deleteAnswerUrl, data).then(reportAndReload, failed);
+    });
+
+    document.addEventListener('submit', function (event) {
+        const form = event.target.closest('form.attach');
+        if (!form) {
+            return;
+        }
+        event.preventDefault();
+        post(urls.uploadUrl, new FormData(form)).then(function (response) {
+            if (response.status === 'ok') {
+                location.reload();
+            } else {
+                alert(response.message);
+            }
+        }, failed);
+    });
+})();
@@ -0,0 +1,116 @@
+import hashlib
+
+from django.conf import settings
+from django.views.decorators.http import condition
+
+from qa import notifications
+from qa.models import Question, ContentVersion, UserProfile
+from .proxy_cache import FEED_PATHS, question_paths, purge
+
+# version of everything listed by the feeds and the API, bumped on every write
+FEED = 'feed'
+
+
+def content_changed(*question_ids):
+    """
+    Must be called after every write that changes the feeds, a question page or the API output,
+    with the ids of the changed questions.
+    """
+    ContentVersion.objects.bump(FEED)
+    paths = list(FEED_PATHS)
+    if question_ids:
+        Question.objects.touch(*question_ids)
+        for question_id in question_ids:
+            paths += question_paths(question_id)
+    purge(paths)
+
+
+def _make_etag(request, *parts):
+    # Pages differ per visitor (navigation bar, like buttons), the session cookie
+    # tells visitors apart without a database query.
+    session = request.COOKIES.get(settings.SESSION_COOKIE_NAME, '')
+    if session and request.user.is_authenticated:
+        # the notification badge of the navigation bar changes without the content
+        parts += ('unread', notifications.unread_count(request))
+    key = ':'.join(str(part) for part in (request.get_full_path(), session) + parts)
+    return hashlib.md5(key.encode()).hexdigest()
+
+
+def feed_version(request):
+    """(version, time of the last change) of the feeds, read once per request."""
+    if not hasattr(request, '_feed_version'):
+        request._feed_version = ContentVersion.objects.current(FEED)
+    return request._feed_version
+
+
+def feed_cache_key(request, *parts):
+    """
+    Cache key of something derived from the feeds, changing with them, or None before the first
+    change. The time of the change keeps the keys unique if the version starts over, e.g. in a
+    restored database.
+    """
+    version, updated_at = feed_version(request)
+    if updated_at is None:
+        return None
+    return ':'.join(str(part) for part in parts + (version, updated_at.timestamp()))
+
+
+def _feed_validators(request):
+    if not hasattr(request, '_validators'):
+        version, updated_at = feed_version(request)
+        request._validators = (_make_etag(request, FEED, version), updated_at)
+    return request._validators
+
+
+def _question_validators(request, id):
+    if not hasattr(request, '_validators'):
+        # the view count changes without the question (qa/view_counts.py), it is read with the
+        # validators for every request instead of being cached with the page
+        modified_at, request._view_count = Question.objects.filter(pk=id).values_list(
+            'modified_at', 'view_count').first() or (None, None)
+        if modified_at is None:
+            # let the view answer with 404
+            request._validators = (None, None)
+        else:
+            request._validators = (
+                _make_etag(request, 'question', id, modified_at.timestamp(), request._view_count), modified_at)
+    return request._validators
+
+
+def question_view_count(request, id):
+    """Question.view_count as of this request, read with the validators."""
+    _question_validators(request, id)
+    return request._view_count
+
+
+def _profile_validators(request, user_id):
+    if not hasattr(request, '_validators'):
+        version, _ = feed_version(request)
+        # the counters are updated by a background task after the feed version is bumped (qa/activity.py)
+        counters = UserProfile.objects.filter(user_id=user_id).values_list(
+            'question_count', 'answer_count', 'vote_count', 'reputation', 'last_activity').first()
+        request._validators = (_make_etag(request, FEED, version, counters), None)
+    return request._validators
+
+
+def question_cache_key(request, id):
+    """Cache key of the question changing with it, or None if there is no such question."""
+    _, modified_at = _question_validators(request, id)
+    if modified_at is None:
+        return None
+    return f'question:{id}:{modified_at.timestamp()}'
+
+
+# Both validators come from one query, the view itself runs only if they don't match
+feed_condition = condition(
+    etag_func=lambda request, *args, **kwargs: _feed_validators(request)[0],
+    last_modified_func=lambda request, *args, **kwargs: _feed_validators(request)[1],
+)
+
+question_condition = condition(
+    etag_func=lambda request, id: _question_validators(request, id)[0],
+    last_modified_func=lambda request, id: _question_validators(request, id)[1],
+)
+
+# no Last-Modified, the counters change after the time of the feed version
+profile_condition = condition(etag_func=lambda request, user_id: _profile_validators(request, user_id)[0])
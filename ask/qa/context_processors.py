@@ -0,0 +1,11 @@
+from django.utils.functional import SimpleLazyObject
+
+from qa import notifications
+
+
+def unread_notifications(request):
+    """The badge count, queried by its primary key only when a template shows it."""
+    user = getattr(request, 'user', None)
+    if user is None:
+        return {'unread_notifications': 0}
+    return {'unread_notifications': SimpleLazyObject(lambda: notifications.unread_count(request))}
@@ -0,0 +1,82 @@
+"""
+Deleting questions. The request only marks the question deleted (QuestionManager hides it from
+then on), its answers, votes and notifications are deleted afterwards by a background task, or
+by ./manage.py purge_deleted_questions, in transactions of a bounded number of rows. So no request
+waits for the cascade of a popular question or holds its locks. The files of the deleted attachments
+are removed by a background task too, an hour later for the ones stored or reused lately.
+"""
+from collections import Counter
+
+from django.db import transaction
+from django.utils import timezone
+
+from qa import activity, tags, thumbnails, uploads
+from qa.models import Question, Answer, Attachment, QuestionLikes, Notification, UserProfile
+from qa.tasks import task
+
+
+def delete_question(question):
+    Question.all_objects.filter(pk=question.pk).update(is_deleted=True, deleted_at=timezone.now())
+    activity.question_deleted(question)
+    tags.question_deleted(question)
+    purge_question.enqueue(question.pk)
+
+
+def delete_answer(answer):
+    hashes = list(answer.attachments.values_list('sha256', flat=True))
+    answer.delete()
+    activity.answer_deleted(answer)
+    if hashes:
+        remove_files.enqueue(hashes)
+
+
+@task
+def purge_question(question_id):
+    purge(question_id)
+
+
+@task
+def remove_files(hashes):
+    """
+    Removes the files and the thumbnails of the attachments with the hashes which are no longer
+    used. The ones stored or reused lately may be about to be attached, they are tried again later.
+    """
+    removed, recent = uploads.remove_unused(hashes)
+    thumbnails.remove(removed)
+    if recent:
+        remove_files.enqueue(recent, delay=uploads.RECENT_SECONDS)
+
+
+def _delete_in_batches(queryset, user_field, counter, batch_size, amount=None):
+    """Deletes the rows batch_size at a time, each takes its amount (or 1) off the counter of its user."""
+    fields = ['pk', user_field] + ([amount] if amount else [])
+    while True:
+        with transaction.atomic():
+            rows = list(queryset.order_by('pk').values_list(*fields)[:batch_size])
+            if not rows:
+                return
+            deltas = Counter()
+            for row in rows:
+                deltas[row[1]] -= row[2] if amount else 1
+            UserProfile.objects.add(counter, deltas)
+            queryset.model.objects.filter(pk__in=[row[0] for row in rows]).delete()
+
+
+def purge(question_id, batch_size=1000):
+    """Deletes a deleted question with everything referring to it."""
+    if not Question.all_objects.filter(pk=question_id, is_deleted=True).exists():
+        return
+    hashes = set(Attachment.objects.filter(question_id=question_id).values_list('sha256', flat=True))
+    _delete_in_batches(Answer.objects.filter(question_id=question_id), 'author_id', 'answer_count', batch_size)
+    _delete_in_batches(QuestionLikes.objects.filter(question_id=question_id), 'user_id', 'vote_count', batch_size)
+    _delete_in_batches(Notification.objects.filter(question_id=question_id), 'user_id', 'unread_notifications',
+                       batch_size, amount='count')
+    Question.all_objects.filter(pk=question_id, is_deleted=True).delete()
+    remove_files(list(hashes))
+
+
+def purge_deleted(batch_size=1000):
+    """Purges all the deleted questions, yields the ids of the purged ones."""
+    for question_id in Question.all_objects.filter(is_deleted=True).values_list('pk', flat=True).iterator():
+        purge(question_id, batch_size)
+        yield question_id
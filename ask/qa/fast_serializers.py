@@ -0,0 +1,52 @@
+from operator import itemgetter
+
+from rest_framework.fields import Field
+
+
+def _none_or(convert):
+    def extract(value):
+        return None if value is None else convert(value)
+    return extract
+
+
+class ValuesSerializer:
+    """
+    Read-only list serializer working on .values_list() rows instead of model instances.
+
+    Every field is (output name, queryset lookup or tuple of lookups, converter). A DRF field
+    as the converter formats the value exactly like in a ModelSerializer, a function gets the
+    values of all its lookups. The extractors are built once, serializing a row is a dict
+    comprehension over them.
+    """
+
+    def __init__(self, *fields):
+        self.lookups = []
+        self.extractors = []
+        for name, lookups, convert in fields:
+            if isinstance(lookups, str):
+                lookups = (lookups,)
+            positions = [self._position(lookup) for lookup in lookups]
+            if isinstance(convert, Field):
+                convert = _none_or(convert.to_representation)
+            if len(positions) == 1:
+                extract = self._single(positions[0], convert)
+            else:
+                extract = self._many(itemgetter(*positions), convert)
+            self.extractors.append((name, extract))
+
+    def _position(self, lookup):
+        if lookup not in self.lookups:
+            self.lookups.append(lookup)
+        return self.lookups.index(lookup)
+
+    @staticmethod
+    def _single(position, convert):
+        return lambda row: convert(row[position])
+
+    @staticmethod
+    def _many(getter, convert):
+        return lambda row: convert(*getter(row))
+
+    def serialize(self, queryset):
+        extractors = self.extractors
+        return [{name: extract(row) for name, extract in extractors} for row in queryset.values_list(*self.lookups)]
@@ -0,0 +1,28 @@
+"""
+Compact JSON encoding of the AJAX and API responses. Uses orjson when it is installed
+(`pip install orjson`) and the standard json module otherwise, both return UTF-8 bytes.
+"""
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_django_default = DjangoJSONEncoder().default
+
+
+def _stdlib_dumps(data, default=None):
+    return json.dumps(data, default=default or _django_default, ensure_ascii=False,
+                      separators=(',', ':')).encode()
+
+
+def _orjson_dumps(data, default=None):
+    # datetimes are passed to `default` to be formatted the same way as by the stdlib encoders
+    return orjson.dumps(data, default=default or _django_default,
+                        option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS)
+
+
+dumps = _orjson_dumps if orjson is not None else _stdlib_dumps
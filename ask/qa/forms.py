@@ -4,6 +4,7 @@ from django.contrib.auth.models import User
 from django.contrib.auth.password_validation import validate_password
 from django.contrib.auth.hashers import make_password, check_password
 
+from qa.tags import MAX_TAGS, parse as parse_tags, set_tags
 from qa.models import Question, Answer
 
 EMPTY_TITLE_ERROR = "You can't have an empty question title"
@@ -17,13 +18,24 @@ EMPTY_PASSWORD_ERROR = "You can't have an empty password"
 class AskForm(forms.Form):
     title = forms.CharField(max_length=1024, label="Question title", error_messages={'required': EMPTY_TITLE_ERROR})
     text = forms.CharField(widget=forms.Textarea, label="Question text", error_messages={'required': EMPTY_TEXT_ERROR})
+    tags = forms.CharField(max_length=512, required=False, label="Tags",
+                           help_text=f"Up to {MAX_TAGS} tags separated by spaces, e.g. python django")
+
+    def clean_tags(self):
+        try:
+            return parse_tags(self.cleaned_data['tags'])
+        except ValueError as exc:
+            raise forms.ValidationError(str(exc))
 
     def clean(self):
         pass
 
     def save(self):
-        question = Question(**self.cleaned_data)
+        data = dict(self.cleaned_data)
+        names = data.pop('tags', [])
+        question = Question(**data)
         question.save()
+        set_tags(question, names)
         return question
 
 
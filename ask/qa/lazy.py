@@ -0,0 +1,62 @@
+from django.urls import URLResolver, get_resolver
+from django.utils.module_loading import import_string
+
+
+class LazyView:
+    """
+    URLconf entry importing its view on the first request, so loading the URLconf
+    doesn't import the view modules (and DRF with them). Compares equal to the view.
+    """
+
+    def __init__(self, path, as_view=False):
+        self.path = path
+        self.as_view = as_view
+        self._view = None
+        # ResolverMatch builds the view path from these without importing it
+        self.__module__, self.__name__ = path.rsplit('.', 1)
+        self.__qualname__ = self.__name__
+
+    @property
+    def view(self):
+        if self._view is None:
+            view = import_string(self.path)
+            self._view = view.as_view() if self.as_view else view
+        return self._view
+
+    def __call__(self, request, *args, **kwargs):
+        return self.view(request, *args, **kwargs)
+
+    def __getattr__(self, name):
+        # view attributes such as csrf_exempt; private and special names are the LazyView's own,
+        # and an instance made without __init__ (copy, pickle) has no view to delegate to yet
+        if name.startswith('_') or '_view' not in self.__dict__:
+            raise AttributeError(name)
+        return getattr(self.view, name)
+
+    def __eq__(self, other):
+        if isinstance(other, LazyView):
+            return self.path == other.path and self.as_view == other.as_view
+        return self.view == other
+
+    def __hash__(self):
+        return hash(self.path)
+
+    def __repr__(self):
+        return f'<LazyView {self.path}>'
+
+
+def load_views(urlconf=None):
+    """
+    Imports the views of every LazyView in the URLconf, for a server process that forks its workers
+    after loading the project (gunicorn's preload_app). Returns how many views it loaded.
+    """
+    patterns = list(get_resolver(urlconf).url_patterns)
+    loaded = 0
+    while patterns:
+        pattern = patterns.pop()
+        if isinstance(pattern, URLResolver):
+            patterns.extend(pattern.url_patterns)
+        elif isinstance(pattern.callback, LazyView):
+            pattern.callback.view
+            loaded += 1
+    return loaded
@@ -0,0 +1,77 @@
+import gzip
+import hashlib
+import json
+import os
+import re
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from qa.templatetags.assets import read_manifest
+
+CSS_COMMENT = re.compile(r'/\*.*?\*/', re.S)
+CSS_SPACE = re.compile(r'\s*([{}:;,>])\s*')
+
+
+def minify_css(source):
+    source = CSS_COMMENT.sub('', source)
+    source = CSS_SPACE.sub(r'\1', ' '.join(source.split()))
+    return source.replace(';}', '}').strip()
+
+
+def minify_js(source):
+    """
+    Drops the comments standing on lines of their own, the indentation and the empty lines. It
+    doesn't parse JavaScript, so it leaves alone anything which might be in a string or a regex.
+    """
+    lines = []
+    in_comment = False
+    for line in source.splitlines():
+        line = line.strip()
+        if in_comment:
+            in_comment = '*/' not in line
+        elif line.startswith('/*'):
+            in_comment = '*/' not in line
+        elif line and not line.startswith('//'):
+            lines.append(line)
+    return '\n'.join(lines) + '\n'
+
+
+MINIFIERS = {'.css': minify_css, '.js': minify_js}
+
+
+def _write(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + '.tmp', 'wb') as file:
+        file.write(content)
+    os.replace(path + '.tmp', path)
+
+
+class Command(BaseCommand):
+    help = ('Bundles and minifies the CSS and JavaScript of ASSET_BUNDLES into ASSETS_ROOT, as files '
+            'with the hash of their content in the name and their gzipped copies for nginx gzip_static, '
+            'and writes the manifest {% asset %} reads. Files of the earlier builds are kept for the '
+            'pages cached with them.')
+
+    def handle(self, *args, **options):
+        built = {}
+        for bundle, sources in settings.ASSET_BUNDLES.items():
+            base, extension = os.path.splitext(bundle)
+            parts = []
+            for source in sources:
+                with open(os.path.join(settings.ASSETS_SOURCE, source), encoding='utf-8') as file:
+                    parts.append(MINIFIERS[extension](file.read()))
+            content = ''.join(parts).encode()
+            name = f'{base}.{hashlib.sha256(content).hexdigest()[:12]}{extension}'
+            compressed = gzip.compress(content, compresslevel=9, mtime=0)
+            for path in (name, bundle):
+                _write(os.path.join(settings.ASSETS_ROOT, path), content)
+                # gzip makes tiny files bigger
+                if len(compressed) < len(content):
+                    _write(os.path.join(settings.ASSETS_ROOT, path + '.gz'), compressed)
+            built[bundle] = name
+            self.stdout.write(f'{name}: {len(content)} bytes, {len(compressed)} gzipped')
+        _write(os.path.join(settings.ASSETS_ROOT, settings.ASSETS_MANIFEST),
+               json.dumps(built, indent=2, sort_keys=True).encode())
+        read_manifest.cache_clear()
+        self.stdout.write(self.style.SUCCESS(f'Built {len(built)} bundles'))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from qa import vote_history
+
+
+class Command(BaseCommand):
+    help = ('Rolls the logged rating changes up into the hourly rating history of the questions, '
+            'e.g. every few minutes from cron.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Events compacted per transaction (default: 1000).')
+
+    def handle(self, *args, batch_size, **options):
+        compacted = sum(vote_history.compact(batch_size))
+        self.stdout.write(self.style.SUCCESS(f'Compacted {compacted} vote events'))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from qa import deletion
+
+
+class Command(BaseCommand):
+    help = ('Deletes the questions marked deleted with their answers, votes and notifications. '
+            'run_tasks does it right after the deletion, this catches up on anything left.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Rows deleted per transaction (default: 1000).')
+
+    def handle(self, *args, batch_size, **options):
+        purged = 0
+        for purged, question_id in enumerate(deletion.purge_deleted(batch_size), 1):
+            self.stdout.write(f'Question {question_id} purged')
+        self.stdout.write(self.style.SUCCESS(f'Purged {purged} questions'))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from qa import reputation
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the reputation of all the users from the votes for their questions.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Users recomputed per transaction (default: 1000).')
+
+    def handle(self, *args, batch_size, **options):
+        done = 0
+        for done in reputation.rebuild(batch_size):
+            self.stdout.write(f'{done} users done')
+        self.stdout.write(self.style.SUCCESS(f'Reputation of {done} users rebuilt'))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from qa import tasks
+
+
+class Command(BaseCommand):
+    help = 'Runs the tasks queued with qa.tasks, e.g. under a process supervisor next to gunicorn.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100,
+                            help='Tasks claimed at once, the calls of a batch task are merged (default: 100).')
+        parser.add_argument('--sleep', type=float, default=1.0,
+                            help='Seconds to wait when the queue is empty (default: 1).')
+        parser.add_argument('--once', action='store_true', help='Exit when the queue is empty.')
+
+    def handle(self, *args, batch_size, sleep, once, **options):
+        tasks.work(batch_size, sleep, once)
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from qa import notifications
+
+
+class Command(BaseCommand):
+    help = 'Emails the users a digest of the news about their questions which has not been sent yet, e.g. hourly from cron.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Users emailed per transaction (default: 500).')
+
+    def handle(self, *args, batch_size, **options):
+        sent = 0
+        for sent in notifications.send_digests(batch_size):
+            self.stdout.write(f'{sent} digests sent')
+        self.stdout.write(self.style.SUCCESS(f'Sent {sent} digests'))
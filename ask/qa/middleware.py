@@ -0,0 +1,29 @@
+from django.conf import settings
+
+from .routers import pin_to_primary, unpin
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+
+class ReplicaPinMiddleware:
+    """
+    Keeps read-your-writes consistency with read replicas: write requests and
+    every request made within REPLICA_PIN_SECONDS after a successful write
+    (tracked with a cookie) read from the primary database.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        is_write = request.method not in SAFE_METHODS
+        if is_write or settings.REPLICA_PIN_COOKIE in request.COOKIES:
+            pin_to_primary()
+        try:
+            response = self.get_response(request)
+        finally:
+            unpin()
+        if is_write and response.status_code < 400 and settings.DATABASE_REPLICAS:
+            response.set_cookie(settings.REPLICA_PIN_COOKIE, '1',
+                                max_age=settings.REPLICA_PIN_SECONDS, httponly=True, samesite='Lax')
+        return response
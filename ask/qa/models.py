@@ -1,9 +1,16 @@
-from django.db import models
+from django.conf import settings
+from django.db import models, connections, router
 from django.contrib.auth.models import User
 from django.urls import reverse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 
 
 class QuestionManager(models.Manager):
+    """The questions which are not deleted, Question.all_objects has the deleted ones too."""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(is_deleted=False)
 
     def new(self):
         return self.order_by('-added_at')
@@ -11,29 +18,351 @@ class QuestionManager(models.Manager):
     def popular(self):
         return self.order_by('-rating')
 
+    def touch(self, *question_ids):
+        return self.filter(pk__in=question_ids).update(modified_at=timezone.now())
+
 
 class Question(models.Model):
     title = models.CharField(default="", max_length=1024)
     text = models.TextField(default="")
     added_at = models.DateTimeField(auto_now_add=True)
+    modified_at = models.DateTimeField(auto_now=True)
     rating = models.IntegerField(default=0)
+    # approximate, written in batches by qa/view_counts.py
+    view_count = models.PositiveIntegerField(default=0)
     author = models.ForeignKey(User, null=True, on_delete=models.SET_NULL)
     likes = models.ManyToManyField(User, related_name='questions',
                                    through='QuestionLikes', through_fields=('question', 'user'))
+    # deleted questions are hidden until ./manage.py purge_deleted_questions removes them
+    is_deleted = models.BooleanField(default=False)
+    deleted_at = models.DateTimeField(null=True, blank=True)
+    tags = models.ManyToManyField('Tag', related_name='questions', through='QuestionTag')
     objects = QuestionManager()
+    all_objects = models.Manager()
 
     def get_absolute_url(self):
         return reverse('question', kwargs={'id': str(self.id)})
 
 
+class AnswerManager(models.Manager):
+
+    def visible(self):
+        """The answers to the questions which are not deleted."""
+        return self.filter(question__is_deleted=False)
+
+    def page(self, question_id, after=None, limit=20):
+        """
+        Keyset page of the answers to the question in the order they were added: the answers
+        after the (added_at, id) position `after` and that position of the last one if there are more.
+        """
+        qs = (self.filter(question_id=question_id).select_related('author').prefetch_related('attachments')
+              .order_by('added_at', 'id'))
+        if after is not None:
+            added_at, pk = after
+            qs = qs.filter(models.Q(added_at__gt=added_at) | models.Q(added_at=added_at, id__gt=pk))
+        answers = list(qs[:limit + 1])
+        if len(answers) > limit:
+            last = answers[limit - 1]
+            return answers[:limit], (last.added_at, last.id)
+        return answers, None
+
+
 class Answer(models.Model):
     text = models.TextField(default="")
     added_at = models.DateTimeField(auto_now_add=True)
     question = models.ForeignKey(Question, on_delete=models.CASCADE)
     author = models.ForeignKey(User, null=True, on_delete=models.SET_NULL)
+    objects = AnswerManager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['question', 'added_at', 'id'], name='answer_question_seek'),
+        ]
+
+
+class AttachmentManager(models.Manager):
+
+    def visible(self):
+        """The attachments of the questions which are not deleted."""
+        return self.filter(question__is_deleted=False)
+
+
+class Attachment(models.Model):
+    """
+    File attached to a question or to one of its answers. Its content is stored once per sha256
+    under UPLOADS_ROOT (qa/uploads.py), identical uploads share it.
+    """
+    question = models.ForeignKey(Question, on_delete=models.CASCADE, related_name='attachments')
+    # None for the attachments of the question itself
+    answer = models.ForeignKey(Answer, null=True, blank=True, on_delete=models.CASCADE, related_name='attachments')
+    uploader = models.ForeignKey(User, null=True, on_delete=models.SET_NULL, related_name='+')
+    name = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=100)
+    size = models.PositiveBigIntegerField()
+    sha256 = models.CharField(max_length=64, db_index=True)
+    added_at = models.DateTimeField(auto_now_add=True)
+    # images get thumbnails of THUMBNAIL_SIZE and twice that in the background (qa/thumbnails.py)
+    has_thumbnail = models.BooleanField(default=False)
+    objects = AttachmentManager()
+
+    @property
+    def path(self):
+        """Path of the content relative to UPLOADS_ROOT."""
+        return f'{self.sha256[:2]}/{self.sha256[2:4]}/{self.sha256}'
+
+    def thumbnail_path(self, scale=1):
+        """Path of the thumbnail relative to THUMBNAILS_ROOT, the hash in the name makes it immutable."""
+        return f'{self.sha256[:2]}/{settings.THUMBNAIL_SIZE * scale}.{self.sha256}.jpg'
+
+    @property
+    def thumbnail_url(self):
+        return settings.THUMBNAILS_URL + self.thumbnail_path()
+
+    @property
+    def thumbnail_srcset(self):
+        return f'{self.thumbnail_url} 1x, {settings.THUMBNAILS_URL}{self.thumbnail_path(2)} 2x'
+
+    def get_absolute_url(self):
+        return reverse('attachment', kwargs={'id': self.id})
 
 
 class QuestionLikes(models.Model):
     question = models.ForeignKey(Question, on_delete=models.CASCADE, related_name='question_likes')
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='question_likes')
     is_liked = models.BooleanField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['question', 'user'], name='unique_question_like'),
+        ]
+
+
+class Tag(models.Model):
+    name = models.CharField(max_length=64, unique=True)
+    # questions with the tag, maintained by qa.tags
+    question_count = models.IntegerField(default=0)
+
+    class Meta:
+        indexes = [models.Index(fields=['-question_count', 'name'], name='tag_popular')]
+
+    def __str__(self):
+        return self.name
+
+    def get_absolute_url(self):
+        return reverse('tag', kwargs={'name': self.name})
+
+
+class QuestionTagManager(models.Manager):
+
+    def feed(self, tag_id, popular=False, after=None, limit=10):
+        """
+        Keyset page of the questions with the tag, the newest or the most popular first: the questions
+        after the position `after`, (added_at, id) or (rating, id), and that position of the last
+        one if there are more. Read from the questiontag_new or questiontag_popular index.
+        """
+        key = 'rating' if popular else 'added_at'
+        qs = (self.filter(tag_id=tag_id).select_related('question__author')
+              .order_by(f'-{key}', '-question_id'))
+        if after is not None:
+            value, pk = after
+            qs = qs.filter(models.Q(**{f'{key}__lt': value}) | models.Q(**{key: value, 'question_id__lt': pk}))
+        rows = list(qs[:limit + 1])
+        questions = [row.question for row in rows[:limit]]
+        if len(rows) > limit:
+            last = rows[limit - 1]
+            return questions, (getattr(last, key), last.question_id)
+        return questions, None
+
+
+class QuestionTag(models.Model):
+    """Tag of a question, with its added_at and rating copied for the per tag feeds."""
+    question = models.ForeignKey(Question, on_delete=models.CASCADE, related_name='question_tags')
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE, related_name='question_tags')
+    added_at = models.DateTimeField()
+    rating = models.IntegerField(default=0)
+    objects = QuestionTagManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['question', 'tag'], name='unique_question_tag'),
+        ]
+        indexes = [
+            models.Index(fields=['tag', 'added_at', 'question'], name='questiontag_new'),
+            models.Index(fields=['tag', 'rating', 'question'], name='questiontag_popular'),
+        ]
+
+
+class ContentVersionManager(models.Manager):
+
+    def current(self, name):
+        """Returns (version, time of the last change) of the named content."""
+        return self.filter(name=name).values_list('value', 'updated_at').first() or (0, None)
+
+    def bump(self, name):
+        if not self.filter(name=name).update(value=models.F('value') + 1, updated_at=timezone.now()):
+            self.get_or_create(name=name, defaults={'value': 1})
+
+
+class ContentVersion(models.Model):
+    name = models.CharField(max_length=32, unique=True)
+    value = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    objects = ContentVersionManager()
+
+
+class UserProfileManager(models.Manager):
+
+    def bump(self, user_id, active=True, **deltas):
+        """
+        Adds the deltas to the counters of the user, e.g. bump(user.id, question_count=1),
+        and if active, records that the user has just done something.
+        """
+        if user_id is None:
+            return
+        changes = {field: models.F(field) + delta for field, delta in deltas.items() if delta}
+        if active:
+            changes['last_activity'] = timezone.now()
+        if changes and not self.filter(user_id=user_id).update(**changes):
+            self.get_or_create(user_id=user_id)
+            self.filter(user_id=user_id).update(**changes)
+
+    def add(self, field, deltas):
+        """Adds {user_id: delta} to the counter of many users with one UPDATE per distinct delta."""
+        deltas = {user_id: delta for user_id, delta in deltas.items() if user_id is not None and delta}
+        if not deltas:
+            return
+        self.bulk_create([self.model(user_id=user_id) for user_id in deltas], ignore_conflicts=True)
+        by_delta = {}
+        for user_id, delta in deltas.items():
+            by_delta.setdefault(delta, []).append(user_id)
+        for delta, user_ids in by_delta.items():
+            self.filter(user_id__in=user_ids).update(**{field: models.F(field) + delta})
+
+    def top(self):
+        """Users by reputation, highest first, read in the order of the profile_top index."""
+        return self.order_by('-reputation', 'user_id')
+
+    def recent_activity(self, user_id, limit=10):
+        """
+        The latest questions, answers and votes of the user fetched in one round trip:
+        rows of (kind, id, text, added_at, value, question_id).
+        """
+        question = Question._meta.db_table
+        answer = Answer._meta.db_table
+        likes = QuestionLikes._meta.db_table
+        sql = f'''
+            SELECT * FROM (
+                SELECT 'question' AS kind, id, title AS text, added_at, rating AS value, id AS question_id
+                FROM {question} WHERE author_id = %s AND is_deleted = %s ORDER BY added_at DESC LIMIT %s
+            ) AS recent_questions
+            UNION ALL
+            SELECT * FROM (
+                SELECT 'answer' AS kind, a.id, a.text, a.added_at, NULL AS value, a.question_id
+                FROM {answer} a JOIN {question} q ON q.id = a.question_id
+                WHERE a.author_id = %s AND q.is_deleted = %s ORDER BY a.added_at DESC LIMIT %s
+            ) AS recent_answers
+            UNION ALL
+            SELECT * FROM (
+                SELECT 'vote' AS kind, l.id, q.title AS text, q.added_at, l.is_liked AS value, l.question_id
+                FROM {likes} l JOIN {question} q ON q.id = l.question_id
+                WHERE l.user_id = %s AND q.is_deleted = %s ORDER BY l.id DESC LIMIT %s
+            ) AS recent_votes
+        '''
+        connection = connections[router.db_for_read(self.model)]
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [user_id, False, limit] * 3)
+            rows = cursor.fetchall()
+        result = []
+        for kind, pk, text, added_at, value, question_id in rows:
+            if isinstance(added_at, str):
+                added_at = parse_datetime(added_at)
+            if timezone.is_naive(added_at):
+                added_at = timezone.make_aware(added_at, timezone.utc)
+            result.append((kind, pk, text, added_at, value, question_id))
+        return result
+
+
+class UserProfile(models.Model):
+    """Stats of a user maintained incrementally by the write paths (see qa/activity.py)."""
+    user = models.OneToOneField(User, primary_key=True, on_delete=models.CASCADE, related_name='profile')
+    question_count = models.IntegerField(default=0)
+    answer_count = models.IntegerField(default=0)
+    vote_count = models.IntegerField(default=0)
+    # sum of the votes for the questions of the user
+    reputation = models.IntegerField(default=0)
+    last_activity = models.DateTimeField(null=True)
+    # events in the notifications of the user, for the badge in base.html
+    unread_notifications = models.IntegerField(default=0)
+    objects = UserProfileManager()
+
+    class Meta:
+        indexes = [models.Index(fields=['-reputation', 'user'], name='profile_top')]
+
+
+class Task(models.Model):
+    """Queued call of a function registered with qa.tasks.task, run by ./manage.py run_tasks."""
+    name = models.CharField(max_length=200)
+    args = models.JSONField(default=list)
+    # not before this time: a delay, the retry backoff, or the lease of the worker running it
+    run_at = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    # out of attempts, kept for inspection
+    failed = models.BooleanField(default=False)
+    last_error = models.TextField(blank=True)
+    added_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['failed', 'run_at'], name='task_due')]
+
+    def __str__(self):
+        return f'{self.name}{tuple(self.args)}'
+
+
+class Notification(models.Model):
+    """
+    Unread news about a question of the user: all the events of a kind are coalesced into one
+    row counting them until the user reads it (the row is deleted then).
+    """
+    ANSWER = 'answer'
+    VOTE = 'vote'
+    KINDS = [(ANSWER, 'New answers'), (VOTE, 'New votes')]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notifications')
+    question = models.ForeignKey(Question, on_delete=models.CASCADE, related_name='+')
+    kind = models.CharField(max_length=10, choices=KINDS)
+    count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    # the count has been sent in a digest email
+    emailed = models.BooleanField(default=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'question', 'kind'], name='unique_notification'),
+        ]
+        indexes = [models.Index(fields=['emailed', 'user'], name='notification_digest')]
+
+
+class VoteEvent(models.Model):
+    """
+    Append-only log of the rating changes: a row per voted question per request, written with one
+    INSERT by qa/votes.py. ./manage.py compact_vote_events rolls it up into QuestionRatingHour.
+    """
+    # no constraint to check on the hot path, the events of purged questions are dropped by the compaction
+    question = models.ForeignKey(Question, on_delete=models.DO_NOTHING, db_constraint=False, related_name='+')
+    delta = models.SmallIntegerField()
+    created_at = models.DateTimeField(default=timezone.now)
+
+
+class QuestionRatingHour(models.Model):
+    """The rating changes of a question in an hour, compacted from VoteEvent."""
+    question = models.ForeignKey(Question, on_delete=models.CASCADE, related_name='+')
+    # the start of the hour
+    hour = models.DateTimeField()
+    delta = models.IntegerField(default=0)
+    # the number of rating changes
+    votes = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['question', 'hour'], name='unique_question_rating_hour'),
+        ]
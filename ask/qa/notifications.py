@@ -0,0 +1,126 @@
+"""
+Notifications of the authors about the answers and votes for their questions.
+
+The views only queue the events (answered, voted), a background task fans them out: the
+events of a batch are counted per (author, question, kind) and added to the coalesced
+Notification rows and to UserProfile.unread_notifications with one UPDATE per row, however
+many events there are. ./manage.py send_digests emails the counts which haven't been sent yet.
+
+The unread count, the badge of the navigation bar, is read once per request and is part of the
+ETags of the pages (qa/conditional.py): a notification doesn't change the feeds everyone caches.
+"""
+from collections import Counter
+
+from django.conf import settings
+from django.core.mail import get_connection, EmailMessage
+from django.db import transaction
+from django.db.models import F
+from django.template.loader import render_to_string
+from django.utils import timezone
+from django.contrib.auth.models import User
+
+from qa.models import Question, Notification, UserProfile
+from qa.tasks import task
+
+
+def answered(answer):
+    fan_out.enqueue(Notification.ANSWER, [answer.question_id], answer.author_id)
+
+
+def voted(user, question_ids):
+    if question_ids:
+        fan_out.enqueue(Notification.VOTE, list(question_ids), user.id)
+
+
+@task(batch=True)
+def fan_out(calls):
+    """Adds the queued [kind, question_ids, actor_id] events to the notifications of the authors."""
+    authors = dict(Question.objects.filter(pk__in={pk for _, ids, _ in calls for pk in ids})
+                   .values_list('pk', 'author_id'))
+    events = Counter()
+    for kind, question_ids, actor_id in calls:
+        for question_id in question_ids:
+            author_id = authors.get(question_id)
+            if author_id is not None and author_id != actor_id:
+                events[author_id, question_id, kind] += 1
+    if not events:
+        return
+
+    now = timezone.now()
+    unread = Counter()
+    with transaction.atomic():
+        Notification.objects.bulk_create([
+            Notification(user_id=user_id, question_id=question_id, kind=kind)
+            for user_id, question_id, kind in events
+        ], ignore_conflicts=True)
+        for (user_id, question_id, kind), count in events.items():
+            Notification.objects.filter(user_id=user_id, question_id=question_id, kind=kind).update(
+                count=F('count') + count, emailed=False, updated_at=now)
+            unread[user_id] += count
+        UserProfile.objects.add('unread_notifications', unread)
+
+
+def unread_count(request):
+    """The number of unread notifications of the user of the request, read once per request."""
+    if not hasattr(request, '_unread_notifications'):
+        count = 0
+        if request.user.is_authenticated:
+            count = UserProfile.objects.filter(user_id=request.user.pk).values_list(
+                'unread_notifications', flat=True).first() or 0
+        request._unread_notifications = count
+    return request._unread_notifications
+
+
+def unread(user):
+    """The unread notifications of the user, newest first."""
+    return list(Notification.objects.filter(user=user).select_related('question').order_by('-updated_at'))
+
+
+def mark_read(user, until):
+    """
+    Marks the notifications of the user last updated at `until` or before read, the ones updated
+    since they were shown stay unread.
+    """
+    with transaction.atomic():
+        notifications = list(Notification.objects.select_for_update().filter(user=user, updated_at__lte=until))
+        if notifications:
+            Notification.objects.filter(pk__in=[item.pk for item in notifications]).delete()
+            total = sum(item.count for item in notifications)
+            UserProfile.objects.filter(user=user).update(unread_notifications=F('unread_notifications') - total)
+
+
+def send_digests(batch_size=500):
+    """
+    Emails every user with news not sent yet a digest of them, batch_size users at a time over
+    one connection to the mail server. Yields the number of emails sent so far.
+    """
+    sent = 0
+    last_id = 0
+    connection = get_connection()
+    while True:
+        user_ids = list(Notification.objects.filter(emailed=False, user_id__gt=last_id).order_by('user_id')
+                        .values_list('user_id', flat=True).distinct()[:batch_size])
+        if not user_ids:
+            return
+        with transaction.atomic():
+            pending = list(Notification.objects.select_for_update().filter(emailed=False, user_id__in=user_ids)
+                           .select_related('question').order_by('user_id', '-updated_at'))
+            users = User.objects.in_bulk(user_ids)
+            by_user = {}
+            for item in pending:
+                by_user.setdefault(item.user_id, []).append(item)
+            messages = [
+                EmailMessage(
+                    subject='News about your questions',
+                    body=render_to_string('notification_digest.txt', {
+                        'user': users[user_id], 'items': items, 'site_url': settings.SITE_URL}),
+                    from_email=settings.DEFAULT_FROM_EMAIL,
+                    to=[users[user_id].email],
+                )
+                for user_id, items in by_user.items() if users[user_id].email
+            ]
+            connection.send_messages(messages)
+            Notification.objects.filter(pk__in=[item.pk for item in pending]).update(emailed=True)
+        sent += len(messages)
+        last_id = user_ids[-1]
+        yield sent
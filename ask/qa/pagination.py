@@ -0,0 +1,36 @@
+from datetime import datetime, timezone
+
+
+def encode_cursor(position):
+    """Encodes an (added_at, id) keyset position as 'microseconds-id' for URLs."""
+    if position is None:
+        return None
+    added_at, pk = position
+    microseconds = int(added_at.replace(microsecond=0).timestamp()) * 1000000 + added_at.microsecond
+    return f'{microseconds}-{pk}'
+
+
+def decode_cursor(cursor):
+    """Decodes a cursor of encode_cursor, raises ValueError for malformed ones."""
+    microseconds, pk = (int(part) for part in cursor.split('-'))
+    seconds, microsecond = divmod(microseconds, 1000000)
+    try:
+        added_at = datetime.fromtimestamp(seconds, tz=timezone.utc)
+    except (OverflowError, OSError) as exc:
+        # a time out of the range of the platform
+        raise ValueError(f'Invalid cursor {cursor!r}') from exc
+    return added_at.replace(microsecond=microsecond), pk
+
+
+def encode_rating_cursor(position):
+    """Encodes a (rating, id) keyset position as 'rating_id' for URLs."""
+    if position is None:
+        return None
+    rating, pk = position
+    return f'{rating}_{pk}'
+
+
+def decode_rating_cursor(cursor):
+    """Decodes a cursor of encode_rating_cursor, raises ValueError for malformed ones."""
+    rating, pk = (int(part) for part in cursor.split('_'))
+    return rating, pk
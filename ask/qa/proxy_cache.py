@@ -0,0 +1,66 @@
+"""
+Cooperation with the nginx proxy cache (see etc/nginx.conf).
+
+Anonymous GETs are marked as publicly cacheable for PROXY_CACHE_SECONDS, the rest is private.
+When content changes the affected pages are refreshed in the nginx cache by requesting them
+from the internal cache server (PROXY_CACHE_PURGE_URL) which bypasses and overwrites the cache.
+"""
+import logging
+from functools import wraps
+from urllib.request import Request, urlopen
+
+from django.conf import settings
+from django.utils.cache import patch_cache_control
+
+from .tasks import task
+
+logger = logging.getLogger(__name__)
+
+# pages that change together with every question
+FEED_PATHS = ['/', '/popular/', '/api/questions/', '/api/questions/popular/', '/api/answers/']
+
+
+def is_anonymous(request):
+    return settings.SESSION_COOKIE_NAME not in request.COOKIES
+
+
+def cache_for_anonymous(view):
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        response = view(request, *args, **kwargs)
+        if request.method in ('GET', 'HEAD') and is_anonymous(request) and response.status_code in (200, 304):
+            patch_cache_control(response, public=True, max_age=settings.PROXY_CACHE_SECONDS)
+        else:
+            patch_cache_control(response, private=True, no_cache=True)
+        return response
+    return wrapper
+
+
+def question_paths(question_id):
+    return [f'/question/{question_id}/', f'/api/question/{question_id}/answers/']
+
+
+def profile_paths(user_id):
+    return [f'/api/user/{user_id}/profile/']
+
+
+def _refresh(paths):
+    for path in paths:
+        request = Request(settings.PROXY_CACHE_PURGE_URL + path, headers={'Host': settings.PROXY_CACHE_HOST})
+        try:
+            urlopen(request, timeout=settings.PROXY_CACHE_PURGE_TIMEOUT).close()
+        except OSError as exc:
+            logger.warning('Failed to purge %s from the proxy cache: %s', path, exc)
+
+
+@task(batch=True)
+def refresh_paths(calls):
+    # a path changed by many writes meanwhile is refreshed once
+    _refresh(dict.fromkeys(path for paths, in calls for path in paths))
+
+
+def purge(paths):
+    """Queues refreshing the given paths in the nginx cache, the request doesn't wait for it."""
+    if not settings.PROXY_CACHE_PURGE_URL:
+        return
+    refresh_paths.enqueue(list(paths))
@@ -0,0 +1,164 @@
+"""
+Token bucket rate limits of the write endpoints and the API.
+
+A limit is named in RATELIMITS as 'N/period' (s, m, h or d): a client may do N requests at once
+and then one per period/N. Clients are the users, or the IP addresses of the anonymous ones.
+The buckets are kept in the memory of each process (RATELIMIT_BACKEND = 'local', the limits
+then apply per worker) or in the shared cache ('cache').
+
+    @ratelimit('vote')
+    def add_like_to_the_question(request): ...
+"""
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from rest_framework.throttling import BaseThrottle
+
+from .ajax import HttpResponseAjaxError
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+UNSAFE_METHODS = ('POST', 'PUT', 'PATCH', 'DELETE')
+
+_parsed = {}
+
+
+def parse_rate(rate):
+    """'N/period' -> (capacity N, tokens refilled per second)."""
+    if rate not in _parsed:
+        number, period = rate.split('/')
+        _parsed[rate] = (int(number), int(number) / PERIODS[period[0]])
+    return _parsed[rate]
+
+
+def _refill(tokens, updated, now, capacity, per_second):
+    return min(capacity, tokens + (now - updated) * per_second)
+
+
+class LocalBackend:
+    """
+    Buckets in an OrderedDict of this process, least recently used first:
+    {key: (tokens, updated, time the bucket is full again)}.
+    """
+    # past this many buckets the least recently used one is dropped even if it isn't full yet
+    max_keys = 100000
+
+    def __init__(self):
+        self.buckets = OrderedDict()
+        self.lock = threading.Lock()
+
+    def take(self, key, capacity, per_second, now, count=1):
+        with self.lock:
+            tokens, updated, _ = self.buckets.pop(key, (capacity, now, now))
+            tokens = _refill(tokens, updated, now, capacity, per_second)
+            allowed = tokens >= count
+            if allowed:
+                tokens -= count
+            self.buckets[key] = (tokens, now, now + (capacity - tokens) / per_second)
+            # a full bucket is the same as none: every take drops up to two of the oldest ones,
+            # so they go as fast as they come
+            for _ in range(2):
+                oldest = next(iter(self.buckets))
+                if self.buckets[oldest][2] > now and len(self.buckets) <= self.max_keys or oldest == key:
+                    break
+                del self.buckets[oldest]
+        return allowed, tokens
+
+    def reset(self):
+        with self.lock:
+            self.buckets.clear()
+
+
+class CacheBackend:
+    """
+    Buckets in the shared cache. Not atomic: racing requests of a client may get a token more.
+    There is no reset(), the cache can't drop its ratelimit: keys alone and is shared with the rest.
+    """
+
+    def take(self, key, capacity, per_second, now, count=1):
+        key = f'ratelimit:{key}'
+        tokens, updated = cache.get(key, (capacity, now))
+        tokens = _refill(tokens, updated, now, capacity, per_second)
+        allowed = tokens >= count
+        if allowed:
+            tokens -= count
+        # an expired bucket would be full again
+        cache.set(key, (tokens, now), timeout=int((capacity - tokens) / per_second) + 1)
+        return allowed, tokens
+
+
+_backends = {'local': LocalBackend(), 'cache': CacheBackend()}
+
+
+def backend():
+    return _backends[settings.RATELIMIT_BACKEND]
+
+
+def take(name, client, count=1):
+    """
+    Takes count tokens from the bucket of the client under the named limit. Returns the seconds
+    until the client may try again, 0 if the request is allowed. More tokens than the capacity
+    of the limit are never there, ValueError.
+    """
+    if not settings.RATELIMIT_ENABLED:
+        return 0
+    capacity, per_second = parse_rate(settings.RATELIMITS[name])
+    if count > capacity:
+        raise ValueError(f'At most {capacity} at once')
+    allowed, tokens = backend().take(f'{name}:{client}', capacity, per_second, time.time(), count)
+    return 0 if allowed else (count - tokens) / per_second
+
+
+def client_ip(request):
+    return request.META.get(settings.RATELIMIT_IP_HEADER) or request.META.get('REMOTE_ADDR', '')
+
+
+def user_or_ip(request):
+    if request.user.is_authenticated:
+        return f'user:{request.user.pk}'
+    return f'ip:{client_ip(request)}'
+
+
+def posted_username(request):
+    """Key of the account a login form is sent for, against password guessing from many addresses."""
+    return f'username:{request.POST.get("username", "").lower()}'
+
+
+def too_many_requests(request, retry_after):
+    if request.headers.get('x-requested-with') == 'XMLHttpRequest' or request.content_type == 'application/json':
+        response = HttpResponseAjaxError(code='rate_limited', message='Too many requests, try again later')
+    else:
+        response = HttpResponse('Too many requests, try again later.', content_type='text/plain')
+    response.status_code = 429
+    response['Retry-After'] = str(int(retry_after) + 1)
+    return response
+
+
+def ratelimit(name, key=user_or_ip, methods=UNSAFE_METHODS):
+    """Answers the requests of a client over the named limit with 429, key(request) names the client."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method in methods:
+                retry_after = take(name, key(request))
+                if retry_after:
+                    return too_many_requests(request, retry_after)
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """DRF throttle with the same buckets, `scope` names the limit."""
+    scope = 'api'
+
+    def allow_request(self, request, view):
+        self.retry_after = take(self.scope, user_or_ip(request))
+        return not self.retry_after
+
+    def wait(self):
+        return self.retry_after
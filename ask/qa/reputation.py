@@ -0,0 +1,93 @@
+"""
+Reputation of the users: the sum of the votes for their questions (a like is +1, a dislike -1).
+It is credited to UserProfile.reputation as the votes land and can be recomputed from
+QuestionLikes with ./manage.py rebuild_reputation.
+"""
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, When, Value, Sum, IntegerField
+from django.contrib.auth.models import User
+
+from qa import singleflight
+from qa.models import QuestionLikes, UserProfile
+
+
+def credit(points):
+    """Adds {author_id: points} to the reputation of the authors, the points may be negative."""
+    UserProfile.objects.add('reputation', points)
+
+
+def debit(author_id, points):
+    credit({author_id: -points})
+
+
+def credit_votes(authors, deltas):
+    """Credits the rating changes {question_id: delta} to the authors {question_id: author_id}."""
+    points = defaultdict(int)
+    for question_id, delta in deltas.items():
+        points[authors[question_id]] += delta
+    credit(points)
+
+
+def leaderboard_page(number):
+    """
+    Page of the top LEADERBOARD_SIZE users as [(rank, user_id, username, reputation), ...], cached
+    for LEADERBOARD_CACHE_SECONDS. Raises ValueError for a page number out of the leaderboard.
+    """
+    size = settings.LEADERBOARD_PAGE_SIZE
+    start = (number - 1) * size
+    if number < 1 or start >= settings.LEADERBOARD_SIZE:
+        raise ValueError(f'No leaderboard page {number}')
+
+    def load():
+        stop = min(start + size, settings.LEADERBOARD_SIZE)
+        top = UserProfile.objects.top()[start:stop].values_list('user_id', 'user__username', 'reputation')
+        return [(rank, *row) for rank, row in enumerate(top, start + 1)]
+    return singleflight.cached(f'leaderboard:{number}', load, settings.LEADERBOARD_CACHE_SECONDS)
+
+
+def leaderboard_pages():
+    return range(1, -(-settings.LEADERBOARD_SIZE // settings.LEADERBOARD_PAGE_SIZE) + 1)
+
+
+def forget_leaderboard():
+    cache.delete_many([f'leaderboard:{number}' for number in leaderboard_pages()])
+
+
+def history_points(user_ids):
+    """The reputation of the users recomputed from all the votes for their questions."""
+    points = (QuestionLikes.objects.filter(question__author_id__in=user_ids, question__is_deleted=False)
+              .values_list('question__author_id')
+              .annotate(points=Sum(Case(When(is_liked=True, then=Value(1)), default=Value(-1),
+                                        output_field=IntegerField()))))
+    return dict(points)
+
+
+def rebuild(batch_size=1000):
+    """
+    Recomputes the reputation of all the users, batch_size users per transaction in the order
+    of their ids, so neither the memory nor the lock time grows with the number of users. The
+    profiles of a batch are locked before the votes are summed: a vote committed meanwhile is
+    either in the sum or credited after the batch is written. Yields the number of users done.
+    """
+    last_id = 0
+    done = 0
+    while True:
+        user_ids = list(User.objects.filter(pk__gt=last_id).order_by('pk').values_list('pk', flat=True)[:batch_size])
+        if not user_ids:
+            forget_leaderboard()
+            return
+        with transaction.atomic():
+            UserProfile.objects.bulk_create([UserProfile(user_id=user_id) for user_id in user_ids],
+                                            ignore_conflicts=True)
+            profiles = list(UserProfile.objects.select_for_update().filter(user_id__in=user_ids))
+            points = history_points(user_ids)
+            for profile in profiles:
+                profile.reputation = points.get(profile.user_id, 0)
+            UserProfile.objects.bulk_update(profiles, ['reputation'])
+        last_id = user_ids[-1]
+        done += len(user_ids)
+        yield done
@@ -0,0 +1,106 @@
+"""
+Computing a cached value once per expiry instead of once per concurrent request.
+
+cached() keeps the value in the cache together with the time it expires and the time its
+computation took:
+- before it expires a request may refresh it early, the more likely the closer the expiry and
+  the longer the computation (probabilistic early expiration, "XFetch"), so hot keys are mostly
+  refreshed before anybody misses them;
+- it is kept SINGLEFLIGHT_STALE_SECONDS past the expiry, whoever finds it expired recomputes it
+  while the other requests keep serving the stale value;
+- on a plain miss one request computes the value and the others wait for it: the threads of the
+  process on an Event, the other processes polling the cache. After SINGLEFLIGHT_WAIT_SECONDS
+  they give up waiting and compute it themselves.
+
+Across processes the key is locked with cache.add(), which is atomic in memcached, redis and the
+local memory cache.
+"""
+import math
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+# how much earlier than the expiry the values are refreshed, 1 is the optimum of XFetch
+BETA = 1.0
+POLL_SECONDS = 0.01
+
+
+class _Flight:
+    """A computation of a key in progress in this process."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.failed = False
+
+
+_flights = {}
+_flights_lock = threading.Lock()
+
+
+def _expired(delta, expires_at, now):
+    # -log(random()) is exponentially distributed, refreshes a few deltas ahead of the expiry at most
+    return now - delta * BETA * math.log(1.0 - random.random()) >= expires_at
+
+
+def _store(key, compute, timeout):
+    started = time.time()
+    value = compute()
+    now = time.time()
+    cache.set(key, (value, now - started, now + timeout), timeout + settings.SINGLEFLIGHT_STALE_SECONDS)
+    return value
+
+
+def _compute_once(key, compute, timeout, stale):
+    """Computes the value unless another process does; then serves the stale value or waits for it."""
+    lock = f'singleflight:{key}'
+    if cache.add(lock, 1, settings.SINGLEFLIGHT_WAIT_SECONDS):
+        try:
+            return _store(key, compute, timeout)
+        finally:
+            cache.delete(lock)
+    if stale is not None:
+        return stale[0]
+    deadline = time.monotonic() + settings.SINGLEFLIGHT_WAIT_SECONDS
+    while time.monotonic() < deadline:
+        time.sleep(POLL_SECONDS)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry[0]
+    return _store(key, compute, timeout)
+
+
+def cached(key, compute, timeout):
+    """The value of compute() cached under the key for timeout seconds, computed by one request at a time."""
+    entry = cache.get(key)
+    if entry is not None:
+        value, delta, expires_at = entry
+        if not _expired(delta, expires_at, time.time()):
+            return value
+
+    with _flights_lock:
+        flight = _flights.get(key)
+        leader = flight is None
+        if leader:
+            flight = _flights[key] = _Flight()
+    if not leader:
+        if entry is not None:
+            return entry[0]
+        if flight.done.wait(settings.SINGLEFLIGHT_WAIT_SECONDS) and not flight.failed:
+            return flight.value
+        # the computation failed or is too slow, it may succeed for this request
+        return _store(key, compute, timeout)
+
+    try:
+        flight.value = _compute_once(key, compute, timeout, entry)
+        return flight.value
+    except BaseException:
+        flight.failed = True
+        raise
+    finally:
+        with _flights_lock:
+            del _flights[key]
+        flight.done.set()
@@ -0,0 +1,124 @@
+"""
+Tags of the questions. Tag.question_count and the denormalized QuestionTag rows are maintained
+here as questions are asked and deleted; every change bumps the 'tags' content version, which
+keys the cached list of popular tags and makes the workers reload their autocomplete tries.
+"""
+import re
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+
+from qa.models import ContentVersion, QuestionTag, Tag
+
+TAGS = 'tags'
+MAX_TAGS = 5
+TAG_RE = re.compile(r'^[\w+#.-]{1,64}$')
+
+
+def parse(value):
+    """Tag names from the space or comma separated input, raises ValueError for invalid ones."""
+    names = list(dict.fromkeys(name.lower() for name in re.split(r'[\s,]+', value) if name))
+    if len(names) > MAX_TAGS:
+        raise ValueError(f'At most {MAX_TAGS} tags are allowed')
+    for name in names:
+        if not TAG_RE.match(name):
+            raise ValueError(f'Invalid tag "{name[:64]}": use letters, digits and + # . - _ only, at most 64')
+    return names
+
+
+def set_tags(question, names):
+    """Tags a new question, creating the tags which don't exist yet."""
+    if not names:
+        return
+    with transaction.atomic():
+        Tag.objects.bulk_create([Tag(name=name) for name in names], ignore_conflicts=True)
+        tag_ids = list(Tag.objects.filter(name__in=names).values_list('pk', flat=True))
+        QuestionTag.objects.bulk_create([
+            QuestionTag(question=question, tag_id=tag_id, added_at=question.added_at, rating=question.rating)
+            for tag_id in tag_ids
+        ])
+        Tag.objects.filter(pk__in=tag_ids).update(question_count=F('question_count') + 1)
+    ContentVersion.objects.bump(TAGS)
+
+
+def question_deleted(question):
+    """Takes a deleted question out of the tag feeds and counts."""
+    tag_ids = list(QuestionTag.objects.filter(question=question).values_list('tag_id', flat=True))
+    if not tag_ids:
+        return
+    with transaction.atomic():
+        QuestionTag.objects.filter(question=question).delete()
+        Tag.objects.filter(pk__in=tag_ids).update(question_count=F('question_count') - 1)
+    ContentVersion.objects.bump(TAGS)
+
+
+def popular(limit=20):
+    """[(name, question count), ...] of the most used tags, cached until the tags change."""
+    version, _ = ContentVersion.objects.current(TAGS)
+    return cache.get_or_set(
+        f'tags:popular:{version}:{limit}',
+        lambda: list(Tag.objects.filter(question_count__gt=0).order_by('-question_count', 'name')
+                     .values_list('name', 'question_count')[:limit]),
+    )
+
+
+class TagTrie:
+    """
+    Prefix tree of the tag names in which every node keeps the `size` most used tags starting
+    with its prefix, so completing a prefix takes len(prefix) dictionary lookups.
+    """
+    # key of the list of tags in a node, the nodes of the characters have one character keys
+    TOP = ''
+
+    def __init__(self, tags, size=10):
+        self.root = {}
+        # the most used first, so the first `size` tags reaching a node are its top
+        for name, count in sorted(tags, key=lambda tag: (-tag[1], tag[0])):
+            node = self.root
+            for char in name:
+                node = node.setdefault(char, {})
+                top = node.setdefault(self.TOP, [])
+                if len(top) < size:
+                    top.append((name, count))
+
+    def complete(self, prefix):
+        node = self.root
+        for char in prefix:
+            node = node.get(char)
+            if node is None:
+                return []
+        return node.get(self.TOP, [])
+
+
+_trie = None
+_trie_version = None
+_checked_at = 0.0
+_lock = threading.Lock()
+
+
+def _current_trie():
+    """The trie of this process, rebuilt when the tags have changed, which is checked every TAGS_TRIE_CHECK_SECONDS."""
+    global _trie, _trie_version, _checked_at
+    now = time.monotonic()
+    if _trie is not None and now - _checked_at < settings.TAGS_TRIE_CHECK_SECONDS:
+        return _trie
+    version, _ = ContentVersion.objects.current(TAGS)
+    with _lock:
+        if _trie is None or version != _trie_version:
+            tags = Tag.objects.filter(question_count__gt=0).values_list('name', 'question_count')
+            _trie = TagTrie(tags, settings.TAGS_AUTOCOMPLETE_SIZE)
+            _trie_version = version
+        _checked_at = now
+    return _trie
+
+
+def autocomplete(prefix):
+    """[(name, question count), ...] of the most used tags starting with the prefix."""
+    prefix = prefix.strip().lower()
+    if not prefix:
+        return []
+    return _current_trie().complete(prefix)
@@ -0,0 +1,114 @@
+"""
+Small durable task queue in the database, for the work that doesn't have to be done before
+the response is sent. A function is registered with @task and queued with .enqueue():
+
+    @task
+    def send_mail(user_id, subject): ...
+
+    send_mail.enqueue(user.id, 'Hello')
+
+The arguments are stored as JSON. A task registered with @task(batch=True) gets all its queued
+calls at once as a list of argument lists, so it can merge them. Tasks are run by
+./manage.py run_tasks (started by init.sh), a failed task is retried with a backoff up to
+TASKS_MAX_ATTEMPTS times. A call and the deletion of its tasks are one transaction. With TASKS_EAGER
+the tasks run right away, in the request. A call queued with .enqueue(..., delay=seconds) runs no
+sooner than that, by run_tasks even with TASKS_EAGER.
+"""
+import logging
+import time
+import traceback
+from datetime import timedelta
+from importlib import import_module
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from qa.models import Task
+
+logger = logging.getLogger(__name__)
+
+_registry = {}
+
+
+def task(func=None, *, batch=False):
+    def register(func):
+        name = f'{func.__module__}.{func.__name__}'
+        _registry[name] = (func, batch)
+        func.enqueue = lambda *args, delay=0: enqueue(name, *args, delay=delay)
+        return func
+    return register(func) if func is not None else register
+
+
+def _lookup(name):
+    if name not in _registry:
+        # the worker imports the modules of the tasks when it meets them
+        import_module(name.rsplit('.', 1)[0])
+    return _registry[name]
+
+
+def _call(name, calls):
+    func, batch = _lookup(name)
+    if batch:
+        func(calls)
+    else:
+        for args in calls:
+            func(*args)
+
+
+def enqueue(name, *args, delay=0):
+    if settings.TASKS_EAGER and not delay:
+        _call(name, [list(args)])
+    else:
+        Task.objects.create(name=name, args=list(args), run_at=timezone.now() + timedelta(seconds=delay))
+
+
+def _claim(limit):
+    """Leases up to limit due tasks to this worker, skipping the ones claimed by other workers."""
+    now = timezone.now()
+    with transaction.atomic():
+        tasks = list(Task.objects.select_for_update(skip_locked=True)
+                     .filter(failed=False, run_at__lte=now).order_by('run_at', 'pk')[:limit])
+        Task.objects.filter(pk__in=[item.pk for item in tasks]).update(
+            run_at=now + timedelta(seconds=settings.TASKS_LEASE_SECONDS))
+    return tasks
+
+
+def _failed(tasks, error):
+    now = timezone.now()
+    for item in tasks:
+        item.attempts += 1
+        item.last_error = error
+        if item.attempts >= settings.TASKS_MAX_ATTEMPTS:
+            item.failed = True
+        else:
+            item.run_at = now + timedelta(seconds=2 ** item.attempts)
+    Task.objects.bulk_update(tasks, ['attempts', 'last_error', 'failed', 'run_at'])
+
+
+def run_pending(limit=100):
+    """Runs up to limit due tasks, the ones of the same batch task in one call. Returns their number."""
+    tasks = _claim(limit)
+    groups = {}
+    for item in tasks:
+        groups.setdefault(item.name, []).append(item)
+    for name, items in groups.items():
+        try:
+            # the writes of the call are undone if it fails and done once with the tasks deleted,
+            # a retried batch doesn't apply its first calls twice
+            with transaction.atomic():
+                _call(name, [item.args for item in items])
+                Task.objects.filter(pk__in=[item.pk for item in items]).delete()
+        except Exception:
+            logger.exception('Task %s failed', name)
+            _failed(items, traceback.format_exc())
+    return len(tasks)
+
+
+def work(batch_size=100, sleep=1.0, once=False):
+    """Runs the queued tasks as they come, or only until the queue is empty with once."""
+    while True:
+        if not run_pending(batch_size):
+            if once:
+                return
+            time.sleep(sleep)
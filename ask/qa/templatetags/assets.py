@@ -0,0 +1,41 @@
+import json
+import logging
+import os
+from functools import lru_cache
+
+from django import template
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+register = template.Library()
+
+
+@lru_cache(maxsize=None)
+def read_manifest(path):
+    # a missing manifest raises, it isn't cached: it is read again once built
+    with open(path) as file:
+        return json.load(file)
+
+
+@lru_cache(maxsize=None)
+def warn_missing(path):
+    # once per process, not on every {% asset %} until the manifest is built
+    logger.warning('No asset manifest %s, run ./manage.py build_assets', path)
+
+
+def manifest():
+    """{bundle: built file with the hash in its name} written by ./manage.py build_assets, read once per process."""
+    path = os.path.join(settings.ASSETS_ROOT, settings.ASSETS_MANIFEST)
+    try:
+        return read_manifest(path)
+    except FileNotFoundError:
+        warn_missing(path)
+        return {}
+
+
+@register.simple_tag
+def asset(name):
+    """URL of the built bundle, e.g. {% asset 'js/question.js' %} -> /js/question.0123456789ab.js"""
+    # the bundle is built under its own name too, for a manifest from before it was added
+    return '/' + manifest().get(name, name)
@@ -0,0 +1,32 @@
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+class TestRunner(DiscoverRunner):
+    """
+    Runs the tests with the rate limits off and the views written only when a test asks for it,
+    the tests that check them turn them back on with override_settings. The assets are linked
+    through an empty manifest in a temporary ASSETS_ROOT, the build is tested in test_assets.py.
+    """
+    settings = {
+        'RATELIMIT_ENABLED': False,
+        'VIEW_COUNT_FLUSH_SECONDS': 3600,
+    }
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.assets_root = tempfile.mkdtemp()
+        with open(os.path.join(self.assets_root, settings.ASSETS_MANIFEST), 'w') as file:
+            file.write('{}')
+        self.overrides = override_settings(ASSETS_ROOT=self.assets_root, **self.settings)
+        self.overrides.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.overrides.disable()
+        shutil.rmtree(self.assets_root)
+        super().teardown_test_environment(**kwargs)
@@ -0,0 +1,65 @@
+import json
+
+from django.test import TestCase
+from django.contrib.auth.models import User
+from django.urls import reverse
+
+from qa import tasks
+from qa.models import Question, Answer, QuestionLikes, UserProfile
+
+
+class UserProfileCountersTest(TestCase):
+    """The profile counters must match what recounting from the tables gives after the queued updates."""
+
+    def setUp(self):
+        self.author = User.objects.create(username='author')
+        self.voter = User.objects.create(username='voter')
+        self.client.force_login(self.author)
+
+    def assertProfile(self, user, **expected):
+        tasks.work(once=True)
+        profile = UserProfile.objects.get(user=user)
+        self.assertEqual({field: getattr(profile, field) for field in expected}, expected)
+
+    def test_question_and_answer_are_counted(self):
+        self.client.post(reverse('ask'), {'title': 'Title', 'text': 'Text'})
+        question = Question.objects.get()
+        self.client.post(question.get_absolute_url(), {'text': 'Answer'})
+        self.assertProfile(self.author, question_count=1, answer_count=1, vote_count=0, reputation=0)
+        self.assertIsNotNone(UserProfile.objects.get(user=self.author).last_activity)
+
+    def test_votes_change_vote_count_and_author_reputation(self):
+        first = Question.objects.create(title='First', author=self.author)
+        second = Question.objects.create(title='Second', author=self.author)
+        self.client.force_login(self.voter)
+        votes = [{'question_id': first.id, 'operation': 'Like'}, {'question_id': second.id, 'operation': 'Dislike'},
+                 {'question_id': first.id, 'operation': 'Dislike'}]
+        self.client.post(reverse('like_batch'), json.dumps({'votes': votes}), content_type='application/json')
+        self.assertProfile(self.voter, vote_count=2)
+        self.assertProfile(self.author, reputation=-2)
+        self.assertIsNone(UserProfile.objects.get(user=self.author).last_activity)
+
+        self.client.post(reverse('like'), {'question_id': second.id, 'operation': 'Dislike'})
+        self.assertProfile(self.voter, vote_count=1)
+        self.assertProfile(self.author, reputation=-1)
+
+    def test_deleting_answer(self):
+        question = Question.objects.create(title='Title')
+        self.client.post(question.get_absolute_url(), {'text': 'Answer'})
+        self.client.post(reverse('delete_answer'), {'answer_id': Answer.objects.get().id})
+        self.assertProfile(self.author, answer_count=0)
+
+    def test_deleting_question_takes_off_its_answers_and_votes(self):
+        self.client.post(reverse('ask'), {'title': 'Title', 'text': 'Text'})
+        question = Question.objects.get()
+        self.client.post(question.get_absolute_url(), {'text': 'Own answer'})
+        self.client.force_login(self.voter)
+        self.client.post(question.get_absolute_url(), {'text': 'Answer'})
+        self.client.post(reverse('like'), {'question_id': question.id, 'operation': 'Like'})
+
+        self.client.force_login(self.author)
+        self.client.get(reverse('delete_question', kwargs={'question_id': question.id}))
+        tasks.work(once=True)
+        self.assertFalse(QuestionLikes.objects.exists())
+        self.assertProfile(self.author, question_count=0, answer_count=0, reputation=0)
+        self.assertProfile(self.voter, answer_count=0, vote_count=0)
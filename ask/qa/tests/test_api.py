@@ -0,0 +1,132 @@
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+from django.test import TestCase
+from django.contrib.auth.models import User
+from django.urls import reverse
+from rest_framework.renderers import JSONRenderer
+
+from qa import proxy_cache, tasks
+from qa.api import (
+    QuestionSerializer, AnswerSerializer, UserSerializer,
+    question_values_serializer, answer_values_serializer, user_values_serializer,
+)
+from qa.models import Question, Answer, QuestionLikes, UserProfile
+
+
+class ValuesSerializerParityTest(TestCase):
+    """The values serializers must render byte for byte like the model serializers."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.joe = User.objects.create(username='joe', email='joe@example.com')
+        cls.ivan = User.objects.create(username='Иван', email='')
+        authors = [cls.joe, cls.ivan, None]
+        for num in range(9):
+            question = Question.objects.create(title=f'Вопрос {num} "quoted"  ', text='text\n' * num,
+                                               rating=num - 4, author=authors[num % 3])
+            Answer.objects.create(text=f'Answer {num}', question=question, author=authors[(num + 1) % 3])
+        Question.objects.filter(pk=question.pk).update(added_at=datetime(2021, 5, 1, 12, 30, 15, 123456,
+                                                                         tzinfo=timezone.utc))
+        Answer.objects.filter(question=question).update(added_at=datetime(2021, 5, 1, tzinfo=timezone.utc))
+
+    def assertRendersTheSame(self, serializer_class, values_serializer, queryset):
+        expected = JSONRenderer().render(serializer_class(queryset, many=True).data)
+        actual = JSONRenderer().render(values_serializer.serialize(queryset))
+        self.assertEqual(actual, expected)
+
+    def test_questions(self):
+        self.assertRendersTheSame(QuestionSerializer, question_values_serializer, Question.objects.all())
+        self.assertRendersTheSame(QuestionSerializer, question_values_serializer, Question.objects.popular())
+
+    def test_answers(self):
+        self.assertRendersTheSame(AnswerSerializer, answer_values_serializer, Answer.objects.all())
+
+    def test_users(self):
+        self.assertRendersTheSame(UserSerializer, user_values_serializer, User.objects.all())
+
+    def test_empty_list(self):
+        self.assertRendersTheSame(QuestionSerializer, question_values_serializer, Question.objects.none())
+
+    def test_api_responses(self):
+        question = Question.objects.first()
+        cases = [
+            (reverse('api_questions'), QuestionSerializer, Question.objects.all()),
+            (reverse('api_popular_questions'), QuestionSerializer, Question.objects.popular()),
+            (reverse('api_answers'), AnswerSerializer, Answer.objects.all()),
+            (reverse('api_answers_to_question', kwargs={'question_id': question.id}), AnswerSerializer,
+             Answer.objects.filter(question=question)),
+            (reverse('api_users_questions', kwargs={'user_id': self.joe.id}), QuestionSerializer,
+             Question.objects.filter(author=self.joe)),
+            (reverse('api_users'), UserSerializer, User.objects.all()),
+            (reverse('api_users_answers', kwargs={'user_id': self.ivan.id}), AnswerSerializer,
+             Answer.objects.filter(author=self.ivan)),
+        ]
+        for url, serializer_class, queryset in cases:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.content, JSONRenderer().render(serializer_class(queryset, many=True).data))
+
+    def test_list_of_questions_takes_one_query(self):
+        with self.assertNumQueries(1):
+            question_values_serializer.serialize(Question.objects.all())
+
+    def test_unknown_user_returns_404(self):
+        response = self.client.get(reverse('api_users_questions', kwargs={'user_id': 100}))
+        self.assertEqual(response.status_code, 404)
+
+
+class UserProfileViewTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.joe = User.objects.create(username='joe', email='joe@example.com')
+        cls.question = Question.objects.create(title='Question', author=cls.joe, rating=1)
+        cls.other = Question.objects.create(title='Other')
+        cls.answer = Answer.objects.create(text='Answer', question=cls.other, author=cls.joe)
+        QuestionLikes.objects.create(question=cls.other, user=cls.joe, is_liked=False)
+        UserProfile.objects.bump(cls.joe.id, question_count=1, answer_count=1, vote_count=1, reputation=1)
+
+    def test_stats_and_recent_activity(self):
+        # the feed version and the counters for the ETag, the user with the profile and the recent items
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse('api_user_profile', kwargs={'user_id': self.joe.id}))
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['username'], 'joe')
+        self.assertEqual([data['question_count'], data['answer_count'], data['vote_count'], data['reputation']],
+                         [1, 1, 1, 1])
+        recent = data['recent']
+        self.assertEqual(recent['questions'], [{'id': self.question.id, 'title': 'Question', 'rating': 1,
+                                                'added_at': self.question.added_at.isoformat().replace('+00:00', 'Z')}])
+        self.assertEqual([answer['id'] for answer in recent['answers']], [self.answer.id])
+        self.assertEqual(recent['answers'][0]['question_id'], self.other.id)
+        self.assertEqual(recent['votes'], [{'question_id': self.other.id, 'title': 'Other', 'rate': 'Dislike'}])
+
+    def test_etag_changes_with_the_counters(self):
+        url = reverse('api_user_profile', kwargs={'user_id': self.joe.id})
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        # the author's counters are updated after the feed version is bumped
+        self.client.force_login(self.joe)
+        self.client.post(reverse('ask'), {'title': 'New', 'text': 'Text'})
+        self.client.logout()
+        etag = self.client.get(url)['ETag']
+        with self.settings(PROXY_CACHE_PURGE_URL='http://cache'), \
+                patch.object(proxy_cache, 'refresh_paths') as refresh_paths:
+            tasks.work(once=True)
+        refresh_paths.enqueue.assert_called_once_with([url])
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['question_count'], 2)
+
+    def test_user_without_profile(self):
+        ann = User.objects.create(username='ann')
+        response = self.client.get(reverse('api_user_profile', kwargs={'user_id': ann.id}))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['question_count'], 0)
+        self.assertEqual(response.json()['recent'], {'questions': [], 'answers': [], 'votes': []})
+
+    def test_unknown_user_returns_404(self):
+        response = self.client.get(reverse('api_user_profile', kwargs={'user_id': 100}))
+        self.assertEqual(response.status_code, 404)
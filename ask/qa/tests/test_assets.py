@@ -0,0 +1,99 @@
+import gzip
+import importlib
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.template import Context, Template
+from django.urls import clear_url_caches, reverse
+
+from ask import urls
+from qa.management.commands.build_assets import minify_css, minify_js
+from qa.models import Question
+from qa.templatetags.assets import read_manifest, warn_missing
+
+
+class MinifyTest(SimpleTestCase):
+
+    def test_css(self):
+        source = '/* comment */\n.b1 {\n    background: navy; /* inline */\n    color: white;\n}\n\na > b, c { x: 1 }\n'
+        self.assertEqual(minify_css(source), '.b1{background:navy;color:white}a>b,c{x:1}')
+
+    def test_js_keeps_strings_and_regexes(self):
+        source = ('/*\n * header\n */\nfunction f() {\n    // comment\n\n'
+                  '    return "http://x/*y*/".split(/[\\s,]+/); // trailing\n}\n')
+        self.assertEqual(minify_js(source),
+                         'function f() {\nreturn "http://x/*y*/".split(/[\\s,]+/); // trailing\n}\n')
+
+
+class BuildAssetsTest(TestCase):
+
+    def setUp(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        overrides = override_settings(ASSETS_ROOT=root)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        read_manifest.cache_clear()
+        self.addCleanup(read_manifest.cache_clear)
+        warn_missing.cache_clear()
+
+    def build(self):
+        call_command('build_assets', stdout=StringIO())
+        with open(os.path.join(settings.ASSETS_ROOT, 'assets.json')) as file:
+            return json.load(file)
+
+    def read(self, name):
+        with open(os.path.join(settings.ASSETS_ROOT, name), 'rb') as file:
+            return file.read()
+
+    def test_hashed_and_gzipped_bundles(self):
+        built = self.build()
+        self.assertEqual(sorted(built), sorted(settings.ASSET_BUNDLES))
+        self.assertRegex(built['js/question.js'], r'^js/question\.[0-9a-f]{12}\.js$')
+        script = self.read(built['js/question.js'])
+        # bundled in order and minified
+        self.assertLess(script.index(b'function postAjax'), script.index(b'question_actions'))
+        self.assertNotIn(b'/*', script)
+        self.assertEqual(gzip.decompress(self.read(built['js/question.js'] + '.gz')), script)
+        self.assertEqual(self.read('js/question.js'), script)
+        self.assertEqual(self.build(), built)
+
+    def test_templates_link_the_built_files(self):
+        with self.assertLogs('qa.templatetags.assets', 'WARNING'):
+            self.assertEqual(Template("{% load assets %}{% asset 'js/ask.js' %}").render(Context()), '/js/ask.js')
+        built = self.build()
+        html = self.client.get(Question.objects.create(title='Question').get_absolute_url()).content.decode()
+        self.assertIn(f'<link rel="stylesheet" href="/{built["css/site.css"]}">', html)
+        self.assertIn(f'<script src="/{built["js/question.js"]}"></script>', html)
+        self.assertNotIn('jquery', html)
+        self.assertNotIn('<style', html)
+        self.assertIn(f'<script src="/{built["js/ask.js"]}"></script>', self.client.get(reverse('ask')).content.decode())
+
+    def test_manifest_is_read_once_built(self):
+        template = Template("{% load assets %}{% asset 'js/ask.js' %}")
+        with self.assertLogs('qa.templatetags.assets', 'WARNING') as logs:
+            self.assertEqual(template.render(Context()), '/js/ask.js')
+            self.assertEqual(template.render(Context()), '/js/ask.js')
+        self.assertEqual(len(logs.records), 1)
+        # written by a build in another process
+        with open(os.path.join(settings.ASSETS_ROOT, 'assets.json'), 'w') as file:
+            json.dump({'js/ask.js': 'js/ask.0123456789ab.js'}, file)
+        self.assertEqual(template.render(Context()), '/js/ask.0123456789ab.js')
+
+    @override_settings(DEBUG=True)
+    def test_built_files_are_served_in_debug(self):
+        # the route is added when the URLconf is imported in DEBUG
+        self.addCleanup(clear_url_caches)
+        self.addCleanup(importlib.reload, urls)
+        importlib.reload(urls)
+        clear_url_caches()
+        built = self.build()
+        with open(os.path.join(settings.ASSETS_ROOT, built['css/site.css']), 'rb') as file:
+            css = file.read()
+        self.assertEqual(b''.join(self.client.get('/' + built['css/site.css']).streaming_content), css)
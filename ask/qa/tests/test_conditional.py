@@ -0,0 +1,106 @@
+from django.test import TestCase
+from django.contrib.auth.models import User
+from django.urls import reverse
+
+from qa.models import Question, Answer, ContentVersion
+from qa.conditional import content_changed, FEED
+
+
+class ContentVersionTest(TestCase):
+
+    def test_version_of_unknown_content_is_zero(self):
+        self.assertEqual(ContentVersion.objects.current('unknown'), (0, None))
+
+    def test_bump_increments_the_version(self):
+        ContentVersion.objects.bump(FEED)
+        ContentVersion.objects.bump(FEED)
+        version, updated_at = ContentVersion.objects.current(FEED)
+        self.assertEqual(version, 2)
+        self.assertIsNotNone(updated_at)
+
+
+class FeedConditionalGetTest(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(username='joe')
+        for question_num in range(3):
+            Question.objects.create(title='Question ' + str(question_num), author=self.user)
+        content_changed()
+
+    def test_feeds_have_validators(self):
+        for url in (reverse('new_questions'), reverse('popular'), reverse('api_questions')):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(response.has_header('ETag'))
+            self.assertTrue(response.has_header('Last-Modified'))
+            self.assertIn('Cookie', response['Vary'])
+
+    def test_not_modified_feed_costs_one_query(self):
+        for url in (reverse('new_questions'), reverse('popular'), reverse('api_questions'),
+                    reverse('api_users_questions', kwargs={'user_id': self.user.pk})):
+            etag = self.client.get(url)['ETag']
+            with self.assertNumQueries(1):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 304)
+            self.assertEqual(response.content, b'')
+
+    def test_pages_of_the_feed_have_different_etags(self):
+        etag = self.client.get(reverse('new_questions'))['ETag']
+        response = self.client.get(reverse('new_questions') + '?page=2', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_new_question_changes_the_etag(self):
+        etag = self.client.get(reverse('new_questions'))['ETag']
+        self.client.force_login(self.user)
+        self.client.post(reverse('ask'), data={'title': 'New question', 'text': 'text'})
+        self.client.logout()
+        response = self.client.get(reverse('new_questions'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'New question')
+
+    def test_logged_in_user_gets_his_own_etag(self):
+        etag = self.client.get(reverse('new_questions'))['ETag']
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('new_questions'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+
+class QuestionConditionalGetTest(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(username='joe')
+        self.question = Question.objects.create(title='Question', author=self.user)
+        self.url = self.question.get_absolute_url()
+
+    def test_not_modified_question_costs_one_query(self):
+        etag = self.client.get(self.url)['ETag']
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_if_modified_since_is_honored(self):
+        last_modified = self.client.get(self.url)['Last-Modified']
+        response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+    def test_new_answer_changes_the_etag(self):
+        etag = self.client.get(self.url)['ETag']
+        self.client.force_login(self.user)
+        self.client.post(self.url, data={'text': 'A new answer'})
+        self.client.logout()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'A new answer')
+
+    def test_deleted_answer_changes_the_etag(self):
+        answer = Answer.objects.create(text='Old answer', question=self.question, author=self.user)
+        self.client.force_login(self.user)
+        etag = self.client.get(self.url)['ETag']
+        self.client.post(reverse('delete_answer'), {'answer_id': answer.pk})
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotContains(response, 'Old answer')
+
+    def test_nonexistent_question_returns_404(self):
+        response = self.client.get(reverse('question', kwargs={'id': 100}), HTTP_IF_NONE_MATCH='"x"')
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,106 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth.models import User
+from django.urls import reverse
+
+from qa import deletion
+from qa.models import Question, Answer, QuestionLikes, Notification, UserProfile
+
+
+class SoftDeleteVisibilityTest(TestCase):
+    """A deleted question and its answers must be gone everywhere before they are purged."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.joe = User.objects.create(username='joe')
+        cls.kept = Question.objects.create(title='Kept question', author=cls.joe)
+        cls.deleted = Question.objects.create(title='Deleted question', author=cls.joe, rating=5)
+        Answer.objects.create(text='Kept answer', question=cls.kept, author=cls.joe)
+        Answer.objects.create(text='Deleted answer', question=cls.deleted, author=cls.joe)
+        QuestionLikes.objects.create(question=cls.deleted, user=cls.joe, is_liked=True)
+        deletion.delete_question(cls.deleted)
+
+    def test_managers(self):
+        self.assertEqual(list(Question.objects.all()), [self.kept])
+        self.assertEqual(Question.all_objects.count(), 2)
+        self.assertEqual([answer.text for answer in Answer.objects.visible()], ['Kept answer'])
+        self.assertTrue(Question.all_objects.get(pk=self.deleted.pk).deleted_at)
+
+    def test_pages(self):
+        for url in (reverse('new_questions'), reverse('popular')):
+            response = self.client.get(url)
+            self.assertContains(response, 'Kept question')
+            self.assertNotContains(response, 'Deleted question')
+        self.assertEqual(self.client.get(self.deleted.get_absolute_url()).status_code, 404)
+        self.assertEqual(self.client.get(reverse('more_answers', kwargs={'id': self.deleted.pk})).status_code, 404)
+
+    def test_api(self):
+        for name, kwargs in [('api_questions', {}), ('api_popular_questions', {}), ('api_answers', {}),
+                             ('api_users_questions', {'user_id': self.joe.pk}),
+                             ('api_users_answers', {'user_id': self.joe.pk})]:
+            content = self.client.get(reverse(name, kwargs=kwargs)).content.decode()
+            self.assertNotIn('Deleted', content, name)
+            self.assertIn('Kept', content, name)
+        url = reverse('api_answers_to_question', kwargs={'question_id': self.deleted.pk})
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.assertEqual(self.client.get(reverse('api_question_likes', kwargs={'user_id': self.joe.pk})).json(), [])
+
+    def test_profile(self):
+        recent = self.client.get(reverse('api_user_profile', kwargs={'user_id': self.joe.pk})).json()['recent']
+        self.assertEqual([item['title'] for item in recent['questions']], ['Kept question'])
+        self.assertEqual([item['text'] for item in recent['answers']], ['Kept answer'])
+        self.assertEqual(recent['votes'], [])
+
+    def test_cannot_vote_or_answer(self):
+        self.client.force_login(self.joe)
+        response = self.client.post(reverse('like'), {'question_id': self.deleted.pk, 'operation': 'Like'})
+        self.assertEqual(response.status_code, 404)
+        response = self.client.post(self.deleted.get_absolute_url(), {'text': 'Late answer'})
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(Question.all_objects.get(pk=self.deleted.pk).rating, 5)
+
+
+class PurgeTest(TestCase):
+
+    def setUp(self):
+        self.author = User.objects.create(username='author')
+        self.users = [User.objects.create(username=f'user{num}') for num in range(5)]
+        self.question = Question.objects.create(title='Question', author=self.author)
+        for user in self.users:
+            Answer.objects.create(text='Answer', question=self.question, author=user)
+            QuestionLikes.objects.create(question=self.question, user=user, is_liked=True)
+        UserProfile.objects.add('answer_count', {user.pk: 1 for user in self.users})
+        UserProfile.objects.add('vote_count', {user.pk: 1 for user in self.users})
+        Notification.objects.create(user=self.author, question=self.question, kind=Notification.ANSWER, count=5)
+        UserProfile.objects.add('unread_notifications', {self.author.pk: 5})
+
+    def test_request_doesnt_touch_the_children(self):
+        self.client.force_login(self.author)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(reverse('delete_question', kwargs={'question_id': self.question.pk}))
+        self.assertFalse([query for query in queries if query['sql'].startswith('DELETE')])
+        self.assertEqual(Answer.objects.count(), 5)
+
+    def test_purge_in_batches(self):
+        deletion.delete_question(self.question)
+        out = StringIO()
+        with CaptureQueriesContext(connection) as queries:
+            call_command('purge_deleted_questions', batch_size=2, stdout=out)
+        deletes = [query['sql'].split()[2] for query in queries if query['sql'].startswith('DELETE')]
+        # 3 batches and the cascade of the question, which finds nothing left by then (the answers
+        # have attachments to cascade to, so it selects them before deleting)
+        self.assertEqual(deletes.count('"qa_answer"'), 3)
+        self.assertEqual(deletes.count('"qa_questionlikes"'), 4)
+        self.assertIn('Purged 1 questions', out.getvalue())
+        self.assertFalse(Question.all_objects.exists())
+        self.assertFalse(Answer.objects.exists() or QuestionLikes.objects.exists() or Notification.objects.exists())
+        self.assertFalse(UserProfile.objects.exclude(answer_count=0, vote_count=0, unread_notifications=0).exists())
+
+    def test_purge_skips_questions_which_are_not_deleted(self):
+        deletion.purge(self.question.pk)
+        self.assertTrue(Question.objects.filter(pk=self.question.pk).exists())
+        self.assertEqual(Answer.objects.count(), 5)
@@ -0,0 +1,52 @@
+from datetime import datetime, timezone
+from unittest import skipIf
+
+from django.test import TestCase
+from django.contrib.auth.models import User
+from django.urls import reverse
+from rest_framework.renderers import JSONRenderer
+
+from qa import fastjson
+from qa.ajax import HttpResponseAjax
+from qa.api import QuestionSerializer
+from qa.models import Question
+from qa.renderers import FastJSONRenderer
+
+
+class DumpsTest(TestCase):
+
+    data = {'status': 'ok', 'message': 'Вопрос', 'count': 3, 'items': [1, 2.5, None, True],
+            'at': datetime(2021, 5, 1, 12, 30, tzinfo=timezone.utc)}
+
+    def test_output_is_compact_utf8(self):
+        self.assertEqual(
+            fastjson._stdlib_dumps(self.data),
+            '{"status":"ok","message":"Вопрос","count":3,"items":[1,2.5,null,true],'
+            '"at":"2021-05-01T12:30:00Z"}'.encode()
+        )
+
+    @skipIf(fastjson.orjson is None, 'orjson is not installed')
+    def test_orjson_and_stdlib_give_the_same_output(self):
+        self.assertEqual(fastjson._orjson_dumps(self.data), fastjson._stdlib_dumps(self.data))
+
+    def test_ajax_response(self):
+        response = HttpResponseAjax(message='Your rating is accepted')
+        self.assertEqual(response.content, b'{"message":"Your rating is accepted","status":"ok"}')
+        self.assertEqual(response['Content-Type'], 'application/json')
+
+
+class FastJSONRendererTest(TestCase):
+
+    def setUp(self):
+        user = User.objects.create(username='joe', email='a@b.com')
+        for question_num in range(5):
+            Question.objects.create(title=f'Question {question_num} ', text='Текст', author=user)
+
+    def test_output_is_identical_to_the_drf_renderer(self):
+        data = QuestionSerializer(Question.objects.all(), many=True).data
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_api_uses_the_fast_renderer(self):
+        response = self.client.get(reverse('api_questions'))
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(response.content, JSONRenderer().render(response.data))
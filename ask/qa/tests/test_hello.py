@@ -0,0 +1,56 @@
+import json
+import os
+import sys
+from wsgiref.util import setup_testing_defaults
+
+from django.test import SimpleTestCase
+
+# hello.py is next to the Django project, not in it
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+import hello  # noqa: E402
+
+
+class HelloTest(SimpleTestCase):
+
+    def get(self, path='/hello/', query='', accept=None):
+        environ = {'PATH_INFO': path, 'QUERY_STRING': query}
+        if accept:
+            environ['HTTP_ACCEPT'] = accept
+        setup_testing_defaults(environ)
+        started = []
+
+        def start_response(status, headers, exc_info=None):
+            started.append((status, headers))
+        body = b''.join(hello.app(environ, start_response))
+        status, headers = started[0]
+        self.assertEqual(status, '200 OK')
+        headers = dict(headers)
+        self.assertEqual(headers['Content-Length'], str(len(body)))
+        return headers, body
+
+    def test_health(self):
+        headers, body = self.get('/hello/health')
+        self.assertEqual(body, b'ok\n')
+        self.assertEqual(headers['Cache-Control'], 'no-store')
+
+    def test_text(self):
+        headers, body = self.get(query='a=1&b=x%20y&c=%D1%8F&a=2&b=p+q&empty=')
+        self.assertEqual(headers['Content-Type'], 'text/plain; charset=utf-8')
+        self.assertEqual(body.decode(), 'a=1\nb=x y\nc=я\na=2\nb=p q\nempty=')
+        self.assertEqual(self.get()[1], b'')
+
+    def test_json(self):
+        headers, body = self.get(query='a=1&b=x%20y&c=%D1%8F&a=2', accept='application/json')
+        self.assertEqual(headers['Content-Type'], 'application/json')
+        self.assertEqual(json.loads(body), [['a', '1'], ['b', 'x y'], ['c', 'я'], ['a', '2']])
+        self.assertEqual(self.get(accept='text/html, application/json')[1], b'[]')
+
+    def test_every_response_has_its_own_headers(self):
+        for path, query, accept in [('/hello/health', '', None), ('/hello/', '', None),
+                                    ('/hello/', '', 'application/json')]:
+            environ = {'PATH_INFO': path, 'QUERY_STRING': query, 'HTTP_ACCEPT': accept or ''}
+            lists = []
+            for _ in range(2):
+                hello.app(environ, lambda status, headers, exc_info=None: lists.append(headers))
+            lists[0].append(('X-Added', 'by a middleware'))
+            self.assertNotIn(('X-Added', 'by a middleware'), lists[1])
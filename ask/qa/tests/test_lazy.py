@@ -0,0 +1,51 @@
+import copy
+import pickle
+
+from django.test import TestCase
+from django.urls import resolve, reverse
+
+from qa import api_urls
+from qa.lazy import LazyView, load_views
+from qa.views import question_list_new
+
+
+class LazyViewTest(TestCase):
+
+    def test_view_isnt_imported_until_needed(self):
+        view = LazyView('qa.views.question_list_new')
+        self.assertIsNone(view._view)
+        self.assertEqual(view.__name__, 'question_list_new')
+        self.assertEqual(view.__module__, 'qa.views')
+        self.assertEqual(view.__qualname__, 'question_list_new')
+        self.assertIsNone(view._view)
+
+    def test_lazy_view_is_equal_to_its_view(self):
+        self.assertEqual(LazyView('qa.views.question_list_new'), question_list_new)
+        self.assertEqual(LazyView('qa.views.question_list_new'), LazyView('qa.views.question_list_new'))
+        self.assertNotEqual(LazyView('qa.views.question_list_new'), LazyView('qa.views.ask_add'))
+
+    def test_class_based_view_keeps_its_attributes(self):
+        view = resolve(reverse('api_questions')).func
+        self.assertTrue(view.csrf_exempt)
+
+    def test_copies_and_missing_attributes(self):
+        view = LazyView('qa.views.question_list_new')
+        copied = copy.copy(view)
+        self.assertEqual(copied, view)
+        self.assertEqual(pickle.loads(pickle.dumps(view)), view)
+        with self.assertRaises(AttributeError):
+            view._missing
+        self.assertIsNone(view._view)
+        with self.assertRaises(AttributeError):
+            view.missing
+
+    def test_resolver_match_uses_the_view_path(self):
+        self.assertEqual(resolve(reverse('api_questions'))._func_path, 'qa.api.QuestionsListView')
+
+    def test_lazy_views_serve_requests(self):
+        self.assertEqual(self.client.get(reverse('new_questions')).status_code, 200)
+        self.assertEqual(self.client.get(reverse('api_questions')).status_code, 200)
+
+    def test_load_views(self):
+        self.assertEqual(load_views('ask.urls_api'), len(api_urls.urlpatterns))
+        self.assertTrue(all(pattern.callback._view for pattern in api_urls.urlpatterns))
@@ -0,0 +1,115 @@
+import json
+from io import StringIO
+
+from django.core import mail
+from django.core.management import call_command
+from django.test import TestCase
+from django.contrib.auth.models import User
+from django.urls import reverse
+
+from qa import tasks
+from qa.conditional import FEED
+from qa.models import Question, Notification, UserProfile, ContentVersion
+
+
+class NotificationTest(TestCase):
+
+    def setUp(self):
+        self.author = User.objects.create(username='author', email='author@example.com')
+        self.others = [User.objects.create(username=f'user{num}') for num in range(3)]
+        self.question = Question.objects.create(title='Question', author=self.author)
+        self.second = Question.objects.create(title='Second', author=self.author)
+
+    def answer(self, user, question=None):
+        self.client.force_login(user)
+        self.client.post((question or self.question).get_absolute_url(), {'text': 'Answer'})
+
+    def unread(self):
+        return UserProfile.objects.get(user=self.author).unread_notifications
+
+    def test_answers_are_coalesced_per_question(self):
+        for user in self.others:
+            self.answer(user)
+        self.answer(self.others[0], self.second)
+        self.assertFalse(Notification.objects.exists())  # fanned out in the background
+
+        tasks.work(once=True)
+        counts = dict(Notification.objects.filter(user=self.author).values_list('question__title', 'count'))
+        self.assertEqual(counts, {'Question': 3, 'Second': 1})
+        self.assertEqual(self.unread(), 4)
+
+        self.answer(self.others[1])
+        tasks.work(once=True)
+        self.assertEqual(Notification.objects.get(question=self.question).count, 4)
+        self.assertEqual(self.unread(), 5)
+
+    def test_own_answers_dont_notify(self):
+        self.answer(self.author)
+        tasks.work(once=True)
+        self.assertFalse(Notification.objects.exists())
+
+    def test_votes_notify(self):
+        self.client.force_login(self.others[0])
+        votes = [{'question_id': self.question.id, 'operation': 'Like'},
+                 {'question_id': self.second.id, 'operation': 'Dislike'}]
+        self.client.post(reverse('like_batch'), json.dumps({'votes': votes}), content_type='application/json')
+        self.client.post(reverse('like'), {'question_id': self.question.id, 'operation': 'Like'})
+        tasks.work(once=True)
+        counts = dict(Notification.objects.filter(kind=Notification.VOTE).values_list('question__title', 'count'))
+        self.assertEqual(counts, {'Question': 2, 'Second': 1})
+
+    def test_badge_and_reading(self):
+        self.answer(self.others[0])
+        self.answer(self.others[1])
+        tasks.work(once=True)
+        self.client.force_login(self.author)
+        self.assertContains(self.client.get(reverse('new_questions')), 'Notifications (2)')
+
+        response = self.client.get(reverse('notifications'))
+        self.assertContains(response, '2 new answers')
+        self.assertEqual(self.unread(), 2)
+        until = response.context['items'][0].updated_at.isoformat()
+        # an answer after the page was shown stays unread
+        self.answer(self.others[2], self.second)
+        tasks.work(once=True)
+        self.client.force_login(self.author)
+        response = self.client.post(reverse('notifications'), {'until': until})
+        self.assertRedirects(response, reverse('notifications'))
+        self.assertEqual(list(Notification.objects.values_list('question__title', flat=True)), ['Second'])
+        self.assertEqual(self.unread(), 1)
+        self.assertContains(self.client.get(reverse('new_questions')), 'Notifications (1)')
+        self.assertEqual(self.client.post(reverse('notifications'), {'until': 'x'}).status_code, 404)
+
+    def test_badge_changes_the_etag_not_the_feed(self):
+        self.answer(self.others[0])
+        self.client.force_login(self.author)
+        response = self.client.get(reverse('new_questions'))
+        self.assertNotContains(response, 'Notifications (')
+        version = ContentVersion.objects.current(FEED)
+        tasks.work(once=True)
+        self.assertEqual(ContentVersion.objects.current(FEED), version)
+        response = self.client.get(reverse('new_questions'), HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertContains(response, 'Notifications (1)')
+        self.assertEqual(self.client.get(reverse('new_questions'), HTTP_IF_NONE_MATCH=response['ETag']).status_code,
+                         304)
+
+    def test_badge_doesnt_query_for_anonymous(self):
+        with self.assertNumQueries(0):
+            self.client.get(reverse('login'))
+
+    def test_digest_is_sent_once(self):
+        for user in self.others:
+            self.answer(user)
+        tasks.work(once=True)
+        call_command('send_digests', stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['author@example.com'])
+        self.assertIn('Question: 3 new answers', mail.outbox[0].body)
+        self.assertIn(self.question.get_absolute_url(), mail.outbox[0].body)
+
+        call_command('send_digests', stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 1)
+        self.answer(self.others[0])
+        tasks.work(once=True)
+        call_command('send_digests', stdout=StringIO())
+        self.assertIn('Question: 4 new answers', mail.outbox[1].body)
@@ -0,0 +1,67 @@
+from unittest.mock import patch
+
+from django.test import TestCase, override_settings
+from django.contrib.auth.models import User
+from django.urls import reverse
+
+from qa import tasks
+from qa.models import Question, Task
+
+
+class CacheControlTest(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(username='joe')
+        self.question = Question.objects.create(title='Question', author=self.user)
+
+    def test_anonymous_pages_are_public(self):
+        for url in (reverse('new_questions'), reverse('popular'), self.question.get_absolute_url(),
+                    reverse('api_questions')):
+            response = self.client.get(url)
+            self.assertIn('public', response['Cache-Control'])
+            self.assertIn('max-age=10', response['Cache-Control'])
+            self.assertIn('Cookie', response['Vary'])
+
+    def test_anonymous_question_page_doesnt_set_cookies(self):
+        response = self.client.get(self.question.get_absolute_url())
+        self.assertFalse(response.cookies)
+        self.assertContains(response, 'to answer this question')
+
+    def test_pages_of_logged_in_users_are_private(self):
+        self.client.force_login(self.user)
+        for url in (reverse('new_questions'), self.question.get_absolute_url(), reverse('api_questions')):
+            response = self.client.get(url)
+            self.assertIn('private', response['Cache-Control'])
+            self.assertNotIn('public', response['Cache-Control'])
+
+
+class PurgeTest(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(username='joe')
+        self.question = Question.objects.create(title='Question', author=self.user)
+        self.client.force_login(self.user)
+
+    @patch('qa.conditional.purge')
+    def test_new_answer_purges_the_feeds_and_the_question(self, purge):
+        self.client.post(self.question.get_absolute_url(), data={'text': 'A new answer'})
+        paths = purge.call_args[0][0]
+        self.assertIn('/', paths)
+        self.assertIn(self.question.get_absolute_url(), paths)
+
+    @override_settings(PROXY_CACHE_PURGE_URL='http://127.0.0.1:8081')
+    @patch('qa.proxy_cache.urlopen')
+    def test_purge_requests_are_queued_and_merged(self, urlopen):
+        self.client.post(reverse('like'), data={'question_id': self.question.id, 'operation': 'Like'})
+        self.client.post(reverse('like'), data={'question_id': self.question.id, 'operation': 'Like'})
+        urlopen.assert_not_called()
+        self.assertEqual(Task.objects.filter(name='qa.proxy_cache.refresh_paths').count(), 2)
+
+        tasks.work(once=True)
+        urls = [call[0][0].full_url for call in urlopen.call_args_list]
+        self.assertEqual(sorted(urls), sorted(set(urls)))
+        self.assertIn('http://127.0.0.1:8081' + self.question.get_absolute_url(), urls)
+
+    def test_without_purge_url_nothing_is_purged(self):
+        self.client.post(reverse('like'), data={'question_id': self.question.id, 'operation': 'Like'})
+        self.assertFalse(Task.objects.filter(name='qa.proxy_cache.refresh_paths').exists())
@@ -0,0 +1,129 @@
+import json
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.contrib.auth.models import User
+from django.urls import reverse
+
+from qa import ratelimit
+from qa.models import Question
+
+LIMITS = {'vote': '2/m', 'ask': '2/m', 'answer': '2/m', 'delete': '2/m', 'signup': '2/h',
+          'login': '3/m', 'login_username': '2/h', 'api': '2/m'}
+
+
+class TokenBucketTest(SimpleTestCase):
+
+    def test_local_bucket(self):
+        bucket = ratelimit.LocalBackend()
+        self.assertEqual([bucket.take('key', 2, 1.0, 100.0)[0] for _ in range(3)], [True, True, False])
+        self.assertTrue(bucket.take('other', 2, 1.0, 100.0)[0])
+        self.assertFalse(bucket.take('key', 2, 1.0, 100.5)[0])
+        self.assertTrue(bucket.take('key', 2, 1.0, 101.5)[0])
+
+    def test_full_buckets_are_forgotten(self):
+        bucket = ratelimit.LocalBackend()
+        bucket.max_keys = 2
+        bucket.take('old', 2, 1.0, 100.0)
+        bucket.take('busy', 2, 1.0, 109.5)
+        bucket.take('busy', 2, 1.0, 109.5)
+        bucket.take('new', 2, 1.0, 110.0)
+        self.assertEqual(sorted(bucket.buckets), ['busy', 'new'])
+
+    def test_buckets_are_full_at_the_rate_of_their_limit(self):
+        bucket = ratelimit.LocalBackend()
+        bucket.take('slow', 2, 0.02, 100.0)
+        bucket.take('fast', 2, 1.0, 100.0)
+        bucket.take('other', 2, 1.0, 120.0)
+        self.assertEqual(list(bucket.buckets), ['slow', 'fast', 'other'])
+        bucket.take('other', 2, 1.0, 150.0)
+        self.assertEqual(list(bucket.buckets), ['other'])
+
+    def test_least_recently_used_buckets_are_dropped(self):
+        bucket = ratelimit.LocalBackend()
+        bucket.max_keys = 2
+        for key in ('one', 'two', 'one', 'three'):
+            bucket.take(key, 2, 1.0, 100.0)
+        self.assertEqual(list(bucket.buckets), ['one', 'three'])
+        # the dropped bucket starts over full
+        self.assertEqual(bucket.take('two', 2, 1.0, 100.0), (True, 1))
+
+    def test_parse_rate(self):
+        self.assertEqual(ratelimit.parse_rate('60/m'), (60, 1.0))
+        self.assertEqual(ratelimit.parse_rate('5/hour'), (5, 5 / 3600))
+
+
+@override_settings(RATELIMIT_ENABLED=True, RATELIMIT_BACKEND='local', RATELIMITS=LIMITS)
+class RateLimitViewsTest(TestCase):
+
+    def setUp(self):
+        ratelimit.backend().reset()
+        self.joe = User.objects.create(username='joe')
+        self.question = Question.objects.create(title='Question')
+
+    def vote(self, **extra):
+        return self.client.post(reverse('like'), {'question_id': self.question.id, 'operation': 'Like'},
+                                HTTP_X_REQUESTED_WITH='XMLHttpRequest', **extra)
+
+    def test_votes_per_user(self):
+        self.client.force_login(self.joe)
+        self.assertEqual([self.vote().status_code for _ in range(3)], [200, 200, 429])
+        response = self.vote()
+        self.assertEqual(response.json()['code'], 'rate_limited')
+        self.assertGreaterEqual(int(response['Retry-After']), 30)
+
+        self.client.force_login(User.objects.create(username='bob'))
+        self.assertEqual(self.vote().status_code, 200)
+
+    def vote_batch(self, count):
+        body = {'votes': [{'question_id': self.question.id, 'operation': 'Like'}] * count}
+        return self.client.post(reverse('like_batch'), json.dumps(body), content_type='application/json',
+                                HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+
+    def test_batch_takes_a_token_per_vote(self):
+        self.client.force_login(self.joe)
+        self.assertEqual(self.vote_batch(2).status_code, 200)
+        self.assertEqual(self.vote().status_code, 429)
+        self.assertEqual(self.vote_batch(1).status_code, 429)
+
+        self.client.force_login(User.objects.create(username='bob'))
+        response = self.vote_batch(3)
+        self.assertEqual(response.json()['code'], 'bad_params')
+        self.assertEqual([self.vote_batch(1).status_code for _ in range(3)], [200, 200, 429])
+
+    @override_settings(RATELIMIT_BACKEND='cache')
+    def test_shared_cache_backend(self):
+        cache.clear()
+        self.client.force_login(self.joe)
+        self.assertEqual([self.vote().status_code for _ in range(3)], [200, 200, 429])
+
+    def test_anonymous_clients_per_ip(self):
+        url = reverse('ask')
+        statuses = [self.client.post(url, {'title': '', 'text': ''}, HTTP_X_REAL_IP='10.0.0.1').status_code
+                    for _ in range(3)]
+        self.assertEqual(statuses, [200, 200, 429])
+        self.assertEqual(self.client.post(url, {}, HTTP_X_REAL_IP='10.0.0.2').status_code, 200)
+
+    def test_reads_are_not_limited(self):
+        for _ in range(5):
+            self.assertEqual(self.client.get(reverse('ask')).status_code, 200)
+
+    def test_login_guessing_is_limited_per_username(self):
+        statuses = [
+            self.client.post(reverse('login'), {'username': 'joe', 'password': 'guess'},
+                             HTTP_X_REAL_IP=f'10.0.0.{num}').status_code
+            for num in range(3)
+        ]
+        self.assertEqual(statuses, [200, 200, 429])
+        response = self.client.post(reverse('login'), {'username': 'bob', 'password': 'guess'},
+                                    HTTP_X_REAL_IP='10.0.0.9')
+        self.assertEqual(response.status_code, 200)
+
+    def test_api_throttle(self):
+        statuses = [self.client.get(reverse('api_questions')).status_code for _ in range(3)]
+        self.assertEqual(statuses, [200, 200, 429])
+
+    @override_settings(RATELIMIT_ENABLED=False)
+    def test_disabled(self):
+        self.client.force_login(self.joe)
+        self.assertEqual([self.vote().status_code for _ in range(3)], [200, 200, 200])
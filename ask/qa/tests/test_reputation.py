@@ -0,0 +1,75 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.contrib.auth.models import User
+from django.urls import reverse
+
+from qa import reputation
+from qa.models import Question, QuestionLikes, UserProfile
+
+
+class ReputationTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.authors = [User.objects.create(username=f'author{num}') for num in range(3)]
+        self.voters = [User.objects.create(username=f'voter{num}') for num in range(3)]
+        self.questions = [Question.objects.create(title=f'Question {num}', author=author)
+                          for num, author in enumerate(self.authors)]
+
+    def vote(self, voter, question, operation):
+        self.client.force_login(voter)
+        self.client.post(reverse('like'), {'question_id': question.id, 'operation': operation})
+
+    def reputations(self):
+        return [UserProfile.objects.get(user=author).reputation for author in self.authors]
+
+    def test_votes_credit_and_debit_the_author(self):
+        self.vote(self.voters[0], self.questions[0], 'Like')
+        self.vote(self.voters[1], self.questions[0], 'Like')
+        self.vote(self.voters[0], self.questions[1], 'Dislike')
+        self.vote(self.voters[0], self.questions[2], 'Like')
+        self.vote(self.voters[0], self.questions[2], 'Dislike')
+        self.assertEqual(self.reputations(), [2, -1, -1])
+
+    def test_leaderboard_is_ordered_and_cached(self):
+        reputation.credit({self.authors[0].id: 1, self.authors[1].id: 5, self.authors[2].id: 1})
+        page = reputation.leaderboard_page(1)
+        self.assertEqual([row[2] for row in page], ['author1', 'author0', 'author2'])
+        self.assertEqual([row[0] for row in page], [1, 2, 3])
+        with self.assertNumQueries(0):
+            self.assertEqual(reputation.leaderboard_page(1), page)
+
+    @override_settings(LEADERBOARD_SIZE=5, LEADERBOARD_PAGE_SIZE=2)
+    def test_leaderboard_is_limited_to_top_k(self):
+        reputation.credit({user.id: num for num, user in enumerate(self.authors + self.voters, 1)})
+        self.assertEqual([row[0] for row in reputation.leaderboard_page(3)], [5])
+        self.assertEqual(list(reputation.leaderboard_pages()), [1, 2, 3])
+        with self.assertRaises(ValueError):
+            reputation.leaderboard_page(4)
+
+    def test_leaderboard_page_and_api(self):
+        reputation.credit({self.authors[2].id: 3})
+        response = self.client.get(reverse('leaderboard'))
+        self.assertContains(response, 'author2 (3)')
+        self.assertEqual(self.client.get(reverse('leaderboard') + '?page=100').status_code, 404)
+        response = self.client.get(reverse('api_leaderboard'))
+        self.assertEqual(response.json()[0], {'rank': 1, 'user_id': self.authors[2].id, 'username': 'author2',
+                                              'reputation': 3})
+        self.assertEqual(self.client.get(reverse('api_leaderboard') + '?page=x').status_code, 404)
+
+    def test_rebuild_recomputes_from_the_votes(self):
+        for voter in self.voters:
+            QuestionLikes.objects.create(question=self.questions[0], user=voter, is_liked=True)
+        QuestionLikes.objects.create(question=self.questions[1], user=self.voters[0], is_liked=False)
+        reputation.credit({self.authors[2].id: 7})
+        reputation.leaderboard_page(1)
+
+        out = StringIO()
+        call_command('rebuild_reputation', batch_size=2, stdout=out)
+        self.assertEqual(self.reputations(), [3, -1, 0])
+        self.assertEqual(UserProfile.objects.count(), 6)
+        self.assertIn('Reputation of 6 users rebuilt', out.getvalue())
+        self.assertEqual(reputation.leaderboard_page(1)[0][2], 'author0')
@@ -0,0 +1,79 @@
+from django.db import transaction
+from django.test import SimpleTestCase, TestCase, RequestFactory, override_settings
+from django.http import HttpResponse
+
+from qa.models import Question
+from qa.routers import PrimaryReplicaRouter, pin_to_primary, unpin, is_pinned
+from qa.middleware import ReplicaPinMiddleware
+
+
+@override_settings(DATABASE_REPLICAS=['replica_0', 'replica_1'])
+class PrimaryReplicaRouterTest(SimpleTestCase):
+    # not a TestCase, its transaction around each test would send the reads to the primary
+    databases = {'default'}
+
+    def setUp(self):
+        self.router = PrimaryReplicaRouter()
+
+    def tearDown(self):
+        unpin()
+
+    def test_reads_go_to_replicas(self):
+        for _ in range(10):
+            self.assertIn(self.router.db_for_read(Question), ['replica_0', 'replica_1'])
+
+    def test_writes_go_to_primary(self):
+        self.assertEqual(self.router.db_for_write(Question), 'default')
+
+    def test_pinned_reads_go_to_primary(self):
+        pin_to_primary()
+        self.assertEqual(self.router.db_for_read(Question), 'default')
+        unpin()
+        self.assertNotEqual(self.router.db_for_read(Question), 'default')
+
+    def test_reads_in_a_transaction_go_to_primary(self):
+        with transaction.atomic():
+            self.assertEqual(self.router.db_for_read(Question), 'default')
+        self.assertNotEqual(self.router.db_for_read(Question), 'default')
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_without_replicas_reads_go_to_primary(self):
+        self.assertEqual(self.router.db_for_read(Question), 'default')
+
+
+class ReplicaPinMiddlewareTest(TestCase):
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.pinned = None
+
+        def view(request):
+            self.pinned = is_pinned()
+            return HttpResponse()
+        self.middleware = ReplicaPinMiddleware(view)
+
+    def test_get_request_is_not_pinned(self):
+        self.middleware(self.factory.get('/'))
+        self.assertFalse(self.pinned)
+        self.assertFalse(is_pinned())
+
+    def test_post_request_is_pinned(self):
+        self.middleware(self.factory.post('/'))
+        self.assertTrue(self.pinned)
+        self.assertFalse(is_pinned())
+
+    @override_settings(DATABASE_REPLICAS=['replica_0'])
+    def test_post_request_sets_the_pin_cookie(self):
+        response = self.middleware(self.factory.post('/'))
+        cookie = response.cookies['pin_primary']
+        self.assertEqual(cookie['max-age'], 5)
+
+    def test_without_replicas_the_pin_cookie_isnt_set(self):
+        response = self.middleware(self.factory.post('/'))
+        self.assertNotIn('pin_primary', response.cookies)
+
+    def test_get_request_with_the_pin_cookie_is_pinned(self):
+        request = self.factory.get('/')
+        request.COOKIES['pin_primary'] = '1'
+        self.middleware(request)
+        self.assertTrue(self.pinned)
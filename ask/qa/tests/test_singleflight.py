@@ -0,0 +1,109 @@
+import threading
+import time
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from qa import singleflight
+from qa.conditional import content_changed
+from qa.models import Question
+
+CLIENTS = 100
+
+
+class SingleFlightTest(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.calls = 0
+
+    def compute(self):
+        self.calls += 1
+        time.sleep(0.05)
+        return f'value {self.calls}'
+
+    def in_parallel(self, func):
+        barrier = threading.Barrier(CLIENTS)
+        results = []
+
+        def client():
+            barrier.wait()
+            results.append(func())
+        threads = [threading.Thread(target=client) for _ in range(CLIENTS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def expire(self, key):
+        value, delta, _ = cache.get(key)
+        cache.set(key, (value, delta, time.time() - 1))
+
+    def test_one_computation_per_miss(self):
+        results = self.in_parallel(lambda: singleflight.cached('key', self.compute, 60))
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(results, ['value 1'] * CLIENTS)
+        self.assertEqual(singleflight.cached('key', self.compute, 60), 'value 1')
+        self.assertEqual(self.calls, 1)
+
+    def test_one_computation_per_expiry_serving_the_stale_value(self):
+        singleflight.cached('key', self.compute, 60)
+        self.expire('key')
+        results = self.in_parallel(lambda: singleflight.cached('key', self.compute, 60))
+        self.assertEqual(self.calls, 2)
+        self.assertIn('value 1', results)
+        self.assertEqual(set(results), {'value 1', 'value 2'})
+        self.assertEqual(singleflight.cached('key', self.compute, 60), 'value 2')
+
+    def test_another_process_computing(self):
+        singleflight.cached('key', self.compute, 60)
+        self.expire('key')
+        cache.add('singleflight:key', 1)
+        self.assertEqual(singleflight.cached('key', self.compute, 60), 'value 1')
+        self.assertEqual(self.calls, 1)
+
+    def test_waits_for_another_process_on_a_miss(self):
+        cache.add('singleflight:key', 1)
+        threading.Timer(0.05, lambda: cache.set('key', ('computed elsewhere', 0.01, time.time() + 60))).start()
+        self.assertEqual(singleflight.cached('key', self.compute, 60), 'computed elsewhere')
+        self.assertEqual(self.calls, 0)
+
+    def test_early_refresh(self):
+        singleflight.cached('key', self.compute, 1)
+        with patch('qa.singleflight.random.random', return_value=0.0):
+            self.assertEqual(singleflight.cached('key', self.compute, 1), 'value 1')
+        # the computation took 50ms, an unlikely draw refreshes it a second ahead of the expiry
+        with patch('qa.singleflight.random.random', return_value=1 - 1e-12):
+            self.assertEqual(singleflight.cached('key', self.compute, 1), 'value 2')
+
+    def test_failed_computation_is_not_cached(self):
+        def fail():
+            raise ValueError('database is down')
+        with self.assertRaises(ValueError):
+            singleflight.cached('key', fail, 60)
+        self.assertEqual(singleflight.cached('key', self.compute, 60), 'value 1')
+
+
+class FeedStampedeTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        Question.objects.bulk_create(Question(title=f'Question {num}') for num in range(20))
+        content_changed()
+
+    def test_expired_feed_is_served_stale_while_recomputed(self):
+        self.client.get(reverse('new_questions'))
+        with CaptureQueriesContext(connection) as hit:
+            self.client.get(reverse('new_questions'))
+        # the list and the count expired, another worker is recomputing them
+        with patch.object(singleflight, '_expired', return_value=True), \
+                patch.object(singleflight.cache, 'add', return_value=False), \
+                CaptureQueriesContext(connection) as expired:
+            response = self.client.get(reverse('new_questions'))
+        self.assertContains(response, 'Question 19')
+        self.assertEqual(len(expired), len(hit))
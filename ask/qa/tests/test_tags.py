@@ -0,0 +1,128 @@
+from datetime import datetime, timedelta, timezone
+
+from django.core.cache import cache
+from django.test import TestCase, SimpleTestCase, override_settings
+from django.contrib.auth.models import User
+from django.urls import reverse
+
+from qa import deletion, tags
+from qa.forms import AskForm
+from qa.models import Question, QuestionTag, Tag
+
+
+class ParseTagsTest(SimpleTestCase):
+
+    def test_names_are_lowercased_and_deduplicated(self):
+        self.assertEqual(tags.parse(' Python,django  python c++ '), ['python', 'django', 'c++'])
+        self.assertEqual(tags.parse(''), [])
+
+    def test_invalid_input(self):
+        with self.assertRaises(ValueError):
+            tags.parse('a b c d e f')
+        with self.assertRaises(ValueError):
+            tags.parse('<script>')
+        self.assertFalse(AskForm({'title': 'Title', 'text': 'Text', 'tags': 'a/b'}).is_valid())
+
+
+class TagTrieTest(SimpleTestCase):
+
+    def test_completions_are_the_most_used_first(self):
+        trie = tags.TagTrie([('python', 5), ('pandas', 9), ('php', 1), ('perl', 5), ('django', 3)], size=3)
+        self.assertEqual(trie.complete('p'), [('pandas', 9), ('perl', 5), ('python', 5)])
+        self.assertEqual(trie.complete('py'), [('python', 5)])
+        self.assertEqual(trie.complete('python'), [('python', 5)])
+        self.assertEqual(trie.complete('pythons'), [])
+        self.assertEqual(trie.complete('x'), [])
+
+
+class TagsTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        tags._trie = None
+        self.joe = User.objects.create(username='joe')
+        self.client.force_login(self.joe)
+
+    def ask(self, title, tag_input, added_at=None):
+        self.client.post(reverse('ask'), {'title': title, 'text': 'Text', 'tags': tag_input})
+        question = Question.objects.get(title=title)
+        if added_at:
+            Question.objects.filter(pk=question.pk).update(added_at=added_at)
+            QuestionTag.objects.filter(question=question).update(added_at=added_at)
+        return question
+
+    def counts(self):
+        return dict(Tag.objects.values_list('name', 'question_count'))
+
+    def test_asking_tags_the_question(self):
+        question = self.ask('First', 'python django')
+        self.ask('Second', 'Python')
+        self.assertEqual(self.counts(), {'python': 2, 'django': 1})
+        self.assertEqual(sorted(question.tags.values_list('name', flat=True)), ['django', 'python'])
+        self.assertContains(self.client.get(question.get_absolute_url()), reverse('tag', kwargs={'name': 'django'}))
+
+    def test_new_feed_pages(self):
+        start = datetime(2021, 1, 1, tzinfo=timezone.utc)
+        # two questions added at the same time, the keyset must not lose either
+        for num, minutes in enumerate([1, 2, 2, 3, 4]):
+            self.ask(f'Question {num}', 'python', start + timedelta(minutes=minutes))
+        self.ask('Other', 'django')
+        tag = Tag.objects.get(name='python')
+        titles, after = [], None
+        while True:
+            questions, after = QuestionTag.objects.feed(tag.pk, after=after, limit=2)
+            titles += [question.title for question in questions]
+            if after is None:
+                break
+        self.assertEqual(titles, ['Question 4', 'Question 3', 'Question 2', 'Question 1', 'Question 0'])
+
+    def test_popular_feed_follows_the_votes(self):
+        first = self.ask('First', 'python')
+        second = self.ask('Second', 'python')
+        voter = User.objects.create(username='voter')
+        self.client.force_login(voter)
+        self.client.post(reverse('like'), {'question_id': first.id, 'operation': 'Like'})
+        self.client.post(reverse('like'), {'question_id': second.id, 'operation': 'Dislike'})
+        tag = Tag.objects.get(name='python')
+        questions, _ = QuestionTag.objects.feed(tag.pk, popular=True)
+        self.assertEqual([question.title for question in questions], ['First', 'Second'])
+
+        response = self.client.get(reverse('api_tag_questions', kwargs={'name': 'python'}) + '?order=popular')
+        self.assertEqual([item['title'] for item in response.json()['results']], ['First', 'Second'])
+
+    def test_deleted_question_leaves_the_tags(self):
+        question = self.ask('First', 'python')
+        self.ask('Second', 'python')
+        deletion.delete_question(question)
+        self.assertEqual(self.counts(), {'python': 1})
+        self.assertNotContains(self.client.get(reverse('tag', kwargs={'name': 'python'})), 'First')
+
+    @override_settings(TAGS_TRIE_CHECK_SECONDS=0)
+    def test_autocomplete_reloads_on_change(self):
+        self.ask('First', 'python pandas')
+        self.ask('Second', 'pandas')
+        response = self.client.get(reverse('tags_autocomplete'), {'q': 'P'})
+        self.assertEqual(response.json()['tags'], [{'name': 'pandas', 'count': 2}, {'name': 'python', 'count': 1}])
+        self.ask('Third', 'pytest')
+        response = self.client.get(reverse('tags_autocomplete'), {'q': 'py'})
+        self.assertEqual([tag['name'] for tag in response.json()['tags']], ['pytest', 'python'])
+
+    @override_settings(TAGS_TRIE_CHECK_SECONDS=60)
+    def test_autocomplete_doesnt_query_between_checks(self):
+        self.ask('First', 'python')
+        tags.autocomplete('p')
+        with self.assertNumQueries(0):
+            self.assertEqual(tags.autocomplete('p'), [('python', 1)])
+
+    def test_pages_and_api(self):
+        self.ask('First', 'c++')
+        response = self.client.get(reverse('tag', kwargs={'name': 'c++'}))
+        self.assertContains(response, 'First')
+        self.assertEqual(self.client.get(reverse('tag', kwargs={'name': 'nothing'})).status_code, 404)
+        self.assertEqual(self.client.get(reverse('tag', kwargs={'name': 'c++'}) + '?after=x').status_code, 404)
+        url = reverse('tag', kwargs={'name': 'c++'}) + '?after=99999999999999999999999-1'
+        self.assertEqual(self.client.get(url).status_code, 404)
+        response = self.client.get(reverse('api_tag_questions', kwargs={'name': 'c++'}))
+        self.assertEqual(response.json()['next'], None)
+        self.assertEqual(self.client.get(reverse('api_tags')).json(), [{'name': 'c++', 'question_count': 1}])
+        self.assertEqual(self.client.get(reverse('api_tag_questions', kwargs={'name': 'x'})).status_code, 404)
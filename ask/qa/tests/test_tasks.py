@@ -0,0 +1,90 @@
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import Mock
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from qa import tasks
+from qa.models import Task
+
+calls = Mock()
+
+
+@tasks.task
+def single(*args):
+    calls.single(*args)
+
+
+@tasks.task(batch=True)
+def merged(batch):
+    calls.merged(batch)
+
+
+class TaskQueueTest(TestCase):
+
+    def setUp(self):
+        calls.reset_mock(side_effect=True)
+
+    def test_enqueue_stores_the_call(self):
+        single.enqueue(1, 'two', {'three': 3})
+        task = Task.objects.get()
+        self.assertEqual((task.name, task.args), ('qa.tests.test_tasks.single', [1, 'two', {'three': 3}]))
+        calls.single.assert_not_called()
+
+    @override_settings(TASKS_EAGER=True)
+    def test_eager_tasks_run_right_away(self):
+        single.enqueue(1)
+        merged.enqueue(2)
+        calls.single.assert_called_once_with(1)
+        calls.merged.assert_called_once_with([[2]])
+        self.assertFalse(Task.objects.exists())
+
+    def test_worker_runs_and_deletes_the_tasks(self):
+        single.enqueue(1)
+        single.enqueue(2)
+        call_command('run_tasks', once=True, stdout=StringIO())
+        self.assertEqual([call.args for call in calls.single.call_args_list], [(1,), (2,)])
+        self.assertFalse(Task.objects.exists())
+
+    def test_batch_task_gets_all_calls_at_once(self):
+        for num in range(5):
+            merged.enqueue(num)
+        self.assertEqual(tasks.run_pending(limit=3), 3)
+        self.assertEqual(tasks.run_pending(limit=3), 2)
+        self.assertEqual([call.args for call in calls.merged.call_args_list], [([[0], [1], [2]],), ([[3], [4]],)])
+
+    @override_settings(TASKS_MAX_ATTEMPTS=2)
+    def test_failed_task_is_retried_later_then_given_up(self):
+        calls.single.side_effect = ValueError('boom')
+        single.enqueue(1)
+        with self.assertLogs('qa.tasks', 'ERROR'):
+            tasks.run_pending()
+        task = Task.objects.get()
+        self.assertEqual(task.attempts, 1)
+        self.assertIn('boom', task.last_error)
+        self.assertGreater(task.run_at, timezone.now())
+        self.assertEqual(tasks.run_pending(), 0)  # not due yet
+
+        Task.objects.update(run_at=timezone.now() - timedelta(seconds=1))
+        with self.assertLogs('qa.tasks', 'ERROR'):
+            tasks.run_pending()
+        self.assertTrue(Task.objects.get().failed)
+        Task.objects.update(run_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(tasks.run_pending(), 0)
+
+    def test_failed_batch_leaves_no_writes(self):
+        def apply_then_fail(batch):
+            Task.objects.create(name='written.by.the.call', args=[])
+            raise ValueError('boom')
+        calls.merged.side_effect = apply_then_fail
+        merged.enqueue(1)
+        with self.assertLogs('qa.tasks', 'ERROR'):
+            tasks.run_pending()
+        self.assertEqual(list(Task.objects.values_list('name', 'attempts')), [('qa.tests.test_tasks.merged', 1)])
+
+    def test_claimed_task_is_leased(self):
+        single.enqueue(1)
+        tasks._claim(10)
+        self.assertEqual(tasks.run_pending(), 0)
@@ -0,0 +1,141 @@
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from concurrent.futures.process import BrokenProcessPool
+from unittest.mock import patch
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from qa import deletion, tasks, thumbnails
+from qa.models import Question, Answer, Attachment, Task
+from qa.thumbnails import Image
+
+
+def image_bytes(size, mode='RGB', color='red'):
+    out = io.BytesIO()
+    Image.new(mode, size, color).save(out, 'PNG')
+    return out.getvalue()
+
+
+@unittest.skipIf(Image is None, 'Pillow is not installed')
+@override_settings(THUMBNAIL_WORKERS=2, UPLOADS_ACCEL_REDIRECT=True)
+class ThumbnailTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.joe = User.objects.create(username='joe')
+        cls.question = Question.objects.create(title='Question', author=cls.joe)
+
+    def setUp(self):
+        cache.clear()
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        overrides = override_settings(UPLOADS_ROOT=os.path.join(root, 'uploads'),
+                                      THUMBNAILS_ROOT=os.path.join(root, 'thumbs'))
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        self.client.force_login(self.joe)
+
+    def upload(self, content, name='image.png'):
+        self.client.post(reverse('upload_attachment'),
+                         {'file': SimpleUploadedFile(name, content), 'question_id': self.question.id},
+                         HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        return Attachment.objects.latest('id')
+
+    def thumbnail(self, attachment, scale=1):
+        return Image.open(os.path.join(settings.THUMBNAILS_ROOT, attachment.thumbnail_path(scale)))
+
+    def test_thumbnails_are_made_in_the_background(self):
+        attachment = self.upload(image_bytes((1000, 500), mode='RGBA', color=(0, 0, 0, 0)))
+        self.assertFalse(attachment.has_thumbnail)
+        self.assertNotContains(self.client.get(self.question.get_absolute_url()), '<img')
+
+        tasks.work(once=True)
+        attachment.refresh_from_db()
+        self.assertTrue(attachment.has_thumbnail)
+        with self.thumbnail(attachment) as small, self.thumbnail(attachment, 2) as large:
+            self.assertEqual((small.format, small.size, large.size), ('JPEG', (200, 100), (400, 200)))
+            # transparent is white, not black
+            self.assertGreater(min(small.getpixel((0, 0))), 250)
+        response = self.client.get(self.question.get_absolute_url())
+        self.assertContains(response, f'src="/thumbs/{attachment.sha256[:2]}/200.{attachment.sha256}.jpg"')
+
+    def test_identical_images_share_the_thumbnails(self):
+        self.upload(image_bytes((300, 300)))
+        tasks.work(once=True)
+        second = self.upload(image_bytes((300, 300)), name='copy.png')
+        self.assertTrue(second.has_thumbnail)
+        self.assertFalse(Task.objects.exists())
+
+    def test_images_of_a_batch_are_made_once(self):
+        for name in ('one.png', 'two.png'):
+            self.upload(image_bytes((300, 300)), name=name)
+        self.upload(image_bytes((300, 300), mode='L'), name='grey.png')
+        self.assertEqual(Task.objects.count(), 3)
+        pool = thumbnails._pool()
+        with patch.object(pool, 'submit', wraps=pool.submit) as submit:
+            tasks.work(once=True)
+        self.assertEqual(submit.call_count, 2)
+        self.assertFalse(Attachment.objects.filter(has_thumbnail=False).exists())
+
+    def test_broken_images_and_other_files(self):
+        broken = self.upload(b'not an image', name='broken.png')
+        text = self.upload(b'text', name='notes.txt')
+        with self.assertLogs('qa.thumbnails', 'WARNING'):
+            tasks.work(once=True)
+        self.assertFalse(Attachment.objects.filter(pk__in=[broken.pk, text.pk], has_thumbnail=True).exists())
+        self.assertFalse(Task.objects.exists())
+
+    def test_batch_is_retried_with_a_new_pool_when_a_worker_dies(self):
+        attachment = self.upload(image_bytes((300, 300)))
+        broken = thumbnails._pool()
+        with patch.object(broken, 'submit', side_effect=BrokenProcessPool('A worker died')), \
+                self.assertLogs('qa.tasks', 'ERROR'):
+            tasks.work(once=True)
+        self.assertEqual(Task.objects.get().attempts, 1)
+        self.assertIsNot(thumbnails._pool(), broken)
+
+        Task.objects.update(run_at=timezone.now())
+        tasks.work(once=True)
+        attachment.refresh_from_db()
+        self.assertTrue(attachment.has_thumbnail)
+        self.assertFalse(Task.objects.exists())
+
+    def test_thumbnails_of_purged_questions_are_removed(self):
+        attachment = self.upload(image_bytes((300, 300)))
+        tasks.work(once=True)
+        path = os.path.join(settings.UPLOADS_ROOT, attachment.path)
+        os.utime(path, (0, 0))
+        deletion.delete_question(self.question)
+        tasks.work(once=True)
+        self.assertFalse(os.path.exists(os.path.join(settings.THUMBNAILS_ROOT, attachment.thumbnail_path())))
+
+    def test_thumbnails_of_deleted_answers_are_removed_with_their_files(self):
+        answer = Answer.objects.create(text='Answer', question=self.question, author=self.joe)
+        response = self.client.post(reverse('upload_attachment'),
+                                    {'file': SimpleUploadedFile('image.png', image_bytes((300, 300))),
+                                     'question_id': self.question.id, 'answer_id': answer.id},
+                                    HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        self.assertEqual(response.json()['status'], 'ok')
+        attachment = Attachment.objects.get()
+        tasks.work(once=True)
+        thumbnail = os.path.join(settings.THUMBNAILS_ROOT, attachment.thumbnail_path())
+        self.assertTrue(os.path.exists(thumbnail))
+
+        self.client.post(reverse('delete_answer'), {'answer_id': answer.id}, HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        tasks.work(once=True)
+        # stored lately, removed by the delayed retry
+        self.assertTrue(os.path.exists(thumbnail))
+        os.utime(os.path.join(settings.UPLOADS_ROOT, attachment.path), (0, 0))
+        Task.objects.update(run_at=timezone.now())
+        tasks.work(once=True)
+        self.assertFalse(os.path.exists(thumbnail))
+        self.assertFalse(os.path.exists(os.path.join(settings.UPLOADS_ROOT, attachment.path)))
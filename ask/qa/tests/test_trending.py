@@ -0,0 +1,119 @@
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from qa import trending
+from qa.models import Question
+from qa.trending import Window
+from qa.votes import apply_votes
+
+WEIGHTS = {'views': 1, 'votes': 5, 'answers': 10}
+NOW = 1000000
+
+
+class WindowTest(SimpleTestCase):
+
+    def test_buckets_of_the_last_minutes(self):
+        window = Window(3)
+        window.add(NOW, views=1)
+        window.add(NOW, views=2, votes=1)
+        window.add(NOW + 1, answers=1)
+        self.assertEqual(window.score(NOW + 1, WEIGHTS, half_life=1), 8 / 2 + 10)
+        # the minute a window ago is overwritten, older ones are dropped
+        window.add(NOW + 3, views=1)
+        window.add(NOW - 1, views=100)
+        self.assertEqual(window.score(NOW + 3, WEIGHTS, half_life=1), 10 / 4 + 1)
+        self.assertFalse(window.expired(NOW + 3))
+        self.assertTrue(window.expired(NOW + 6))
+        self.assertEqual(window.score(NOW + 6, WEIGHTS, half_life=1), 0)
+
+    def test_merge(self):
+        window, other = Window(3), Window(3)
+        window.add(NOW, views=1)
+        other.add(NOW, votes=1)
+        other.add(NOW + 1, views=1)
+        window.merge(other)
+        self.assertEqual(window.score(NOW + 1, WEIGHTS, half_life=1), 6 / 2 + 1)
+
+
+@override_settings(TRENDING_FLUSH_SECONDS=0, TRENDING_REFRESH_SECONDS=0)
+class TrendingTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.joe = User.objects.create(username='joe')
+        cls.bob = User.objects.create(username='bob')
+        cls.viewed = Question.objects.create(title='Viewed')
+        cls.voted = Question.objects.create(title='Voted')
+        cls.quiet = Question.objects.create(title='Quiet')
+
+    def setUp(self):
+        # drops the counts of the other tests
+        cache.clear()
+        trending.flush()
+        cache.clear()
+        # the scores of the tests don't decay at the turn of a minute
+        patcher = patch.object(trending, '_minute', return_value=NOW)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_trending_page_and_api(self):
+        for _ in range(3):
+            self.client.get(self.viewed.get_absolute_url())
+        apply_votes(self.joe, [(self.voted.id, 'Like')])
+        apply_votes(self.bob, [(self.voted.id, 'Dislike'), (self.quiet.id + 100, 'Like')])
+        self.assertEqual([question_id for question_id, _ in trending.top()], [self.voted.id, self.viewed.id])
+
+        response = self.client.get(reverse('trending'))
+        html = response.content.decode()
+        self.assertLess(html.index('Voted'), html.index('Viewed'))
+        self.assertNotIn('Quiet', html)
+        data = self.client.get(reverse('api_trending_questions')).json()
+        self.assertEqual([(row['question_id'], row['title'], row['score']) for row in data],
+                         [(self.voted.id, 'Voted', 10), (self.viewed.id, 'Viewed', 3)])
+
+    def test_answers_count(self):
+        self.client.force_login(self.joe)
+        self.client.post(self.quiet.get_absolute_url(), {'text': 'Answer'})
+        self.assertEqual(trending.top(), [(self.quiet.id, 10)])
+
+    def test_recent_minutes_weigh_more(self):
+        with patch.object(trending, '_minute', return_value=NOW - 15):
+            trending.record(self.viewed.id, views=2)
+        trending.record(self.voted.id, views=1)
+        self.assertEqual(trending.top(), [(self.voted.id, 1), (self.viewed.id, 1)])
+        with patch.object(trending, '_minute', return_value=NOW + 60):
+            self.assertEqual(trending.top(), [])
+
+    def test_counting_takes_no_query(self):
+        with override_settings(TRENDING_FLUSH_SECONDS=60), CaptureQueriesContext(connection) as queries:
+            trending.record(self.viewed.id, views=1)
+            trending.flush()
+        self.assertEqual(len(queries), 0)
+
+    def test_worker_finding_the_counts_locked_merges_later(self):
+        cache.add(trending.LOCK_KEY, 1)
+        trending.record(self.viewed.id, views=1)
+        trending.record(self.viewed.id, views=1)
+        self.assertIsNone(cache.get(trending.COUNTS_KEY))
+        cache.delete(trending.LOCK_KEY)
+        self.assertEqual(trending.top(), [(self.viewed.id, 2)])
+
+    @override_settings(TRENDING_MAX_QUESTIONS=2, TRENDING_SIZE=1)
+    def test_lowest_scores_are_dropped(self):
+        with override_settings(TRENDING_FLUSH_SECONDS=60):
+            for views, question in enumerate([self.quiet, self.viewed, self.voted], 1):
+                trending.record(question.id, views=views)
+        trending.flush()
+        self.assertEqual(sorted(cache.get(trending.COUNTS_KEY)), [self.viewed.id, self.voted.id])
+        self.assertEqual(trending.top(), [(self.voted.id, 3)])
+
+    def test_deleted_questions_are_skipped(self):
+        trending.record(self.viewed.id, views=1)
+        Question.objects.filter(pk=self.viewed.pk).update(is_deleted=True)
+        self.assertEqual(trending.questions(), [])
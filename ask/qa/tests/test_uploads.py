@@ -0,0 +1,142 @@
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from qa import deletion, tasks, uploads
+from qa.models import Question, Answer, Attachment, Task
+
+
+class AttachmentTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.joe = User.objects.create(username='joe')
+        cls.question = Question.objects.create(title='Question', author=cls.joe)
+        cls.answer = Answer.objects.create(text='Answer', question=cls.question, author=cls.joe)
+
+    def setUp(self):
+        cache.clear()
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        overrides = override_settings(UPLOADS_ROOT=root, UPLOADS_ACCEL_REDIRECT=True)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        self.client.force_login(self.joe)
+
+    def upload(self, content=b'some bytes', name='notes.txt', **ids):
+        ids = ids or {'question_id': self.question.id}
+        return self.client.post(reverse('upload_attachment'), {'file': SimpleUploadedFile(name, content), **ids},
+                                HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+
+    def test_upload_is_stored_by_content(self):
+        response = self.upload(b'x' * 1000000)
+        self.assertEqual(response.json()['status'], 'ok')
+        attachment = Attachment.objects.get()
+        self.assertEqual(response.json()['url'], reverse('attachment', kwargs={'id': attachment.id}))
+        self.assertEqual((attachment.name, attachment.size, attachment.content_type, attachment.answer),
+                         ('notes.txt', 1000000, 'text/plain', None))
+        with open(uploads.content_path(attachment.sha256), 'rb') as file:
+            self.assertEqual(file.read(), b'x' * 1000000)
+        self.assertEqual(os.listdir(os.path.join(settings.UPLOADS_ROOT, 'tmp')), [])
+
+    def test_identical_uploads_are_stored_once(self):
+        self.upload(b'same', name='one.txt')
+        self.upload(b'same', name='two.txt', question_id=self.question.id, answer_id=self.answer.id)
+        one, two = Attachment.objects.order_by('id')
+        self.assertEqual(one.sha256, two.sha256)
+        self.assertEqual(two.answer, self.answer)
+        files = [name for _, _, names in os.walk(settings.UPLOADS_ROOT) for name in names]
+        self.assertEqual(files, [one.sha256])
+
+    def test_only_the_author_attaches(self):
+        self.client.force_login(User.objects.create(username='bob'))
+        self.assertEqual(self.upload().json()['code'], 'forbidden')
+        self.client.logout()
+        self.assertEqual(self.upload().json()['code'], 'no_auth')
+        self.assertFalse(Attachment.objects.exists())
+
+    @override_settings(UPLOADS_MAX_SIZE=100)
+    def test_too_big_file_is_rejected(self):
+        response = self.upload(b'x' * 101)
+        self.assertEqual(response.json()['code'], 'bad_params')
+        self.assertFalse(Attachment.objects.exists())
+
+    def test_download_is_sent_by_nginx(self):
+        self.upload(b'text')
+        attachment = Attachment.objects.get()
+        self.client.logout()
+        response = self.client.get(attachment.get_absolute_url())
+        self.assertEqual(response['X-Accel-Redirect'], '/uploads/' + attachment.path)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['Content-Type'], 'text/plain')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="notes.txt"')
+        self.assertEqual(response['X-Content-Type-Options'], 'nosniff')
+        self.assertIn('private', response['Cache-Control'])
+
+    @override_settings(UPLOADS_ACCEL_REDIRECT=False)
+    def test_download_streamed_by_the_app(self):
+        self.upload(b'\x89PNG...', name='Схема.png')
+        attachment = Attachment.objects.get()
+        response = self.client.get(attachment.get_absolute_url())
+        self.assertEqual(b''.join(response.streaming_content), b'\x89PNG...')
+        self.assertEqual(response['Content-Type'], 'image/png')
+        self.assertEqual(response['Content-Disposition'],
+                         "inline; filename*=utf-8''%D0%A1%D1%85%D0%B5%D0%BC%D0%B0.png")
+        response.close()
+
+    def test_attachments_are_listed_on_the_question_page(self):
+        self.upload(name='question.txt')
+        self.upload(name='answer.txt', question_id=self.question.id, answer_id=self.answer.id)
+        response = self.client.get(self.question.get_absolute_url())
+        question_attachment, answer_attachment = Attachment.objects.order_by('id')
+        self.assertContains(response, question_attachment.get_absolute_url())
+        self.assertContains(response, answer_attachment.get_absolute_url())
+        self.assertContains(response, 'class="attach"', count=2)
+
+    def test_attachments_of_deleted_questions(self):
+        self.upload(b'shared', name='one.txt')
+        other = Question.objects.create(title='Other', author=self.joe)
+        self.upload(b'shared', name='two.txt', question_id=other.id)
+        self.upload(b'own', name='three.txt')
+        shared, _, own = Attachment.objects.order_by('id')
+
+        deletion.delete_question(self.question)
+        self.assertEqual(self.client.get(own.get_absolute_url()).status_code, 404)
+        tasks.work(once=True)
+        self.assertEqual(list(Attachment.objects.values_list('name', flat=True)), ['two.txt'])
+        self.assertTrue(os.path.exists(uploads.content_path(shared.sha256)))
+        # stored lately, removed an hour later
+        self.assertTrue(os.path.exists(uploads.content_path(own.sha256)))
+        self.remove_later([own])
+        self.assertTrue(os.path.exists(uploads.content_path(shared.sha256)))
+        self.assertFalse(os.path.exists(uploads.content_path(own.sha256)))
+
+    def remove_later(self, attachments):
+        task = Task.objects.get(name='qa.deletion.remove_files')
+        self.assertGreater(task.run_at, timezone.now() + timedelta(seconds=uploads.RECENT_SECONDS - 60))
+        for attachment in attachments:
+            old = os.path.getmtime(uploads.content_path(attachment.sha256)) - uploads.RECENT_SECONDS - 1
+            os.utime(uploads.content_path(attachment.sha256), (old, old))
+        Task.objects.update(run_at=timezone.now())
+        tasks.work(once=True)
+        self.assertFalse(Task.objects.exists())
+
+    def test_attachments_of_deleted_answers(self):
+        self.upload(b'answer', name='answer.txt', question_id=self.question.id, answer_id=self.answer.id)
+        attachment = Attachment.objects.get()
+        self.client.post(reverse('delete_answer'), {'answer_id': self.answer.id},
+                         HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        self.assertFalse(Attachment.objects.exists())
+        tasks.work(once=True)
+        self.assertTrue(os.path.exists(uploads.content_path(attachment.sha256)))
+        self.remove_later([attachment])
+        self.assertFalse(os.path.exists(uploads.content_path(attachment.sha256)))
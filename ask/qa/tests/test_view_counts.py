@@ -0,0 +1,86 @@
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import DatabaseError
+from django.db.models import QuerySet
+from django.test import TestCase, override_settings
+
+from qa import view_counts
+from qa.models import Question
+
+
+class ViewCountTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.joe = User.objects.create(username='joe')
+        cls.question = Question.objects.create(title='Question')
+        cls.other = Question.objects.create(title='Other')
+
+    def setUp(self):
+        cache.clear()
+        # the views of the other tests
+        view_counts.flush()
+        Question.all_objects.update(view_count=0)
+
+    def view(self, question, address='10.0.0.1'):
+        self.client.get(question.get_absolute_url(), REMOTE_ADDR=address)
+
+    def view_counts(self):
+        return list(Question.objects.order_by('pk').values_list('view_count', flat=True))
+
+    def test_views_are_written_together(self):
+        self.view(self.question)
+        self.view(self.question)
+        self.view(self.question, address='10.0.0.2')
+        self.client.force_login(self.joe)
+        self.view(self.question)
+        self.view(self.question, address='10.0.0.3')
+        self.view(self.other)
+        self.assertEqual(self.view_counts(), [0, 0])
+        with self.assertNumQueries(1):
+            view_counts.flush()
+        self.assertEqual(self.view_counts(), [3, 1])
+        with self.assertNumQueries(0):
+            view_counts.flush()
+
+    @override_settings(VIEW_COUNT_FLUSH_SECONDS=0)
+    def test_views_are_written_every_few_seconds(self):
+        self.view(self.question)
+        self.assertEqual(self.view_counts(), [1, 0])
+        self.assertContains(self.client.get(self.other.get_absolute_url()), 'Viewed 0 times')
+
+    @override_settings(VIEW_COUNT_FLUSH_SECONDS=0)
+    def test_page_shows_the_current_count(self):
+        url = self.question.get_absolute_url()
+        response = self.client.get(url, REMOTE_ADDR='10.0.0.1')
+        self.assertContains(response, 'Viewed 0 times')
+        # the page of the question is cached, its view count isn't
+        response = self.client.get(url, REMOTE_ADDR='10.0.0.2', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertContains(response, 'Viewed 1 time<')
+        self.assertContains(self.client.get(url, REMOTE_ADDR='10.0.0.3'), 'Viewed 2 times')
+
+    @override_settings(VIEW_COUNT_SAMPLE_ABOVE=2, VIEW_COUNT_SAMPLE_RATE=10)
+    def test_hot_questions_are_sampled(self):
+        for num in range(3):
+            self.view(self.question, address=f'10.0.0.{num}')
+        with patch.object(view_counts.random, 'random', return_value=0.5), \
+                patch.object(cache, 'add', wraps=cache.add) as add:
+            self.view(self.question, address='10.0.1.1')
+        add.assert_not_called()
+        with patch.object(view_counts.random, 'random', return_value=0.05):
+            self.view(self.question, address='10.0.1.2')
+            # a repeat view sampled in isn't counted either
+            self.view(self.question, address='10.0.1.2')
+        view_counts.flush()
+        self.assertEqual(self.view_counts(), [13, 0])
+
+    def test_failed_write_is_tried_again(self):
+        self.view(self.question)
+        with patch.object(QuerySet, 'update', side_effect=DatabaseError('locked')), \
+                self.assertLogs('qa.view_counts', 'WARNING'):
+            view_counts.flush()
+        self.view(self.question, address='10.0.0.2')
+        view_counts.flush()
+        self.assertEqual(self.view_counts(), [2, 0])
@@ -1,12 +1,17 @@
+import json
 import unittest
 from unittest.mock import patch, Mock
 from datetime import date, timedelta
+from django.core.cache import cache
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
 from django.contrib.auth.models import User
 from django.urls import reverse, resolve
 from django.utils.html import escape
 
-from qa.models import Question, Answer, QuestionLikes
+from qa import tasks
+from qa.models import Question, Answer, QuestionLikes, UserProfile
 from qa.views import *
 from qa.forms import (
     EMPTY_TITLE_ERROR, EMPTY_TEXT_ERROR, AskForm, AnswerForm,
@@ -191,6 +196,10 @@ class QuestionViewTest(TestCase):
         # Create test user
         cls.test_user = User.objects.create(email='a@b.com')
 
+    def setUp(self):
+        # the pages are cached per question version, the tests add answers without changing it
+        cache.clear()
+
     def test_question_url_resolves_to_page_view(self):
         found = resolve('/question/1/')
         self.assertEqual(found.func, question_view)
@@ -686,8 +695,12 @@ class DeleteQuestionViewTest(TestCase):
         self.assertEqual(Answer.objects.filter(question=self.q1).count(), 2)
         response = self.client.post(reverse('delete_question', kwargs={'question_id': self.q1.pk}))
         self.assertEqual(Question.objects.count(), 1)
-        self.assertEqual(Answer.objects.filter(question=self.q1).count(), 0)
+        self.assertEqual(Answer.objects.visible().filter(question=self.q1).count(), 0)
         self.assertFalse(Question.objects.filter(author=self.joe).exists())
+        # and deleted by the background purge
+        tasks.work(once=True)
+        self.assertEqual(Answer.objects.filter(question=self.q1).count(), 0)
+        self.assertFalse(Question.all_objects.filter(pk=self.q1.pk).exists())
 
     def test_after_deleting_redirect_to_page_with_users_questions(self):
         self.client.force_login(self.joe)
@@ -702,4 +715,167 @@ class DeleteQuestionViewTest(TestCase):
         response = self.client.post(reverse('delete_question', kwargs={'question_id': self.q2.pk}))
         self.assertEqual(Question.objects.count(), 2)
         self.assertTrue(Question.objects.filter(author=self.bob).exists())
-        
\ No newline at end of file
+        
+
+class BatchLikeViewTest(TestCase):
+
+    def setUp(self):
+        self.q1 = Question.objects.create(title='Question 1', rating=2)
+        self.q2 = Question.objects.create(title='Question 2', rating=-1)
+        self.q3 = Question.objects.create(title='Question 3', rating=0)
+        self.joe = User.objects.create(username='joe')
+        QuestionLikes.objects.create(question=self.q1, user=self.joe, is_liked=True)
+        QuestionLikes.objects.create(question=self.q2, user=self.joe, is_liked=False)
+        self.client.force_login(self.joe)
+
+    def post_votes(self, votes):
+        return self.client.post(reverse('like_batch'), data=json.dumps({'votes': votes}),
+                                content_type='application/json')
+
+    def test_batch_applies_all_votes(self):
+        response = self.post_votes([
+            {'question_id': self.q1.id, 'operation': 'Dislike'},
+            {'question_id': self.q2.id, 'operation': 'Dislike'},
+            {'question_id': self.q3.id, 'operation': 'Like'},
+        ])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([result['rate'] for result in response.json()['results']], ['Dislike', None, 'Like'])
+        self.assertEqual(Question.objects.get(pk=self.q1.id).rating, 0)
+        self.assertEqual(Question.objects.get(pk=self.q2.id).rating, 0)
+        self.assertEqual(Question.objects.get(pk=self.q3.id).rating, 1)
+        self.assertFalse(QuestionLikes.objects.get(question=self.q1, user=self.joe).is_liked)
+        self.assertFalse(QuestionLikes.objects.filter(question=self.q2, user=self.joe).exists())
+        self.assertTrue(QuestionLikes.objects.get(question=self.q3, user=self.joe).is_liked)
+
+    def test_votes_for_the_same_question_are_applied_in_order(self):
+        response = self.post_votes([
+            {'question_id': self.q3.id, 'operation': 'Like'},
+            {'question_id': self.q3.id, 'operation': 'Dislike'},
+        ])
+        self.assertEqual([result['rate'] for result in response.json()['results']], ['Like', 'Dislike'])
+        self.assertEqual(Question.objects.get(pk=self.q3.id).rating, -1)
+        self.assertEqual(QuestionLikes.objects.filter(question=self.q3).count(), 1)
+
+    def test_batch_reports_errors_per_vote(self):
+        response = self.post_votes([
+            {'question_id': 100, 'operation': 'Like'},
+            {'question_id': self.q3.id, 'operation': 'Love'},
+            {'question_id': self.q3.id, 'operation': 'Like'},
+        ])
+        statuses = [result['status'] for result in response.json()['results']]
+        self.assertEqual(statuses, ['error', 'error', 'ok'])
+        self.assertEqual(Question.objects.get(pk=self.q3.id).rating, 1)
+
+    def test_number_of_queries_doesnt_depend_on_the_batch_size(self):
+        content_changed()  # creates the feed version row
+        UserProfile.objects.bump(self.joe.id)  # and the profile of the voter
+        counts = []
+        for size in (2, 20):
+            questions = [Question.objects.create(title='Batch question') for _ in range(size)]
+            with CaptureQueriesContext(connection) as queries:
+                self.post_votes([{'question_id': question.id, 'operation': 'Like'} for question in questions])
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+        self.assertFalse(Question.objects.filter(title='Batch question').exclude(rating=1).exists())
+
+    def test_malformed_body_is_rejected(self):
+        response = self.client.post(reverse('like_batch'), data='not json', content_type='application/json')
+        self.assertEqual(response.json()['code'], 'bad_params')
+
+    def test_get_is_not_allowed(self):
+        self.assertEqual(self.client.get(reverse('like_batch')).status_code, 405)
+
+    def test_anonymous_user_cannot_vote(self):
+        self.client.logout()
+        response = self.client.post(reverse('like_batch'), data='{"votes": []}', content_type='application/json',
+                                    HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        self.assertEqual(response.json()['code'], 'no_auth')
+
+
+class AnswerPaginationTest(TestCase):
+
+    def setUp(self):
+        self.joe = User.objects.create(username='joe')
+        self.question = Question.objects.create(title='Question', author=self.joe)
+        for answer_num in range(45):
+            Answer.objects.create(text=f'Answer #{answer_num}.', question=self.question, author=self.joe)
+
+    def test_question_page_shows_the_first_page_of_answers(self):
+        response = self.client.get(self.question.get_absolute_url())
+        self.assertEqual(len(response.context['answers']), 20)
+        self.assertContains(response, 'Answer #0.')
+        self.assertContains(response, 'Answer #19.')
+        self.assertNotContains(response, 'Answer #20.')
+        self.assertIsNotNone(response.context['next_cursor'])
+
+    def test_load_more_returns_the_following_pages(self):
+        cursor = self.client.get(self.question.get_absolute_url()).context['next_cursor']
+        url = reverse('more_answers', kwargs={'id': self.question.id})
+        response = self.client.get(url, {'after': cursor}).json()
+        self.assertIn('Answer #20.', response['html'])
+        self.assertIn('Answer #39.', response['html'])
+        self.assertNotIn('Answer #19.', response['html'])
+        response = self.client.get(url, {'after': response['next']}).json()
+        self.assertIn('Answer #44.', response['html'])
+        self.assertIsNone(response['next'])
+
+    def test_answers_added_at_the_same_time_are_not_skipped(self):
+        Answer.objects.filter(question=self.question).update(added_at=self.question.added_at)
+        cursor = self.client.get(self.question.get_absolute_url()).context['next_cursor']
+        url = reverse('more_answers', kwargs={'id': self.question.id})
+        html = self.client.get(url, {'after': cursor}).json()['html']
+        self.assertIn('Answer #20.', html)
+        self.assertNotIn('Answer #19.', html)
+
+    def test_delete_handler_is_rendered_once(self):
+        self.client.force_login(self.joe)
+        response = self.client.get(self.question.get_absolute_url())
+        # the page script (qa/assets/js/question.js) handles all the answers
+        self.assertEqual(response.content.decode().count('<script'), 1)
+        self.assertContains(response, 'class="b1 delete_answer"', count=20)
+
+    def test_invalid_cursor(self):
+        url = reverse('more_answers', kwargs={'id': self.question.id})
+        self.assertEqual(self.client.get(url, {'after': 'x'}).json()['code'], 'bad_params')
+        self.assertEqual(self.client.get(url, {'after': '99999999999999999999999-1'}).json()['code'], 'bad_params')
+
+    def test_load_more_for_nonexistent_question_returns_404(self):
+        response = self.client.get(reverse('more_answers', kwargs={'id': 100}), {'after': '1-1'})
+        self.assertEqual(response.status_code, 404)
+
+
+class FeedFragmentCacheTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        Question.objects.bulk_create(Question(title=f'Question {num}') for num in range(200))
+        content_changed()
+
+    def test_page_links_are_elided(self):
+        response = self.client.get(reverse('new_questions') + '?page=10')
+        self.assertContains(response, '<li class="active">10</li>', html=True)
+        self.assertContains(response, '…', count=2)
+        # 1 2 … 7 8 9 [10] 11 12 13 … 19 20
+        self.assertEqual(response.content.count(b'href="/?page='), 10)
+
+    def test_question_list_is_cached_until_the_feed_changes(self):
+        with CaptureQueriesContext(connection) as first:
+            self.client.get(reverse('new_questions'))
+        with CaptureQueriesContext(connection) as second:
+            response = self.client.get(reverse('new_questions'))
+        self.assertContains(response, 'Question 199')
+        # the list and the count are not queried, the feed version is
+        self.assertEqual(len(first) - len(second), 2)
+
+        Question.objects.create(title='The newest question')
+        self.assertNotContains(self.client.get(reverse('new_questions')), 'The newest question')
+        content_changed()
+        self.assertContains(self.client.get(reverse('new_questions')), 'The newest question')
+
+    def test_feeds_are_cached_apart(self):
+        Question.objects.filter(title='Question 0').update(rating=10)
+        content_changed()
+        self.client.get(reverse('new_questions'))
+        response = self.client.get(reverse('popular'))
+        self.assertEqual(response.context['page'].object_list[0].title, 'Question 0')
+        self.assertContains(response, 'Question 0')
@@ -0,0 +1,97 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from qa import vote_history
+from qa.models import Question, QuestionRatingHour, VoteEvent
+from qa.votes import apply_votes
+
+HOUR = datetime(2021, 6, 1, 10, tzinfo=dt_timezone.utc)
+
+
+class VoteHistoryTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.joe = User.objects.create(username='joe')
+        cls.bob = User.objects.create(username='bob')
+        cls.question = Question.objects.create(title='Question')
+        cls.other = Question.objects.create(title='Other')
+
+    def log(self, question, delta, minutes):
+        VoteEvent.objects.create(question=question, delta=delta, created_at=HOUR + timedelta(minutes=minutes))
+
+    def test_votes_are_logged(self):
+        apply_votes(self.joe, [(self.question.id, 'Like'), (self.other.id, 'Dislike'),
+                               (self.other.id, 'Dislike')])
+        apply_votes(self.bob, [(self.question.id, 'Dislike')])
+        self.assertEqual(sorted(VoteEvent.objects.values_list('question_id', 'delta')),
+                         [(self.question.id, -1), (self.question.id, 1)])
+
+    def test_compaction_into_hours(self):
+        for delta, minutes in [(1, 0), (1, 59), (-2, 30), (1, 60), (-1, 130)]:
+            self.log(self.question, delta, minutes)
+        self.log(self.other, 1, 5)
+        out = StringIO()
+        call_command('compact_vote_events', batch_size=2, stdout=out)
+        self.assertIn('Compacted 6 vote events', out.getvalue())
+        self.assertFalse(VoteEvent.objects.exists())
+        self.assertEqual(
+            list(QuestionRatingHour.objects.filter(question=self.question).order_by('hour')
+                 .values_list('hour', 'delta', 'votes')),
+            [(HOUR, 0, 3), (HOUR + timedelta(hours=1), 1, 1), (HOUR + timedelta(hours=2), -1, 1)],
+        )
+
+        # later events of the same hour are added up
+        self.log(self.question, 2, 10)
+        self.assertEqual(sum(vote_history.compact()), 1)
+        self.assertEqual(QuestionRatingHour.objects.get(question=self.question, hour=HOUR).delta, 2)
+
+    def test_events_of_purged_questions_are_dropped(self):
+        question_id = self.other.id
+        self.log(self.other, 1, 0)
+        Question.all_objects.filter(pk=question_id).delete()
+        self.assertEqual(sum(vote_history.compact()), 1)
+        self.assertFalse(QuestionRatingHour.objects.exists())
+
+    def test_compaction_takes_a_fixed_number_of_queries(self):
+        counts = []
+        for events in (2, 20):
+            for num in range(events):
+                self.log(self.question if num % 2 else self.other, 1, num * 7)
+            with CaptureQueriesContext(connection) as queries:
+                list(vote_history.compact())
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+
+    def test_history_api(self):
+        cache.clear()
+        now = timezone.now().replace(minute=0, second=0, microsecond=0)
+        QuestionRatingHour.objects.bulk_create([
+            QuestionRatingHour(question=self.question, hour=now - timedelta(hours=30), delta=5, votes=5),
+            QuestionRatingHour(question=self.question, hour=now - timedelta(hours=2), delta=-1, votes=3),
+            QuestionRatingHour(question=self.question, hour=now, delta=2, votes=2),
+            QuestionRatingHour(question=self.other, hour=now, delta=7, votes=7),
+        ])
+        url = reverse('api_question_rating_history', kwargs={'question_id': self.question.id})
+        with self.assertNumQueries(3):
+            data = self.client.get(url, {'hours': 24}).json()
+        self.assertEqual([(row['delta'], row['votes'], row['rating']) for row in data['hours']],
+                         [(-1, 3, 4), (2, 2, 6)])
+        self.assertEqual(data['hours'][1]['hour'], now.isoformat().replace('+00:00', 'Z'))
+        self.assertEqual(len(self.client.get(url).json()['hours']), 3)
+        self.assertEqual(self.client.get(url, {'hours': 'x'}).status_code, 404)
+        # out of range, the current hour or the whole history
+        self.assertEqual(len(self.client.get(url, {'hours': -100000000}).json()['hours']), 1)
+        self.assertEqual(len(self.client.get(url, {'hours': -10 ** 12}).json()['hours']), 1)
+        self.assertEqual(len(self.client.get(url, {'hours': 10 ** 12}).json()['hours']), 3)
+        url = reverse('api_question_rating_history', kwargs={'question_id': 100})
+        self.assertEqual(self.client.get(url).status_code, 404)
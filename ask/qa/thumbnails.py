@@ -0,0 +1,134 @@
+"""
+Thumbnails of the attached images, made with Pillow when it is installed (`pip install Pillow`).
+
+Resizing is CPU bound, so it is kept off the requests: the upload queues the `generate` task,
+which hands the images to a pool of processes, one per CPU (THUMBNAIL_WORKERS), and marks their
+attachments once the files are written. The thumbnails are JPEGs named by the sha256 of the
+image under THUMBNAILS_ROOT (public/thumbs/ab/200.abcd....jpg): identical uploads share them and,
+with the hash in the name, nginx serves them as immutable static files (etc/nginx.conf).
+They are public like the rest of public/, the originals stay behind the app's authorization.
+"""
+import logging
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+
+from qa.conditional import content_changed
+from qa.models import Attachment
+from qa.tasks import task
+from qa.uploads import INLINE_TYPES, content_path
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+
+
+def _pool():
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=settings.THUMBNAIL_WORKERS)
+    return _executor
+
+
+def _discard_pool():
+    # a worker of the pool died (killed, out of memory), the pool takes no more work
+    global _executor
+    executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=False)
+
+
+def _paths(attachment):
+    return [os.path.join(settings.THUMBNAILS_ROOT, attachment.thumbnail_path(scale)) for scale in (1, 2)]
+
+
+def _write(image, path, quality):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with tempfile.NamedTemporaryFile(dir=os.path.dirname(path), suffix='.jpg', delete=False) as out:
+        try:
+            image.save(out, 'JPEG', quality=quality, optimize=True, progressive=True)
+        except BaseException:
+            os.unlink(out.name)
+            raise
+    os.chmod(out.name, 0o644)
+    os.replace(out.name, path)
+
+
+def render(source, targets, size, quality):
+    """Writes the thumbnails of the image fitting in size, 2 * size... squares. Runs in the pool."""
+    with Image.open(source) as image:
+        # JPEGs are decoded right at a fraction of their size, much faster than the full image
+        image.draft('RGB', (size * len(targets), size * len(targets)))
+        image = ImageOps.exif_transpose(image)
+        if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+            image = image.convert('RGBA')
+            flat = Image.new('RGB', image.size, 'white')
+            flat.paste(image, mask=image.getchannel('A'))
+            image = flat
+        else:
+            image = image.convert('RGB')
+        # the biggest first, each smaller one is resized from the previous
+        for scale, target in reversed(list(enumerate(targets, 1))):
+            image.thumbnail((size * scale, size * scale))
+            _write(image, target, quality)
+
+
+def attached(attachment):
+    """Queues the thumbnails of an attached image unless an identical image has them already."""
+    if Image is None or attachment.content_type not in INLINE_TYPES:
+        return
+    if all(os.path.exists(path) for path in _paths(attachment)):
+        Attachment.objects.filter(pk=attachment.pk).update(has_thumbnail=True)
+        attachment.has_thumbnail = True
+    else:
+        generate.enqueue(attachment.sha256)
+
+
+@task(batch=True)
+def generate(calls):
+    """Makes the thumbnails of the images with the hashes in parallel, each once."""
+    attachments = {}
+    for attachment in Attachment.objects.filter(sha256__in={sha256 for sha256, in calls}, has_thumbnail=False):
+        attachments.setdefault(attachment.sha256, attachment)
+    done = []
+    try:
+        futures = {
+            sha256: _pool().submit(render, content_path(sha256), _paths(attachment),
+                                   settings.THUMBNAIL_SIZE, settings.THUMBNAIL_QUALITY)
+            for sha256, attachment in attachments.items()
+        }
+        for sha256, future in futures.items():
+            try:
+                future.result()
+            except BrokenProcessPool:
+                raise
+            except Exception as exc:
+                # not an image Pillow can read, retrying won't help
+                logger.warning('No thumbnail of %s: %s', sha256, exc)
+            else:
+                done.append(sha256)
+    except BrokenProcessPool:
+        # the task is retried with a new pool
+        _discard_pool()
+        raise
+    if done:
+        Attachment.objects.filter(sha256__in=done).update(has_thumbnail=True)
+        content_changed(*Attachment.objects.filter(sha256__in=done).values_list('question_id', flat=True).distinct())
+
+
+def remove(hashes):
+    """Removes the thumbnails of the images with the hashes."""
+    for sha256 in hashes:
+        for path in _paths(Attachment(sha256=sha256)):
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
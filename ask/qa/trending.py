@@ -0,0 +1,147 @@
+"""
+Trending questions: the questions viewed, voted and answered the most over the last
+TRENDING_WINDOW_MINUTES, the counts of a minute weighing half as much every TRENDING_HALF_LIFE_MINUTES.
+
+Counting costs no query: every worker adds its requests up in memory, a ring buffer of per-minute
+buckets per question. The first request of a worker TRENDING_FLUSH_SECONDS after its last merge
+merges its buckets into the ones shared through the cache, locked with cache.add() (a worker which
+finds them locked keeps its counts for its next merge). The feed is the top TRENDING_SIZE of the
+shared buckets, picked with a heap by one request every TRENDING_REFRESH_SECONDS (qa/singleflight.py).
+
+The counts of a worker not merged yet, a few seconds of them, are lost when it exits. The pages
+nginx serves from its cache (qa/proxy_cache.py) are not counted as views. With the per-process
+memory cache (no CACHE_URL) every worker has a trending feed of its own.
+"""
+import heapq
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from qa import singleflight
+from qa.models import Question
+
+COUNTS_KEY = 'trending:counts'
+LOCK_KEY = 'trending:lock'
+TOP_KEY = 'trending:top'
+
+
+def _minute():
+    return int(time.time() // 60)
+
+
+class Window:
+    """
+    Counts of a question per minute over the last `minutes` minutes: a ring buffer of
+    [minute, views, votes, answers] buckets, the bucket of a minute is at minute % minutes.
+    """
+    __slots__ = ('buckets',)
+
+    def __init__(self, minutes):
+        self.buckets = [None] * minutes
+
+    def add(self, minute, views=0, votes=0, answers=0):
+        index = minute % len(self.buckets)
+        bucket = self.buckets[index]
+        if bucket is None or bucket[0] < minute:
+            # a new minute takes the place of the one a window ago
+            self.buckets[index] = [minute, views, votes, answers]
+        elif bucket[0] == minute:
+            bucket[1] += views
+            bucket[2] += votes
+            bucket[3] += answers
+        # else older than the window, dropped
+
+    def merge(self, other):
+        for bucket in other.buckets:
+            if bucket is not None:
+                self.add(*bucket)
+
+    def score(self, now, weights, half_life):
+        """The weighted counts of the minutes in the window before `now`, the older the less."""
+        total = 0.0
+        for bucket in self.buckets:
+            if bucket is not None and now - bucket[0] < len(self.buckets):
+                minute, views, votes, answers = bucket
+                counts = views * weights['views'] + votes * weights['votes'] + answers * weights['answers']
+                total += counts * 0.5 ** ((now - minute) / half_life)
+        return total
+
+    def expired(self, now):
+        return all(bucket is None or now - bucket[0] >= len(self.buckets) for bucket in self.buckets)
+
+
+def _score(window, now):
+    return window.score(now, settings.TRENDING_WEIGHTS, settings.TRENDING_HALF_LIFE_MINUTES)
+
+
+# the counts of this worker since its last merge, {question_id: Window}
+_pending = {}
+_merged_at = time.monotonic()
+_lock = threading.Lock()
+
+
+def record(question_id, views=0, votes=0, answers=0):
+    """Counts views, votes and answers of the question in this worker."""
+    minute = _minute()
+    with _lock:
+        window = _pending.get(question_id)
+        if window is None:
+            window = _pending[question_id] = Window(settings.TRENDING_WINDOW_MINUTES)
+        window.add(minute, views, votes, answers)
+    if time.monotonic() - _merged_at >= settings.TRENDING_FLUSH_SECONDS:
+        flush()
+
+
+def flush():
+    """Merges the counts of this worker into the shared ones, unless another worker is merging."""
+    global _pending, _merged_at
+    with _lock:
+        pending, _pending = _pending, {}
+        _merged_at = time.monotonic()
+    if not pending:
+        return
+    if not cache.add(LOCK_KEY, 1, settings.SINGLEFLIGHT_WAIT_SECONDS):
+        with _lock:
+            for question_id, window in pending.items():
+                if question_id in _pending:
+                    window.merge(_pending[question_id])
+                _pending[question_id] = window
+        return
+    try:
+        now = _minute()
+        counts = cache.get(COUNTS_KEY) or {}
+        for question_id, window in pending.items():
+            if question_id in counts:
+                counts[question_id].merge(window)
+            else:
+                counts[question_id] = window
+        counts = {question_id: window for question_id, window in counts.items() if not window.expired(now)}
+        if len(counts) > settings.TRENDING_MAX_QUESTIONS:
+            # keeps the cached value small, the lowest scores are far from the top
+            counts = dict(heapq.nlargest(settings.TRENDING_MAX_QUESTIONS, counts.items(),
+                                         key=lambda item: _score(item[1], now)))
+        cache.set(COUNTS_KEY, counts, settings.TRENDING_WINDOW_MINUTES * 60)
+    finally:
+        cache.delete(LOCK_KEY)
+
+
+def _top():
+    now = _minute()
+    scores = ((_score(window, now), question_id) for question_id, window in (cache.get(COUNTS_KEY) or {}).items())
+    return [(question_id, score) for score, question_id in heapq.nlargest(settings.TRENDING_SIZE, scores) if score]
+
+
+def top():
+    """[(question_id, score), ...] of the trending questions, the highest score first."""
+    if time.monotonic() - _merged_at >= settings.TRENDING_FLUSH_SECONDS:
+        flush()
+    return singleflight.cached(TOP_KEY, _top, settings.TRENDING_REFRESH_SECONDS)
+
+
+def questions():
+    """[(question, score), ...] of the trending questions which are not deleted, the highest score first."""
+    scores = top()
+    found = Question.objects.select_related('author').in_bulk([question_id for question_id, _ in scores])
+    return [(found[question_id], score) for question_id, score in scores if question_id in found]
@@ -0,0 +1,127 @@
+"""
+Attachments of the questions and answers.
+
+Uploads are copied to UPLOADS_ROOT chunk by chunk while they are hashed and stored under their
+sha256 (ab/cd/abcd...), so no file is held in memory and identical files are kept once.
+Downloads are authorized by the app and sent by nginx: the response only carries X-Accel-Redirect
+to the internal /uploads/ location (etc/nginx.conf), nginx sends the file with sendfile(). Without
+nginx (UPLOADS_ACCEL_REDIRECT off) the app streams it with FileResponse, which the WSGI server
+sends with sendfile() too where it can (wsgi.file_wrapper).
+"""
+import hashlib
+import mimetypes
+import os
+import tempfile
+import time
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse
+from django.utils.cache import patch_cache_control
+from django.utils.text import get_valid_filename
+
+from qa.models import Attachment
+
+CHUNK_SIZE = 256 * 1024
+# shown by the browser, everything else is downloaded
+INLINE_TYPES = {'image/png', 'image/jpeg', 'image/gif', 'image/webp'}
+# stored or reused this recently, may be about to get an attachment
+RECENT_SECONDS = 3600
+
+
+def content_path(sha256):
+    return os.path.join(settings.UPLOADS_ROOT, sha256[:2], sha256[2:4], sha256)
+
+
+def _too_big():
+    return ValueError(f'The file is bigger than {settings.UPLOADS_MAX_SIZE // (1024 * 1024)} MB')
+
+
+def store(file):
+    """Writes the uploaded file to its content address, returns its (sha256, size)."""
+    tmp_dir = os.path.join(settings.UPLOADS_ROOT, 'tmp')
+    os.makedirs(tmp_dir, exist_ok=True)
+    digest = hashlib.sha256()
+    size = 0
+    out = tempfile.NamedTemporaryFile(dir=tmp_dir, delete=False)
+    try:
+        with out:
+            for chunk in file.chunks(CHUNK_SIZE):
+                size += len(chunk)
+                if size > settings.UPLOADS_MAX_SIZE:
+                    raise _too_big()
+                digest.update(chunk)
+                out.write(chunk)
+        sha256 = digest.hexdigest()
+        path = content_path(sha256)
+        if os.path.exists(path):
+            os.unlink(out.name)
+            # keeps remove_unused() off it while the new attachment is created
+            os.utime(path)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # readable by nginx
+            os.chmod(out.name, 0o644)
+            os.replace(out.name, path)
+    except BaseException:
+        if os.path.exists(out.name):
+            os.unlink(out.name)
+        raise
+    return sha256, size
+
+
+def attach(file, uploader, question, answer=None):
+    """Stores the uploaded file as an attachment of the question or its answer, ValueError if it is too big."""
+    if file.size > settings.UPLOADS_MAX_SIZE:
+        raise _too_big()
+    name = get_valid_filename(os.path.basename(file.name))[-255:] or 'file'
+    sha256, size = store(file)
+    return Attachment.objects.create(
+        question=question, answer=answer, uploader=uploader, name=name, size=size, sha256=sha256,
+        # by the name, whatever the client claims
+        content_type=mimetypes.guess_type(name)[0] or 'application/octet-stream',
+    )
+
+
+def remove_unused(hashes):
+    """
+    Removes the stored files of the hashes no attachment refers to any more. Returns the hashes
+    of the removed files and of the unused ones kept for being stored or reused lately.
+    """
+    used = set(Attachment.objects.filter(sha256__in=hashes).values_list('sha256', flat=True))
+    removed, recent = [], []
+    for sha256 in set(hashes) - used:
+        path = content_path(sha256)
+        try:
+            if os.path.getmtime(path) < time.time() - RECENT_SECONDS:
+                os.unlink(path)
+                removed.append(sha256)
+            else:
+                recent.append(sha256)
+        except FileNotFoundError:
+            pass
+    return removed, recent
+
+
+def _content_disposition(attachment, inline):
+    try:
+        attachment.name.encode('ascii')
+        filename = f'filename="{attachment.name}"'
+    except UnicodeEncodeError:
+        filename = f"filename*=utf-8''{quote(attachment.name)}"
+    return f'{"inline" if inline else "attachment"}; {filename}'
+
+
+def serve(attachment):
+    """Response sending the content of the attachment, by nginx or by the app."""
+    inline = attachment.content_type in INLINE_TYPES
+    if settings.UPLOADS_ACCEL_REDIRECT:
+        response = HttpResponse(content_type=attachment.content_type)
+        response['X-Accel-Redirect'] = settings.UPLOADS_ACCEL_PREFIX + attachment.path
+    else:
+        response = FileResponse(open(content_path(attachment.sha256), 'rb'), content_type=attachment.content_type)
+    response['Content-Disposition'] = _content_disposition(attachment, inline)
+    response['X-Content-Type-Options'] = 'nosniff'
+    # the permission to download is checked on every request
+    patch_cache_control(response, private=True)
+    return response
@@ -1,17 +1,27 @@
 from django.urls import path
-from .views import *
+from .lazy import LazyView
 
 
 urlpatterns = [
-    path('', question_list_new, name='new_questions'),
-    path('login/', login_view, name='login'),
-    path('signup/', signup, name='signup'),
-    path('question/<int:id>/', question_view, name='question'),
-    path('ask/', ask_add, name='ask'),
-    path('popular/', question_list_popular, name='popular'),
-    path('like/', add_like_to_the_question, name='like'),
-    path('logout/', logout_view, name='logout'),
-    path('answers/delete/', delete_answer, name='delete_answer'),
-    path('my-questions/', users_question_list, name='my_questions'),
-    path('question/<int:question_id>/delete/', delete_question, name='delete_question'),
+    path('', LazyView('qa.views.question_list_new'), name='new_questions'),
+    path('login/', LazyView('qa.views.login_view'), name='login'),
+    path('signup/', LazyView('qa.views.signup'), name='signup'),
+    path('question/<int:id>/', LazyView('qa.views.question_view'), name='question'),
+    path('question/<int:id>/answers/more/', LazyView('qa.views.more_answers'), name='more_answers'),
+    path('tag/<str:name>/', LazyView('qa.views.tag_feed'), name='tag'),
+    path('tag/<str:name>/popular/', LazyView('qa.views.tag_feed'), {'popular': True}, name='tag_popular'),
+    path('tags/autocomplete/', LazyView('qa.views.tags_autocomplete'), name='tags_autocomplete'),
+    path('ask/', LazyView('qa.views.ask_add'), name='ask'),
+    path('popular/', LazyView('qa.views.question_list_popular'), name='popular'),
+    path('trending/', LazyView('qa.views.question_list_trending'), name='trending'),
+    path('leaderboard/', LazyView('qa.views.leaderboard'), name='leaderboard'),
+    path('like/', LazyView('qa.views.add_like_to_the_question'), name='like'),
+    path('like/batch/', LazyView('qa.views.add_likes_batch'), name='like_batch'),
+    path('logout/', LazyView('qa.views.logout_view'), name='logout'),
+    path('answers/delete/', LazyView('qa.views.delete_answer'), name='delete_answer'),
+    path('notifications/', LazyView('qa.views.notifications_view'), name='notifications'),
+    path('my-questions/', LazyView('qa.views.users_question_list'), name='my_questions'),
+    path('attachments/upload/', LazyView('qa.views.upload_attachment'), name='upload_attachment'),
+    path('attachments/<int:id>/', LazyView('qa.views.attachment_view'), name='attachment'),
+    path('question/<int:question_id>/delete/', LazyView('qa.views.delete_question'), name='delete_question'),
 ]
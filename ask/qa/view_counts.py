@@ -0,0 +1,73 @@
+"""
+Question.view_count without a write per page view.
+
+A view is counted once per session, or per IP address for the clients without one, every
+VIEW_COUNT_DEDUP_SECONDS (remembered in the cache with cache.add()). Every worker adds the views up
+in memory and the first request VIEW_COUNT_FLUSH_SECONDS after its last write writes them with one
+UPDATE of all the viewed questions. A question viewed more than VIEW_COUNT_SAMPLE_ABOVE times in a
+worker since its last write is sampled: one view in VIEW_COUNT_SAMPLE_RATE is checked and counted
+as that many, sparing the cache the others. The question page reads the count with its validators
+(qa/conditional.py), so the count shown is not frozen in the cached page.
+
+The counts are approximate: the views of a worker not written yet, a few seconds of them, are lost
+when it exits, and the pages nginx serves from its cache (qa/proxy_cache.py) are not counted.
+"""
+import logging
+import random
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError
+from django.db.models import Case, F, IntegerField, Value, When
+
+from qa.models import Question
+from qa.ratelimit import client_ip
+
+logger = logging.getLogger(__name__)
+
+# the views counted by this worker since its last write, {question_id: views}
+_pending = Counter()
+_flushed_at = time.monotonic()
+_lock = threading.Lock()
+
+
+def _viewer(request):
+    session_key = request.session.session_key
+    return f'session:{session_key}' if session_key else f'ip:{client_ip(request)}'
+
+
+def viewed(request, question_id):
+    """Counts a view of the question unless the viewer has seen it lately."""
+    views = 1
+    rate = settings.VIEW_COUNT_SAMPLE_RATE
+    if rate > 1 and _pending.get(question_id, 0) > settings.VIEW_COUNT_SAMPLE_ABOVE:
+        if random.random() * rate >= 1:
+            return
+        views = rate
+    if cache.add(f'viewed:{question_id}:{_viewer(request)}', 1, settings.VIEW_COUNT_DEDUP_SECONDS):
+        with _lock:
+            _pending[question_id] += views
+    if time.monotonic() - _flushed_at >= settings.VIEW_COUNT_FLUSH_SECONDS:
+        flush()
+
+
+def flush():
+    """Writes the views counted by this worker with one UPDATE."""
+    global _pending, _flushed_at
+    with _lock:
+        pending, _pending = _pending, Counter()
+        _flushed_at = time.monotonic()
+    if not pending:
+        return
+    increments = Case(*[When(pk=question_id, then=Value(views)) for question_id, views in pending.items()],
+                      default=Value(0), output_field=IntegerField())
+    try:
+        Question.all_objects.filter(pk__in=list(pending)).update(view_count=F('view_count') + increments)
+    except DatabaseError as exc:
+        # tried again with the next write
+        logger.warning('Failed to write the views of %d questions: %s', len(pending), exc)
+        with _lock:
+            _pending.update(pending)
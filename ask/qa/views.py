@@ -1,17 +1,38 @@
+import json
+
+from django.conf import settings
 from django.shortcuts import render, get_object_or_404
+from django.template.loader import render_to_string
 from django.http import HttpResponseRedirect
 from django.http import Http404
 from django.core.paginator import Paginator, EmptyPage
+from django.db.models import Prefetch
 from django.urls import reverse
+from django.utils.dateparse import parse_datetime
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
+from django.views.decorators.http import require_POST
+from django.views.decorators.vary import vary_on_cookie
 
-from qa.models import Question, Answer, QuestionLikes
+from qa.models import Question, Answer, Attachment, QuestionLikes, QuestionTag, Tag
 from qa.forms import AskForm, AnswerForm, SignupForm, LoginForm
 from .ajax import HttpResponseAjax, HttpResponseAjaxError, login_required_ajax
+from . import (activity, deletion, notifications, reputation, singleflight, tags, thumbnails, trending, uploads,
+               view_counts)
+from .conditional import (content_changed, feed_cache_key, feed_condition, question_cache_key, question_condition,
+                          question_view_count)
+from .pagination import encode_cursor, decode_cursor, encode_rating_cursor, decode_rating_cursor
+from .proxy_cache import cache_for_anonymous
+from .ratelimit import ratelimit, client_ip, posted_username, too_many_requests, user_or_ip
+from .ratelimit import take as take_rate_limit
+from .votes import apply_votes
 
 
-def paginate(request, qs, base_url):
+def paginate(request, qs, base_url, cache_name=None):
+    """
+    Renders a page of the questions. The rendered list of a public feed (cache_name) and its number
+    of questions are cached until the feed version changes, a hit renders without querying them.
+    """
     limit = 10
     page = request.GET.get('page', 1)
     try:
@@ -20,6 +41,11 @@ def paginate(request, qs, base_url):
         raise Http404
     paginator = Paginator(qs, limit)
     paginator.baseurl = base_url
+    list_key = feed_cache_key(request, cache_name, page) if cache_name else None
+    if list_key:
+        # overrides the cached_property, the paginator doesn't run COUNT(*)
+        paginator.count = singleflight.cached(feed_cache_key(request, cache_name, 'count'),
+                                              lambda: Paginator(qs, limit).count, settings.FEED_CACHE_SECONDS)
     try:
         page = paginator.page(page)
     except EmptyPage:
@@ -28,29 +54,95 @@ def paginate(request, qs, base_url):
     content = {
         'questions': page.object_list,
         'paginator': paginator,
-        'page': page
+        'page': page,
+        'page_range': paginator.get_elided_page_range(page.number),
     }
+    if list_key:
+        content['questions_html'] = singleflight.cached(
+            list_key, lambda: render_to_string('questions_list.html', content), settings.FEED_CACHE_SECONDS)
     return render(request, 'questions_new.html', content)
 
 
+@cache_for_anonymous
+@vary_on_cookie
+@feed_condition
 def question_list_new(request):
     qs = Question.objects.new()
-    return paginate(request, qs, base_url='/?page=')
+    return paginate(request, qs, base_url='/?page=', cache_name='new')
 
 
+@cache_for_anonymous
+@vary_on_cookie
+@feed_condition
 def question_list_popular(request):
     qs = Question.objects.popular()
-    return paginate(request, qs, base_url=reverse('popular') + '?page=')
+    return paginate(request, qs, base_url=reverse('popular') + '?page=', cache_name='popular')
+
+
+@cache_for_anonymous
+@vary_on_cookie
+def question_list_trending(request):
+    """The questions viewed, voted and answered the most lately (qa/trending.py), refreshed every few seconds."""
+    questions = [question for question, _ in trending.questions()]
+    return paginate(request, questions, base_url=reverse('trending') + '?page=')
+
+
+@cache_for_anonymous
+@vary_on_cookie
+@feed_condition
+def tag_feed(request, name, popular=False):
+    """The questions with the tag, newest or most popular first, paged with ?after=<cursor>."""
+    tag = get_object_or_404(Tag, name=name)
+    encode, decode = (encode_rating_cursor, decode_rating_cursor) if popular else (encode_cursor, decode_cursor)
+    try:
+        after = decode(request.GET['after']) if request.GET.get('after') else None
+    except ValueError:
+        raise Http404
+    questions, last = QuestionTag.objects.feed(tag.pk, popular=popular, after=after)
+    content = {
+        'tag': tag,
+        'popular': popular,
+        'questions': questions,
+        'next_cursor': encode(last),
+    }
+    return render(request, 'questions_tag.html', content)
+
+
+@cache_for_anonymous
+def tags_autocomplete(request):
+    suggestions = tags.autocomplete(request.GET.get('q', ''))
+    return HttpResponseAjax(tags=[{'name': name, 'count': count} for name, count in suggestions])
 
 
 @login_required(login_url='/login/')
+@vary_on_cookie
+@feed_condition
 def users_question_list(request):
     qs = Question.objects.filter(author=request.user).order_by('-added_at')
     return paginate(request, qs, base_url=reverse('my_questions') + '?page=') 
 
 
+def _question_page(request, id):
+    """The question with its tags and the first page of its answers, cached until the question changes."""
+    def load():
+        question = get_object_or_404(
+            Question.objects.select_related('author').prefetch_related(
+                'tags', Prefetch('attachments', Attachment.objects.filter(answer=None), to_attr='own_attachments')),
+            pk=id)
+        answers, last = Answer.objects.page(question.id, limit=settings.ANSWERS_PAGE_SIZE)
+        return question, answers, last
+    key = question_cache_key(request, id)
+    if key is None:
+        raise Http404
+    return singleflight.cached(key, load, settings.QUESTION_CACHE_SECONDS)
+
+
+@cache_for_anonymous
+@vary_on_cookie
+@question_condition
+@ratelimit('answer')
 def question_view(request, id):
-    question = get_object_or_404(Question, pk=id)
+    question, answers, last = _question_page(request, id)
     if request.method == 'POST':
         request.POST = request.POST.copy()
         request.POST['question'] = question.id
@@ -61,14 +153,22 @@ def question_view(request, id):
             answer = form.save()
             answer.author = request.user
             answer.save()
+            activity.answer_added(answer)
+            notifications.answered(answer)
+            trending.record(question.id, answers=1)
+            content_changed(question.id)
             question = answer.question
             return HttpResponseRedirect(question.get_absolute_url())
     else:
         form = AnswerForm()
+        trending.record(question.id, views=1)
+        view_counts.viewed(request, question.id)
 
     content = {
         'question': question,
-        'answers': question.answer_set.all(),
+        'answers': answers,
+        'next_cursor': encode_cursor(last),
+        'view_count': question_view_count(request, question.id),
         'form': form,
         'session': request.session,
         'user': request.user
@@ -81,6 +181,58 @@ def question_view(request, id):
     return render(request, 'question.html', content)
 
 
+@cache_for_anonymous
+@vary_on_cookie
+@question_condition
+def more_answers(request, id):
+    """
+    Next page of the answers to the question for the "load more" button:
+    the rendered answers and the cursor of the page after them.
+    """
+    if not Question.objects.filter(pk=id).exists():
+        raise Http404
+    try:
+        after = decode_cursor(request.GET.get('after', ''))
+    except ValueError:
+        return HttpResponseAjaxError(code='bad_params', message='Invalid cursor')
+    answers, last = Answer.objects.page(id, after=after, limit=settings.ANSWERS_PAGE_SIZE)
+    html = render_to_string('answers_page.html', {'answers': answers, 'user': request.user}, request)
+    return HttpResponseAjax(html=html, next=encode_cursor(last))
+
+
+@cache_for_anonymous
+@vary_on_cookie
+def leaderboard(request):
+    try:
+        number = int(request.GET.get('page', 1))
+        rows = reputation.leaderboard_page(number)
+    except ValueError:
+        raise Http404
+    content = {
+        'rows': rows,
+        'number': number,
+        'pages': reputation.leaderboard_pages(),
+    }
+    return render(request, 'leaderboard.html', content)
+
+
+@login_required(login_url='/login/')
+def notifications_view(request):
+    """The unread notifications, marked read by posting the time of the newest one shown."""
+    if request.method == 'POST':
+        try:
+            until = parse_datetime(request.POST.get('until', ''))
+        except ValueError:
+            until = None
+        if until is None:
+            raise Http404
+        notifications.mark_read(request.user, until)
+        return HttpResponseRedirect(reverse('notifications'))
+    items = notifications.unread(request.user)
+    return render(request, 'notifications.html', {'items': items, 'user': request.user})
+
+
+@ratelimit('ask')
 def ask_add(request):
     if request.method == 'POST':
         form = AskForm(request.POST)
@@ -90,12 +242,15 @@ def ask_add(request):
             question = form.save()
             question.author = request.user
             question.save()
+            activity.question_added(question)
+            content_changed()
             return HttpResponseRedirect(question.get_absolute_url())
     else:
         form = AskForm()
     return render(request, 'ask_form.html', {'form': form, 'session': request.session, 'user': request.user})
 
 
+@ratelimit('signup', key=client_ip)
 def signup(request):
     if request.method == 'POST':
         form = SignupForm(request.POST)
@@ -108,6 +263,8 @@ def signup(request):
     return render(request, 'signup_form.html', {'form': form})
 
 
+@ratelimit('login', key=client_ip)
+@ratelimit('login_username', key=posted_username)
 def login_view(request):
     if request.method == 'POST':
         username = request.POST.get('username')
@@ -130,53 +287,88 @@ def logout_view(request):
 
 
 @login_required_ajax
+@ratelimit('vote')
 def add_like_to_the_question(request):
-    user = request.user
     question = get_object_or_404(Question, pk=request.POST.get('question_id'))
-    operation = request.POST.get('operation')
-    # if user is authenticated
-    if question in Question.objects.filter(likes=user):
-        # request user has rated this question
-        row = QuestionLikes.objects.get(question=question, user=user)
-        if row.is_liked and operation == 'Dislike':
-            question.rating -= 2
-            row.is_liked = False
-            row.save()
-        elif row.is_liked and operation == 'Like':
-            question.rating -= 1
-            row.delete()
-        elif not row.is_liked and operation == 'Like':
-            question.rating += 2
-            row.is_liked = True
-            row.save()
-        elif not row.is_liked and operation == 'Dislike':
-            question.rating += 1
-            row.delete()
-    else:
-        # request user hasn't rated this question
-        QuestionLikes.objects.create(question=question, user=user, is_liked=(operation == 'Like'))
-        if operation == 'Like':
-            question.rating += 1
-        elif operation == 'Dislike':
-            question.rating -= 1
-    question.save()
+    results, voted = apply_votes(request.user, [(question.id, request.POST.get('operation'))])
+    if results[0]['status'] != 'ok':
+        return HttpResponseAjaxError(code=results[0]['code'], message=results[0]['message'])
+    notifications.voted(request.user, voted)
+    content_changed(question.id)
+    return HttpResponseAjax(message='Your rating is accepted')
 
-    if question:
-        return HttpResponseAjax(message='Your rating is accepted')
 
-    return HttpResponseAjaxError(code='bad_params', message='Question does not exist')
+@require_POST
+@login_required_ajax
+def add_likes_batch(request):
+    """
+    Applies many votes of the user in one request, the body is JSON:
+    {"votes": [{"question_id": 1, "operation": "Like"}, ...]}
+    Every vote takes a token of the 'vote' rate limit, like a vote through /like/.
+    """
+    try:
+        votes = [(int(vote['question_id']), vote['operation']) for vote in json.loads(request.body)['votes']]
+    except (ValueError, KeyError, TypeError):
+        return HttpResponseAjaxError(code='bad_params',
+                                     message='Expected {"votes": [{"question_id": ..., "operation": ...}, ...]}')
+    if len(votes) > settings.VOTES_BATCH_SIZE:
+        return HttpResponseAjaxError(code='bad_params',
+                                     message=f'At most {settings.VOTES_BATCH_SIZE} votes can be sent at once')
+    try:
+        retry_after = take_rate_limit('vote', user_or_ip(request), count=max(len(votes), 1))
+    except ValueError as exc:
+        return HttpResponseAjaxError(code='bad_params', message=f'{exc} votes can be sent')
+    if retry_after:
+        return too_many_requests(request, retry_after)
+    results, voted = apply_votes(request.user, votes)
+    if voted:
+        notifications.voted(request.user, voted)
+        content_changed(*voted)
+    return HttpResponseAjax(results=results)
 
 
+@ratelimit('delete')
 def delete_answer(request):
     # id in request.POST
     answer = get_object_or_404(Answer, pk=request.POST.get('answer_id')) 
     if request.user == answer.author:
-        answer.delete()
+        deletion.delete_answer(answer)
+        content_changed(answer.question_id)
     # return HttpResponseRedirect(answer.question.get_absolute_url())
     return HttpResponseAjax(message='Your answer has been successfully deleted!')
 
+# deletes on GET as well
+@ratelimit('delete', methods=('GET', 'POST'))
 def delete_question(request, question_id):
     question = get_object_or_404(Question, pk=question_id)
     if request.user == question.author:
-        question.delete()
+        deletion.delete_question(question)
+        content_changed(question_id)
     return HttpResponseRedirect(reverse('my_questions'))
+
+
+@require_POST
+@login_required_ajax
+@ratelimit('upload')
+def upload_attachment(request):
+    """Attaches the uploaded file to the question (question_id) or its answer (answer_id) of the user."""
+    question = get_object_or_404(Question, pk=request.POST.get('question_id'))
+    answer = None
+    if request.POST.get('answer_id'):
+        answer = get_object_or_404(Answer, pk=request.POST['answer_id'], question=question)
+    if request.user != (answer.author if answer else question.author):
+        return HttpResponseAjaxError(code='forbidden', message='Only the author can attach files')
+    if 'file' not in request.FILES:
+        return HttpResponseAjaxError(code='bad_params', message='No file uploaded')
+    try:
+        attachment = uploads.attach(request.FILES['file'], request.user, question, answer)
+    except ValueError as exc:
+        return HttpResponseAjaxError(code='bad_params', message=str(exc))
+    thumbnails.attached(attachment)
+    content_changed(question.id)
+    return HttpResponseAjax(id=attachment.id, name=attachment.name, url=attachment.get_absolute_url())
+
+
+def attachment_view(request, id):
+    attachment = get_object_or_404(Attachment.objects.visible(), pk=id)
+    return uploads.serve(attachment)
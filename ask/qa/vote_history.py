@@ -0,0 +1,83 @@
+"""
+History of the question ratings for charts.
+
+Voting only appends the rating changes to VoteEvent (one INSERT per request). Compaction, e.g.
+./manage.py compact_vote_events every few minutes from cron, adds them up into one
+QuestionRatingHour row per question and hour and deletes them, so the log stays short and the
+charts read a row per hour whatever the number of votes.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Sum
+
+from qa.models import Question, QuestionRatingHour, VoteEvent
+
+
+def record(deltas):
+    """Logs the rating changes {question_id: delta} of a vote request."""
+    events = [VoteEvent(question_id=question_id, delta=delta) for question_id, delta in deltas.items() if delta]
+    if events:
+        VoteEvent.objects.bulk_create(events)
+
+
+def _add(hours):
+    """Adds {(question_id, hour): [delta, votes]} to the hourly rows with a fixed number of queries."""
+    QuestionRatingHour.objects.bulk_create(
+        [QuestionRatingHour(question_id=question_id, hour=hour) for question_id, hour in hours],
+        ignore_conflicts=True,
+    )
+    rows = QuestionRatingHour.objects.select_for_update().filter(
+        question_id__in={question_id for question_id, _ in hours}, hour__in={hour for _, hour in hours})
+    changed = []
+    for row in rows:
+        if (row.question_id, row.hour) in hours:
+            delta, votes = hours[row.question_id, row.hour]
+            row.delta += delta
+            row.votes += votes
+            changed.append(row)
+    QuestionRatingHour.objects.bulk_update(changed, ['delta', 'votes'])
+
+
+def compact(batch_size=1000):
+    """
+    Rolls the logged events up into the hourly rows, batch_size events per transaction, the
+    events of the purged questions are dropped. Yields the number of events compacted by a batch.
+    """
+    while True:
+        with transaction.atomic():
+            # by the primary key the oldest come first, other compactions skip the locked ones
+            events = list(VoteEvent.objects.select_for_update(skip_locked=True).order_by('pk')
+                          .values_list('pk', 'question_id', 'delta', 'created_at')[:batch_size])
+            if not events:
+                return
+            existing = set(Question.all_objects.filter(pk__in={event[1] for event in events})
+                           .values_list('pk', flat=True))
+            hours = defaultdict(lambda: [0, 0])
+            for _, question_id, delta, created_at in events:
+                if question_id in existing:
+                    totals = hours[question_id, created_at.replace(minute=0, second=0, microsecond=0)]
+                    totals[0] += delta
+                    totals[1] += 1
+            if hours:
+                _add(hours)
+            VoteEvent.objects.filter(pk__in=[event[0] for event in events]).delete()
+        yield len(events)
+
+
+def history(question_id, since=None):
+    """
+    [(hour, delta, votes, rating), ...] of the question from the hourly rows only, where rating is
+    the sum of the logged changes up to the end of the hour. The hours from `since` on, starting
+    from the sum of the earlier ones.
+    """
+    rows = QuestionRatingHour.objects.filter(question_id=question_id).order_by('hour')
+    rating = 0
+    if since is not None:
+        rating = rows.filter(hour__lt=since).aggregate(total=Sum('delta'))['total'] or 0
+        rows = rows.filter(hour__gte=since)
+    result = []
+    for hour, delta, votes in rows.values_list('hour', 'delta', 'votes'):
+        rating += delta
+        result.append((hour, delta, votes, rating))
+    return result
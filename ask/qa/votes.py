@@ -0,0 +1,100 @@
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import F
+
+from qa import activity, reputation, trending, vote_history
+from qa.models import Question, QuestionLikes, QuestionTag
+
+LIKE = 'Like'
+DISLIKE = 'Dislike'
+OPERATIONS = (LIKE, DISLIKE)
+
+
+def transition(is_liked, operation):
+    """
+    Returns the new rate of a user (True - like, False - dislike, None - no rate) who has
+    rated the question with is_liked and presses operation, and the change of the question rating.
+    Pressing the same button again takes the rate back.
+    """
+    if is_liked is None:
+        return (True, 1) if operation == LIKE else (False, -1)
+    if is_liked:
+        return (None, -1) if operation == LIKE else (False, -2)
+    return (True, 2) if operation == LIKE else (None, 1)
+
+
+def rate_name(is_liked):
+    if is_liked is None:
+        return None
+    return LIKE if is_liked else DISLIKE
+
+
+def apply_votes(user, votes):
+    """
+    Applies the votes [(question_id, operation), ...] of the user in one transaction with a fixed
+    number of queries: the rates are written with bulk operations and the ratings with one
+    UPDATE per distinct rating change, the same goes for the reputation of the authors.
+    Returns a result dict per vote and the ids of the voted questions.
+    """
+    question_ids = {question_id for question_id, _ in votes}
+    with transaction.atomic():
+        authors = dict(Question.objects.filter(pk__in=question_ids).values_list('pk', 'author_id'))
+        existing = set(authors)
+        rows = {
+            row.question_id: row
+            for row in QuestionLikes.objects.select_for_update().filter(user=user, question_id__in=existing)
+        }
+        initial = {question_id: row.is_liked for question_id, row in rows.items()}
+        state = dict(initial)
+        deltas = defaultdict(int)
+
+        results = []
+        for question_id, operation in votes:
+            if question_id not in existing:
+                results.append({'question_id': question_id, 'status': 'error', 'code': 'bad_params',
+                                'message': 'Question does not exist'})
+                continue
+            if operation not in OPERATIONS:
+                results.append({'question_id': question_id, 'status': 'error', 'code': 'bad_params',
+                                'message': 'Unknown operation'})
+                continue
+            state[question_id], delta = transition(state.get(question_id), operation)
+            deltas[question_id] += delta
+            results.append({'question_id': question_id, 'status': 'ok', 'rate': rate_name(state[question_id])})
+
+        created, updated, deleted = [], [], []
+        for question_id in deltas:
+            old, new = initial.get(question_id), state.get(question_id)
+            if old == new:
+                continue
+            if new is None:
+                deleted.append(rows[question_id].pk)
+            elif old is None:
+                created.append(QuestionLikes(question_id=question_id, user=user, is_liked=new))
+            else:
+                rows[question_id].is_liked = new
+                updated.append(rows[question_id])
+        if created:
+            QuestionLikes.objects.bulk_create(created)
+        if updated:
+            QuestionLikes.objects.bulk_update(updated, ['is_liked'])
+        if deleted:
+            QuestionLikes.objects.filter(pk__in=deleted).delete()
+
+        by_delta = defaultdict(list)
+        for question_id, delta in deltas.items():
+            if delta:
+                by_delta[delta].append(question_id)
+        for delta, ids in by_delta.items():
+            Question.objects.filter(pk__in=ids).update(rating=F('rating') + delta)
+            QuestionTag.objects.filter(question_id__in=ids).update(rating=F('rating') + delta)
+        vote_history.record(deltas)
+
+        activity.changed(user.id, vote_count=len(created) - len(deleted))
+        reputation.credit_votes(authors, deltas)
+
+    voted = Counter(result['question_id'] for result in results if result['status'] == 'ok')
+    for question_id, count in voted.items():
+        trending.record(question_id, votes=count)
+    return results, list(deltas)
@@ -1,10 +1,53 @@
+"""
+Health check and query echo service, served behind nginx at /hello/:
+
+    /hello/health        "ok", for load balancer health checks
+    /hello/?a=1&b=x%20y  the decoded query parameters, one "name=value" per line,
+                         or a JSON list of [name, value] pairs with "Accept: application/json"
+
+Responses that never change are encoded once at import time. Every response gets a list
+of headers of its own, a server or middleware may append to it.
+"""
+from json import dumps
+from urllib.parse import parse_qsl
+
+STATUS_OK = '200 OK'
+
+TEXT = ('Content-Type', 'text/plain; charset=utf-8')
+JSON = ('Content-Type', 'application/json')
+
+HEALTH_BODY = b'ok\n'
+HEALTH_HEADERS = (TEXT, ('Content-Length', str(len(HEALTH_BODY))), ('Cache-Control', 'no-store'))
+
+EMPTY_TEXT_HEADERS = (TEXT, ('Content-Length', '0'))
+EMPTY_JSON_BODY = b'[]'
+EMPTY_JSON_HEADERS = (JSON, ('Content-Length', str(len(EMPTY_JSON_BODY))))
+
+
+def wants_json(environ):
+	return 'application/json' in environ.get('HTTP_ACCEPT', '')
+
+
 def app(environ, start_response):
-	data = '\n'.join(environ['QUERY_STRING'].split('&'))
-	data = bytes(data, 'utf-8')
-	status = '200 OK'
-	response_headers = [
-		('Content-Type', 'text/plain'),
-		('Content-Length', str(len(data)))
-	]
-	start_response(status, response_headers)
-	return iter([data])
+	if environ.get('PATH_INFO', '').rstrip('/').endswith('/health'):
+		start_response(STATUS_OK, list(HEALTH_HEADERS))
+		return [HEALTH_BODY]
+
+	query = environ.get('QUERY_STRING', '')
+	as_json = wants_json(environ)
+	if not query:
+		if as_json:
+			start_response(STATUS_OK, list(EMPTY_JSON_HEADERS))
+			return [EMPTY_JSON_BODY]
+		start_response(STATUS_OK, list(EMPTY_TEXT_HEADERS))
+		return [b'']
+
+	pairs = parse_qsl(query, keep_blank_values=True)
+	if as_json:
+		data = dumps(pairs, ensure_ascii=False, separators=(',', ':')).encode()
+		content_type = JSON
+	else:
+		data = '\n'.join(name + '=' + value for name, value in pairs).encode()
+		content_type = TEXT
+	start_response(STATUS_OK, [content_type, ('Content-Length', str(len(data)))])
+	return [data]
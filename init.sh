@@ -1,2 +1,6 @@
 sudo ln -sf /home/box/web/etc/nginx.conf /etc/nginx/sites-enabled/default
+# the CSS and JavaScript bundles nginx serves from public/
+(cd /home/box/web/ask && python3 manage.py build_assets)
+# the queued background work (qa/tasks.py): profile counters, proxy cache refreshes, digests, thumbnails
+(cd /home/box/web/ask && nohup python3 manage.py run_tasks >> /tmp/run_tasks.log 2>&1 &)
 sudo /etc/init.d/nginx restart